@@ -0,0 +1,379 @@
+"""Append-only audit log of attempts, solves and leaks, and offline analytics over it.
+
+Report on a log directory with:
+
+    python -m audit audit/ --top 5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from challenges import normalize_solution
+from progress import player_key
+
+# timestamp, player id, answer id, channel id, kind, source
+RECORD = struct.Struct("<dIIHBB")
+KINDS = ("attempt", "solve", "leak")
+ATTEMPT, SOLVE, LEAK = range(len(KINDS))
+SOURCES = ("query", "channel")
+NAMES = "names.jsonl"
+SEGMENT = "segment-{:06d}.bin"
+# Wrong answers are kept for the report, long ones are cut
+MAX_ANSWER = 100
+# Distinct wrong answers whose text goes to the sidecar, later ones are only counted
+ANSWER_NAMES = 100_000
+
+
+class AuditLog:
+    """Writes fixed-size event records into size-capped segment files.
+
+    Players, channels and wrong answers are stored as ids, the names go to
+    an append-only sidecar file. Wrong answers are arbitrary text, so their
+    id is a hash of it and only the first ``max_answer_names`` of them are
+    named. Records are buffered and written in batches, at most
+    ``flush_interval`` seconds after they happen.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes=64 * 1024 * 1024,
+        batch_size=1000,
+        flush_interval=1.0,
+        max_answer_names=ANSWER_NAMES,
+        clock=time.time,
+    ):
+        self.directory = directory
+        # Records never straddle two segments
+        self.segment_bytes = max(segment_bytes - segment_bytes % RECORD.size, RECORD.size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_answer_names = max_answer_names
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self.ids = {kind: {} for kind in ("player", "channel")}
+        self.named_answers = set()  # ids of the answers named in the sidecar
+        self.names_file = open(os.path.join(directory, NAMES), "a+", encoding="utf-8")
+        self.names_file.seek(0)
+        for line in self.names_file:
+            entry = json.loads(line)
+            if entry["kind"] == "answer":
+                self.named_answers.add(entry["id"])
+            else:
+                self.ids[entry["kind"]][entry["name"]] = entry["id"]
+        segments = list_segments(directory)
+        self.segment = int(segments[-1][-10:-4]) if segments else 1
+        self.file = self._open_segment()
+        self.records = bytearray()
+        self.names = []
+        self.pending = 0
+        self.written = 0
+        self._flush_handle = None
+
+    def _open_segment(self):
+        segment = open(os.path.join(self.directory, SEGMENT.format(self.segment)), "ab")
+        # Drop a record torn by a crash, readers would skip it anyway
+        size = segment.seek(0, os.SEEK_END)
+        if size % RECORD.size:
+            segment.truncate(size - size % RECORD.size)
+            segment.seek(0, os.SEEK_END)
+        return segment
+
+    def _id(self, kind, name):
+        ids = self.ids[kind]
+        found = ids.get(name)
+        if found is None:
+            found = ids[name] = len(ids) + 1
+            self.names.append(json.dumps({"kind": kind, "id": found, "name": name}) + "\n")
+        return found
+
+    def _answer_id(self, answer):
+        found = hash_answer(answer)
+        if found not in self.named_answers and len(self.named_answers) < self.max_answer_names:
+            self.named_answers.add(found)
+            self.names.append(json.dumps({"kind": "answer", "id": found, "name": answer}) + "\n")
+        return found
+
+    def record(self, kind, channel, player, source="query", answer=None):
+        """Queue one event, ``answer`` is only kept for wrong attempts.
+
+        Callers leave out answers that solve some challenge, the log must not
+        hold real flags.
+        """
+        answer_id = 0
+        if answer is not None:
+            answer_id = self._answer_id(normalize_solution(answer)[:MAX_ANSWER])
+        self.records += RECORD.pack(
+            self.clock(),
+            self._id("player", player_key(player)),
+            answer_id,
+            self._id("channel", channel) if channel else 0,
+            kind,
+            SOURCES.index(source),
+        )
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+        else:
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        """Arm a delayed flush, or flush right away when no event loop is running."""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """Write the queued names and records, starting new segments as they fill up."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.names:
+            # Names first, so every id in a segment can be resolved
+            self.names_file.writelines(self.names)
+            self.names_file.flush()
+            self.names = []
+        records, self.records = self.records, bytearray()
+        view = memoryview(records)
+        while view:
+            room = self.segment_bytes - self.file.tell()
+            room -= room % RECORD.size
+            if room <= 0:
+                self.file.close()
+                self.segment += 1
+                self.file = self._open_segment()
+                continue
+            self.file.write(view[:room])
+            view = view[room:]
+        self.file.flush()
+        self.written += self.pending
+        self.pending = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        self.names_file.close()
+
+
+def hash_answer(answer):
+    """Id of a wrong answer, a 32-bit hash of its text that is never 0."""
+    digest = hashlib.blake2b(answer.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def list_segments(directory):
+    """Segment file names of a log, oldest first."""
+    return sorted(
+        name
+        for name in os.listdir(directory)
+        if name.startswith("segment-") and name.endswith(".bin")
+    )
+
+
+def read_names(directory):
+    """{kind: {id: name}} from a log's sidecar file."""
+    names = {"player": {}, "channel": {0: "?"}, "answer": {}}
+    path = os.path.join(directory, NAMES)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as sidecar:
+            for line in sidecar:
+                entry = json.loads(line)
+                names[entry["kind"]][entry["id"]] = entry["name"]
+    return names
+
+
+def iter_records(directory):
+    """Yield every record of a log, memory-mapping one segment at a time."""
+    for name in list_segments(directory):
+        with open(os.path.join(directory, name), "rb") as segment:
+            size = os.fstat(segment.fileno()).st_size
+            usable = size - size % RECORD.size
+            if not usable:
+                continue
+            with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    yield from RECORD.iter_unpack(view[:usable])
+
+
+def column(mapped, count, offsets, typecode="Q"):
+    """Record bytes at ``offsets`` side by side as one native number per record.
+
+    Strided slices of the mapping are copied into place, so a whole segment
+    is turned into Counter or set keys without a Python loop per record.
+    """
+    width = struct.calcsize(typecode)
+    offsets = list(offsets) + [None] * (width - len(offsets))
+    if sys.byteorder == "big":
+        offsets.reverse()
+    packed = bytearray(width * count)
+    end = count * RECORD.size
+    for position, offset in enumerate(offsets):
+        if offset is not None:
+            packed[position::width] = mapped[offset : end : RECORD.size]
+    return memoryview(packed).cast(typecode)
+
+
+def split_key(key, layout):
+    """Undo ``column`` for one key, ``layout`` is the struct format of its fields."""
+    return struct.unpack_from("<" + layout, key.to_bytes(8, "little"))
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Nearest-rank percentiles of a list of numbers."""
+    if not values:
+        return {f"p{point}": None for point in points}
+    ordered = sorted(values)
+    return {f"p{point}": ordered[max(0, -(-point * len(ordered) // 100) - 1)] for point in points}
+
+
+def summarize_segment(path):
+    """Aggregates of one segment, combined across segments by ``analyze``."""
+    kinds = Counter()  # (channel, kind) -> events
+    pairs = set()  # (player, channel, kind)
+    answers = Counter()  # (answer, channel) -> wrong attempts
+    first_seen = {}  # player -> timestamp of their first event
+    solves = []  # (timestamp, player, channel), in order
+    with open(path, "rb") as segment:
+        count = os.fstat(segment.fileno()).st_size // RECORD.size
+        if not count:
+            return count, kinds, pairs, answers, first_seen, solves
+        with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            kinds.update(column(mapped, count, (16, 17, 18), "I"))
+            pairs.update(column(mapped, count, (8, 9, 10, 11, 16, 17, 18)))
+            # Only wrong attempts carry an answer
+            answers.update(column(mapped, count, (12, 13, 14, 15, 16, 17)))
+            players = column(mapped, count, range(8, 12), "I")
+            timestamps = column(mapped, count, range(8), "d")
+            # Walking backwards, the first event of each player is the one kept
+            first_seen.update(zip(players[::-1], timestamps[::-1]))
+            # Solves are few, they are visited one by one
+            solve_byte = bytes([SOLVE])
+            kind_bytes = mapped[18 : count * RECORD.size : RECORD.size]
+            index = kind_bytes.find(solve_byte)
+            while index != -1:
+                timestamp, player, _, channel, _, _ = RECORD.unpack_from(
+                    mapped, index * RECORD.size
+                )
+                solves.append((timestamp, player, channel))
+                index = kind_bytes.find(solve_byte, index + 1)
+    return count, kinds, pairs, answers, first_seen, solves
+
+
+def combine_segments(parts):
+    """Combine ``summarize_segment`` results, oldest segment first.
+
+    Returns (events, kinds, pairs, answers, first_seen, solve_times), the
+    solve times of a channel being the seconds since each solver's previous
+    solve, or their first event.
+    """
+    events = 0
+    kinds = Counter()
+    pairs = set()
+    answers = Counter()
+    first_seen = {}
+    last_solve = {}  # player -> timestamp of their latest solve
+    solve_times = {}  # channel -> seconds
+    for count, segment_kinds, segment_pairs, segment_answers, segment_first, solves in parts:
+        events += count
+        kinds.update(segment_kinds)
+        pairs |= segment_pairs
+        answers.update(segment_answers)
+        for player, timestamp in segment_first.items():
+            first_seen.setdefault(player, timestamp)
+        for timestamp, player, channel in solves:
+            since = last_solve.get(player, first_seen[player])
+            solve_times.setdefault(channel, []).append(timestamp - since)
+            last_solve[player] = timestamp
+    return events, kinds, pairs, answers, first_seen, solve_times
+
+
+def top_wrong_answers(answers, answer_names, top):
+    """{channel: [(answer, times)]}, the ``top`` most frequent wrong answers of each channel."""
+    wrong = {}
+    for key, times in answers.most_common():
+        answer, channel = split_key(key, "IH")
+        if answer:
+            found = wrong.setdefault(channel, [])
+            if len(found) < top:
+                found.append((answer_names.get(answer, "?"), times))
+    return wrong
+
+
+def analyze(directory, top=5, workers=1):
+    """Per-challenge funnel, solve times and most frequent wrong answers.
+
+    Segments are summarized in ``workers`` processes and combined in order.
+    """
+    paths = [os.path.join(directory, name) for name in list_segments(directory)]
+    executor = None
+    if workers > 1 and len(paths) > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        parts = (
+            executor.map(summarize_segment, paths) if executor else map(summarize_segment, paths)
+        )
+        events, kinds, pairs, answers, first_seen, solve_times = combine_segments(parts)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    names = read_names(directory)
+    totals = {}  # channel -> events per kind
+    for key, events_of_kind in kinds.items():
+        channel, kind = split_key(key, "HB")
+        totals.setdefault(channel, [0] * len(KINDS))[kind] += events_of_kind
+    engaged = set()
+    for key in pairs:
+        player, channel, kind = split_key(key, "IHB")
+        if kind != LEAK:
+            engaged.add((player, channel))
+    players_of = Counter(channel for _, channel in engaged)
+    wrong = top_wrong_answers(answers, names["answer"], top)
+    challenges = {}
+    for channel, (attempted, solved, leaked) in sorted(totals.items()):
+        players = players_of[channel]
+        challenges[names["channel"].get(channel, "?")] = {
+            "players": players,
+            "solved": solved,
+            "solve_rate": round(solved / players, 3) if players else None,
+            "attempts": attempted + solved,
+            "leaks": leaked,
+            "solve_seconds": percentiles(solve_times.get(channel, [])),
+            "wrong_answers": wrong.get(channel, []),
+        }
+    return {"events": events, "players": len(first_seen), "challenges": challenges}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on an audit log")
+    parser.add_argument("directory")
+    parser.add_argument("--top", type=int, default=5, help="wrong answers per challenge")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="processes reading segments"
+    )
+    args = parser.parse_args()
+    started = time.perf_counter()
+    report = analyze(args.directory, args.top, args.workers)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measure messages/sec through the PRIVMSG dispatcher.
+
+The synthetic mix is 90% channel chatter and 10% private submissions.
+Run from the repository root:
+
+    python -m benchmarks.bench_dispatch
+"""
+
+import logging
+import random
+import time
+
+from bot import CTFGame
+
+MESSAGES = 100_000
+
+
+class Mask:
+    def __init__(self, nick):
+        self.nick = nick
+        self.host = f"{nick}@example.com"
+
+
+class StubBot:
+    """Just enough of irc3.IrcBot for CTFGame, every command is discarded."""
+
+    nick = "CTFGameBot"
+
+    def __init__(self):
+        self.log = logging.getLogger("bench")
+        self.log.setLevel(logging.WARNING)
+        self.config = {"instance_secret": "bench"}
+
+    def privmsg(self, *args, **kwargs):
+        pass
+
+    kick = topic = join = send_line = privmsg
+
+
+def make_messages(count):
+    """Build a shuffled 90% chatter / 10% submission mix."""
+    messages = []
+    for i in range(count):
+        mask = Mask(f"player{i % 500}")
+        if i % 10 == 0:
+            messages.append((mask, "PRIVMSG", StubBot.nick, "not the answer"))
+        else:
+            messages.append((mask, "PRIVMSG", "#CypherCon", "just chatting about the game"))
+    random.shuffle(messages)
+    return messages
+
+
+def main():
+    game = CTFGame(StubBot())
+    messages = make_messages(MESSAGES)
+    start = time.perf_counter()
+    for message in messages:
+        game.on_privmsg(*message)
+    elapsed = time.perf_counter() - start
+    print(f"{MESSAGES / elapsed:,.0f} messages/sec")
+    for route, count in sorted(game.router.stats().items()):
+        print(f"  {route}: {count}")
+
+
+if __name__ == "__main__":
+    main()
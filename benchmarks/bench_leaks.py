@@ -0,0 +1,43 @@
+"""Compare leak scan cost per channel message against a per-solution substring loop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_leaks
+"""
+
+import timeit
+
+from benchmarks.bench_solution_index import make_challenges
+from challenges import ChallengeSnapshot, canonical_solution
+from leaks import LeakDetector
+
+SIZES = (7, 100, 1000)
+NUMBER = 2000
+MESSAGE = "has anyone figured out the binary one yet? i keep getting something odd"
+
+
+def naive_scan(solutions, text):
+    """The obvious approach: one substring search per solution."""
+    text = canonical_solution(text)
+    return [channel for channel, solution in solutions if solution in text]
+
+
+def run(count):
+    snapshot = ChallengeSnapshot(make_challenges(count))
+    solutions = list(snapshot.canonical.items())
+    detector = LeakDetector()
+    detector.compile(snapshot)
+    naive = timeit.timeit(lambda: naive_scan(solutions, MESSAGE), number=NUMBER)
+    matcher = timeit.timeit(lambda: detector.scan(snapshot, MESSAGE), number=NUMBER)
+    return naive / NUMBER * 1e6, matcher / NUMBER * 1e6
+
+
+def main():
+    print(f"{'solutions':>10} {'naive (us)':>12} {'aho-corasick (us)':>18}")
+    for count in SIZES:
+        naive, matcher = run(count)
+        print(f"{count:>10} {naive:>12.2f} {matcher:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
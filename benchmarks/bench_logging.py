@@ -0,0 +1,93 @@
+"""Compare handler throughput with the bot logging at INFO, at WARNING and not at all.
+
+Every message in the mix reaches a handler that logs: private submissions,
+challenge channel attempts and joins. Events are not sampled, so at INFO
+every one of them is logged. Records go to /dev/null, either through the
+logging queue thread or written directly. Verifying answers costs far more
+than logging, so the cost of logging is reported on its own, per message,
+against the run with logging off. Run from the repository root:
+
+    python -m benchmarks.bench_logging
+"""
+
+import logging
+import os
+import time
+
+from benchmarks.bench_dispatch import Mask, StubBot
+from bot import CTFGame
+from eventlog import setup_queue_logging
+
+MESSAGES = 20_000
+UNLIMITED = "1000000/60"
+OFF = logging.CRITICAL + 1
+ROUNDS = 3
+
+
+def make_events(count):
+    """A mix of 40% submissions, 40% channel attempts and 20% joins."""
+    events = []
+    for i in range(count):
+        mask = Mask(f"player{i % 500}")
+        if i % 5 < 2:
+            events.append(("privmsg", (mask, "PRIVMSG", StubBot.nick, "not the answer")))
+        elif i % 5 < 4:
+            events.append(("privmsg", (mask, "PRIVMSG", "#challenge-2-binary", "maybe paris")))
+        else:
+            events.append(("join", (mask, "#challenge-1-welcome")))
+    return events
+
+
+def run(level, queued):
+    logger = logging.getLogger(f"bench.logging.{logging.getLevelName(level)}.{queued}")
+    logger.propagate = False
+    logger.setLevel(level)
+    devnull = open(os.devnull, "w")
+    logger.addHandler(logging.StreamHandler(devnull))
+    stop = setup_queue_logging(logger.name) if queued else None
+    bot = StubBot()
+    bot.log = logger
+    bot.config.update(
+        {f"ratelimit_{category}": UNLIMITED for category in ("channel", "submission")}
+    )
+    bot.config["log_sample"] = ""
+    game = CTFGame(bot)
+    events = make_events(MESSAGES)
+    start = time.perf_counter()
+    for kind, args in events:
+        if kind == "join":
+            game.handle_join(*args)
+        else:
+            game.on_privmsg(*args)
+    elapsed = time.perf_counter() - start
+    if stop is not None:
+        stop()
+    # Rounds share the logger, the next one brings its own handler
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    devnull.close()
+    return MESSAGES / elapsed
+
+
+def best(level, queued):
+    """Messages per second of the fastest round, the first ones also pay for warming up."""
+    return max(run(level, queued) for _ in range(ROUNDS))
+
+
+def main():
+    print(f"{'level':>8} {'handler':>8} {'messages/sec':>14} {'logging us/msg':>15}")
+    off = best(OFF, False)
+    print(f"{'off':>8} {'-':>8} {off:>14,.0f} {0:>15.2f}")
+    for level, queued in (
+        (logging.INFO, False),
+        (logging.INFO, True),
+        (logging.WARNING, True),
+    ):
+        rate = best(level, queued)
+        handler = "queue" if queued else "direct"
+        overhead = (1 / rate - 1 / off) * 1e6
+        print(f"{logging.getLevelName(level):>8} {handler:>8} {rate:>14,.0f} {overhead:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Time compiling generated challenge packs and the lookups the game does per solve.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_packs
+"""
+
+import json
+import os
+import tempfile
+import time
+import timeit
+
+from challenges import ChallengeSnapshot
+from packs import compile_packs
+
+SIZES = (10, 100, 1000)
+PER_PACK = 50
+NUMBER = 2000
+
+
+def write_packs(directory, count):
+    """Write ``count`` challenges as linear packs of ``PER_PACK``, each pack after the last."""
+    previous = None
+    for start in range(0, count, PER_PACK):
+        entries = []
+        for i in range(start, min(start + PER_PACK, count)):
+            entry = {"channel": f"#pack-{i}", "challenge": f"Pack {i}", "solution": f"answer {i}"}
+            if i == start and previous is not None:
+                entry["requires"] = [previous]
+            entries.append(entry)
+            previous = entry["channel"]
+        with open(os.path.join(directory, f"pack-{start:05}.json"), "w") as pack:
+            json.dump({"challenges": entries}, pack)
+
+
+def old_next_channel(channels, current):
+    """The old successor lookup: a position scan of the channel list."""
+    index = channels.index(current)
+    return channels[index + 1] if index + 1 < len(channels) else None
+
+
+def run(count):
+    with tempfile.TemporaryDirectory() as directory:
+        write_packs(directory, count)
+        started = time.perf_counter()
+        snapshot, report = compile_packs(directory, ChallengeSnapshot({}))
+        total = time.perf_counter() - started
+    channels = list(snapshot.challenges)
+    last = channels[-2]
+    solved = dict.fromkeys(channels[: count // 2], 0)
+    scan = timeit.timeit(lambda: old_next_channel(channels, last), number=NUMBER)
+    successor = timeit.timeit(lambda: snapshot.get_next_channel(last), number=NUMBER)
+    available = timeit.timeit(lambda: snapshot.available(solved), number=NUMBER // 10)
+    return (
+        total * 1e3,
+        report["load_seconds"] * 1e3,
+        scan / NUMBER * 1e6,
+        successor / NUMBER * 1e6,
+        available / (NUMBER // 10) * 1e6,
+    )
+
+
+def main():
+    print(
+        f"{'challenges':>10} {'total (ms)':>11} {'load (ms)':>10} {'index (us)':>11}"
+        f" {'next (us)':>10} {'available (us)':>15}"
+    )
+    for count in SIZES:
+        total, load, scan, successor, available = run(count)
+        print(
+            f"{count:>10} {total:>11.2f} {load:>10.2f} {scan:>11.2f}"
+            f" {successor:>10.2f} {available:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
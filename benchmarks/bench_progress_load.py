@@ -0,0 +1,47 @@
+"""Measure cold start of the progress index from a populated SQLite database.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_progress_load
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from progress import ProgressStore
+
+PLAYERS = 100_000
+CHANNELS = [f"#challenge-{i}" for i in range(1, 8)]
+
+
+def populate(path):
+    """Write PLAYERS players with a random number of solves each."""
+    store = ProgressStore(path, batch_size=PLAYERS)
+    rows = []
+    for i in range(PLAYERS):
+        for channel in CHANNELS[: random.randint(1, len(CHANNELS))]:
+            rows.append((f"player{i}", channel, time.time()))
+    store.pending = rows
+    start = time.perf_counter()
+    store.flush()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return len(rows), elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "progress.db")
+        rows, write_time = populate(path)
+        print(f"wrote {rows} solves in one transaction: {write_time:.3f}s")
+        start = time.perf_counter()
+        store = ProgressStore(path)
+        elapsed = time.perf_counter() - start
+        print(f"cold start for {len(store.solved)} players: {elapsed:.3f}s")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
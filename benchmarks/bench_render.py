@@ -0,0 +1,73 @@
+"""Compare the cost of rendering a join welcome with and without the template cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_render
+"""
+
+import timeit
+
+from irc3.utils import split_message
+
+from challenges import get_challenge
+from render import NICK_SLOT, MessageCache, split_utf8
+
+NUMBER = 20000
+CHANNEL = "#challenge-6-stego"
+
+
+def render_uncached(nick):
+    """What every join used to cost: build the f-string, then split and encode each line."""
+    challenge, _, _ = get_challenge(CHANNEL)
+    welcome_msg = (
+        f"👋 Welcome {nick} to {CHANNEL}!\n"
+        f"🎯 Here's your challenge:\n"
+        f"{challenge}\n"
+        f"💡 Submit your answer in the channel or via private message."
+    )
+    prefix = f"PRIVMSG {nick} :"
+    return [
+        chunk
+        for line in welcome_msg.split("\n")
+        for chunk in split_message(line, 512, "utf-8", prefix=prefix)
+    ]
+
+
+def render_split(nick):
+    """Build the f-string every time but split with split_utf8."""
+    challenge, _, _ = get_challenge(CHANNEL)
+    welcome_msg = (
+        f"👋 Welcome {nick} to {CHANNEL}!\n"
+        f"🎯 Here's your challenge:\n"
+        f"{challenge}\n"
+        f"💡 Submit your answer in the channel or via private message."
+    )
+    return [chunk for line in welcome_msg.split("\n") if line for chunk in split_utf8(line)]
+
+
+def main():
+    cache = MessageCache()
+
+    def render_cached(nick):
+        return cache.render(
+            ("challenge_welcome", CHANNEL),
+            lambda: (
+                f"👋 Welcome {NICK_SLOT} to {CHANNEL}!\n"
+                f"🎯 Here's your challenge:\n"
+                f"{get_challenge(CHANNEL)[0]}\n"
+                f"💡 Submit your answer in the channel or via private message."
+            ),
+            nick,
+        )
+
+    for name, func in (
+        ("f-string + irc3 split", render_uncached),
+        ("f-string + split_utf8", render_split),
+        ("cached template", render_cached),
+    ):
+        elapsed = timeit.timeit(lambda: func("player42"), number=NUMBER)
+        print(f"{name:>24}: {elapsed / NUMBER * 1e6:8.2f} us per join")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure private message throughput with 0, 1, 2 and 4 sender connections.
+
+Every connection, the main one included, is paced at the same rate, so
+throughput should grow with the number of connections. Runs against
+benchmarks.fakeircd, fully offline. Run from the repository root:
+
+    python -m benchmarks.bench_senders --rate 200 --players 400
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakeircd import FakeIRCServer
+from benchmarks.loadtest import wait_until
+from senders import SenderConnection, SenderPool
+
+POOL_SIZES = (0, 1, 2, 4)
+
+
+async def run_pool(size, rate, messages, players):
+    """(seconds, lines per second, out of order lines) for one pool size."""
+    server = FakeIRCServer()
+    port = await server.start()
+    received = {}
+
+    def observe(client, command, params):
+        if command == "PRIVMSG":
+            received.setdefault(params[0], []).append(int(params[1]))
+
+    server.observers.append(observe)
+    # The main connection is a sender too, so it is paced like the others
+    paced = dict(rate=rate, burst=1, max_queue=messages)
+    main = SenderConnection("main", "bench", "127.0.0.1", port, **paced)
+    senders = [
+        SenderConnection(f"sender{i}", f"bench{i}", "127.0.0.1", port, **paced)
+        for i in range(1, size + 1)
+    ]
+    pool = SenderPool(main.outbound, senders)
+    main_task = asyncio.ensure_future(main.run())
+    pool.start()
+    try:
+        await wait_until(lambda: main.ready and len(pool.shards) == size + 1, 10)
+        started = time.monotonic()
+        for number in range(messages):
+            pool.send(f"player{number % players}", str(number))
+        await pool.flush()
+        await wait_until(lambda: sum(map(len, received.values())) == messages, 30)
+        elapsed = time.monotonic() - started
+    finally:
+        pool.close()
+        main.close()
+        main_task.cancel()
+        await wait_until(lambda: not server.clients, 5)
+        await server.stop()
+    out_of_order = sum(
+        sum(1 for a, b in zip(numbers, numbers[1:]) if a > b) for numbers in received.values()
+    )
+    return elapsed, messages / elapsed, out_of_order
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=200.0, help="lines per second per connection")
+    parser.add_argument("--messages", type=int, default=800)
+    parser.add_argument("--players", type=int, default=400)
+    args = parser.parse_args()
+
+    print(f"{'senders':>8} {'seconds':>8} {'lines/s':>8} {'speedup':>8} {'reordered':>10}")
+    single = None
+    for size in POOL_SIZES:
+        elapsed, throughput, out_of_order = asyncio.run(
+            run_pool(size, args.rate, args.messages, args.players)
+        )
+        single = single or throughput
+        print(
+            f"{size:>8} {elapsed:>8.2f} {throughput:>8.1f} {throughput / single:>7.2f}x"
+            f" {out_of_order:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
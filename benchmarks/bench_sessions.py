@@ -0,0 +1,45 @@
+"""Simulate a week of drive-by nicks and report how many sessions are held.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sessions
+"""
+
+import random
+import time
+
+from sessions import SessionManager
+
+DAYS = 7
+NICKS_PER_DAY = 20000
+REGULARS = 500
+
+
+def main():
+    now = [0.0]
+    sessions = SessionManager(idle=3600, max_sessions=50000, tick=60, clock=lambda: now[0])
+    rng = random.Random(1)
+    events = 0
+    peak = 0
+    started = time.perf_counter()
+    for day in range(DAYS):
+        for i in range(NICKS_PER_DAY):
+            now[0] = day * 86400 + i * 86400 / NICKS_PER_DAY
+            # Each drive-by nick says a few lines, regulars keep talking
+            for _ in range(rng.randint(1, 4)):
+                sessions.touch(f"guest{day}_{i}", "guest@example.com")
+                events += 1
+            sessions.touch(f"regular{rng.randrange(REGULARS)}", "regular@example.com")
+            events += 1
+            peak = max(peak, len(sessions))
+    elapsed = time.perf_counter() - started
+    stats = sessions.stats()
+    print(f"{DAYS * NICKS_PER_DAY} drive-by nicks, {events} events in {DAYS} days")
+    print(f"peak sessions   {peak}")
+    print(f"final sessions  {stats['sessions']} ({sessions.estimated_bytes() / 1024:.0f} KiB)")
+    print(f"ended           {stats['ended']}")
+    print(f"per event       {elapsed / events * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare private message verification and near-miss cost as the challenge count grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_solution_index
+"""
+
+import contextlib
+import io
+import random
+import string
+import timeit
+
+import challenges
+from challenges import canonical_solution
+from nearmiss import NearMisses, edit_distance
+
+SIZES = (7, 100, 1000)
+NUMBER = 2000
+
+
+def make_challenges(count):
+    """Build a synthetic challenge set with ``count`` channels and flag-like solutions."""
+    rng = random.Random(count)
+    return {
+        f"#challenge-{i}-synthetic": {
+            "challenge": f"Synthetic challenge {i}",
+            "solution": "ctf{"
+            + "".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(12))
+            + "}",
+            "hint": "",
+        }
+        for i in range(count)
+    }
+
+
+def scan_all(solution):
+    """The old private message path: verify the solution against every channel."""
+    for channel in challenges.CHALLENGES.keys():
+        if challenges.verify_solution(channel, solution):
+            return channel
+    return None
+
+
+def near_scan(snapshot, answer, limit=2):
+    """Near misses without the index: a bounded edit distance to every solution."""
+    answer = canonical_solution(answer)
+    return [
+        channel
+        for channel, details in snapshot.challenges.items()
+        if edit_distance(answer, canonical_solution(details["solution"]), limit) <= limit
+    ]
+
+
+def run(count):
+    """Time a wrong submission (the worst case for the scan) for one challenge count."""
+    snapshot = challenges.install_snapshot(challenges.ChallengeSnapshot(make_challenges(count)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        scan = timeit.timeit(lambda: scan_all("not the answer"), number=NUMBER)
+    index = timeit.timeit(lambda: challenges.find_solution_channel("not the answer"), number=NUMBER)
+    # One typo away from a solution, so the near-miss lookup has something to find
+    typo = snapshot.challenges[snapshot.channels[-1]]["solution"][:-2] + "x}"
+    near = NearMisses()
+    near.compile(snapshot)
+    number = NUMBER // 10
+    slow = timeit.timeit(lambda: near_scan(snapshot, typo), number=number)
+    indexed = timeit.timeit(lambda: near.classify(snapshot, typo, snapshot.channels), number=number)
+    return [
+        value * 1e6 for value in (scan / NUMBER, index / NUMBER, slow / number, indexed / number)
+    ]
+
+
+def main():
+    original = challenges.current_snapshot()
+    print(
+        f"{'challenges':>10} {'scan (us)':>12} {'index (us)':>12}"
+        f" {'near scan (us)':>15} {'near index (us)':>15}"
+    )
+    try:
+        for count in SIZES:
+            scan, index, slow, indexed = run(count)
+            print(f"{count:>10} {scan:>12.2f} {index:>12.2f} {slow:>15.2f} {indexed:>15.2f}")
+    finally:
+        challenges.install_snapshot(original)
+
+
+if __name__ == "__main__":
+    main()
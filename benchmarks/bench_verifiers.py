@@ -0,0 +1,76 @@
+"""Compare event-loop stalls while expensive answers are checked inline or in the pool.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_verifiers
+"""
+
+import asyncio
+import time
+
+from challenges import ChallengeSnapshot
+from verifiers import VerifierEngine, make_pbkdf2_solution
+
+SUBMISSIONS = 16
+ITERATIONS = 200000
+TICK = 0.005
+
+
+def make_snapshot():
+    return ChallengeSnapshot(
+        {
+            "#vault": {
+                "challenge": "Open the vault",
+                "solution": make_pbkdf2_solution("open sesame", ITERATIONS, "bench"),
+                "hint": "",
+                "verifier": "pbkdf2",
+            }
+        }
+    )
+
+
+async def watch(stop):
+    """Worst delay of a timer that should fire every ``TICK`` seconds."""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def run(mode):
+    engine = VerifierEngine(workers=2, max_pending=SUBMISSIONS)
+    snapshot = make_snapshot()
+    if mode == "pool":
+        # Start the workers before timing
+        await engine.check_async(snapshot, "#vault", "warmup", "no")
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(watch(stop))
+    await asyncio.sleep(TICK * 2)
+    started = time.perf_counter()
+    if mode == "inline":
+        for i in range(SUBMISSIONS):
+            engine.check(snapshot, "#vault", f"p{i}", "guess")
+            await asyncio.sleep(0)
+    else:
+        await asyncio.gather(
+            *(engine.check_async(snapshot, "#vault", f"p{i}", "guess") for i in range(SUBMISSIONS))
+        )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst = await watcher
+    engine.shutdown()
+    return elapsed, worst
+
+
+def main():
+    print(f"{SUBMISSIONS} pbkdf2 checks of {ITERATIONS} iterations")
+    print(f"{'mode':>8} {'total (ms)':>11} {'worst stall (ms)':>17}")
+    for mode in ("inline", "pool"):
+        elapsed, worst = asyncio.run(run(mode))
+        print(f"{mode:>8} {elapsed * 1e3:>11.1f} {worst * 1e3:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
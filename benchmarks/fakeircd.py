@@ -0,0 +1,330 @@
+"""A small in-process IRC server stand-in for load tests.
+
+It speaks enough RFC 1459 for irc3 and the simulated players: registration,
+PING, JOIN, PART, PRIVMSG, NOTICE, KICK, TOPIC, NAMES, QUIT and a NickServ
+emulation answering REGISTER and IDENTIFY.
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+SERVER_NAME = "fake.irc"
+ISUPPORT = "CHANTYPES=# PREFIX=(ov)@+ NICKLEN=30 CHANLIMIT=#:50 TARGMAX=JOIN:,KICK:1,PRIVMSG:4"
+SERVICES_MASK = "NickServ!services@services.fake.irc"
+
+
+class Client:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.nick = None
+        self.user = None
+        self.registered = False
+        self.channels = set()
+        self.flood_times = []
+
+    @property
+    def mask(self):
+        return f"{self.nick}!{self.user or self.nick}@127.0.0.1"
+
+    def send(self, line):
+        if self.writer.is_closing():
+            return
+        self.writer.write(line.encode("utf-8", "replace") + b"\r\n")
+        self.server.lines_out += 1
+
+    def numeric(self, code, text):
+        self.send(f":{SERVER_NAME} {code} {self.nick or '*'} {text}")
+
+
+class Channel:
+    def __init__(self, name):
+        self.name = name
+        self.members = {}  # lowercase nick -> client
+        self.ops = set()  # lowercase nicks of the channel operators
+        self.topic = ""
+
+    def broadcast(self, line, exclude=None):
+        for client in list(self.members.values()):
+            if client is not exclude:
+                client.send(line)
+
+
+class FakeIRCServer:
+    """Asyncio IRC server holding every client and channel in memory."""
+
+    def __init__(self, host="127.0.0.1", port=0, flood_lines=None, flood_window=1.0):
+        self.host = host
+        self.port = port
+        self.flood_lines = flood_lines  # disconnect clients exceeding this many lines per window
+        self.flood_window = flood_window
+        self.clients = {}  # lowercase nick -> client
+        self.channels = {}  # lowercase name -> channel
+        self.accounts = {}  # lowercase nick -> password
+        self.commands = Counter()
+        self.lines_in = 0
+        self.lines_out = 0
+        self.flood_kills = 0
+        self.observers = []  # called as observer(client, command, params) for each line
+        self._server = None
+
+    async def start(self):
+        """Start listening, returns the bound port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Disconnect everyone and stop listening."""
+        for client in list(self.clients.values()):
+            client.writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def client(self, nick):
+        return self.clients.get(nick.lower())
+
+    def channel(self, name):
+        return self.channels.get(name.lower())
+
+    async def _handle(self, reader, writer):
+        client = Client(self, reader, writer)
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                if not line:
+                    continue
+                self.lines_in += 1
+                if self._flooding(client):
+                    client.send("ERROR :Closing Link (Excess Flood)")
+                    self.flood_kills += 1
+                    break
+                if self._dispatch(client, line) is False:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._quit(client, "Connection closed")
+            writer.close()
+
+    def _flooding(self, client):
+        if self.flood_lines is None or not client.registered:
+            return False
+        now = time.monotonic()
+        client.flood_times.append(now)
+        while client.flood_times and now - client.flood_times[0] > self.flood_window:
+            client.flood_times.pop(0)
+        return len(client.flood_times) > self.flood_lines
+
+    def _dispatch(self, client, line):
+        if line.startswith("@"):
+            line = line.split(" ", 1)[1]
+        if " :" in line:
+            head, trailing = line.split(" :", 1)
+            params = head.split() + [trailing]
+        else:
+            params = line.split()
+        command = params.pop(0).upper()
+        self.commands[command] += 1
+        for observer in self.observers:
+            observer(client, command, params)
+        handler = getattr(self, f"irc_{command.lower()}", None)
+        if handler is None:
+            return None
+        if not client.registered and command not in ("NICK", "USER", "PASS", "CAP", "QUIT"):
+            client.numeric("451", ":You have not registered")
+            return None
+        return handler(client, params)
+
+    # Registration
+
+    def irc_cap(self, client, params):
+        if params and params[0].upper() == "LS":
+            client.send(f":{SERVER_NAME} CAP * LS :")
+
+    def irc_pass(self, client, params):
+        pass
+
+    def irc_nick(self, client, params):
+        if not params:
+            return
+        nick = params[0]
+        other = self.client(nick)
+        if other is not None and other is not client:
+            client.numeric("433", f"{nick} :Nickname is already in use")
+            return
+        if client.registered:
+            old_mask = client.mask
+            del self.clients[client.nick.lower()]
+            client.nick = nick
+            self.clients[nick.lower()] = client
+            client.send(f":{old_mask} NICK :{nick}")
+            for channel in client.channels:
+                self.channels[channel].broadcast(f":{old_mask} NICK :{nick}", exclude=client)
+            return
+        client.nick = nick
+        self._maybe_register(client)
+
+    def irc_user(self, client, params):
+        if params:
+            client.user = params[0]
+        self._maybe_register(client)
+
+    def _maybe_register(self, client):
+        if client.registered or not client.nick or not client.user:
+            return
+        client.registered = True
+        self.clients[client.nick.lower()] = client
+        client.numeric("001", f":Welcome to the fake IRC network {client.mask}")
+        client.numeric("005", f"{ISUPPORT} :are supported by this server")
+        client.numeric("376", ":End of /MOTD command.")
+
+    def irc_ping(self, client, params):
+        client.send(f":{SERVER_NAME} PONG {SERVER_NAME} :{params[-1] if params else ''}")
+
+    def irc_quit(self, client, params):
+        self._quit(client, params[-1] if params else "Quit")
+        return False
+
+    def _quit(self, client, reason):
+        if not client.registered or self.clients.get(client.nick.lower()) is not client:
+            return
+        notified = set()
+        for name in list(client.channels):
+            channel = self.channels[name]
+            del channel.members[client.nick.lower()]
+            for member in channel.members.values():
+                if member not in notified:
+                    notified.add(member)
+                    member.send(f":{client.mask} QUIT :{reason}")
+        client.channels.clear()
+        del self.clients[client.nick.lower()]
+
+    # Channels
+
+    def irc_join(self, client, params):
+        if not params:
+            return
+        for name in params[0].split(","):
+            if not name.startswith("#"):
+                continue
+            channel = self.channels.setdefault(name.lower(), Channel(name))
+            if client.nick.lower() in channel.members:
+                continue
+            if not channel.members:
+                # Whoever creates a channel runs it
+                channel.ops.add(client.nick.lower())
+            channel.members[client.nick.lower()] = client
+            client.channels.add(name.lower())
+            channel.broadcast(f":{client.mask} JOIN :{channel.name}")
+            if channel.topic:
+                client.numeric("332", f"{channel.name} :{channel.topic}")
+            self._names(client, channel)
+
+    def irc_names(self, client, params):
+        for name in params[0].split(",") if params else []:
+            channel = self.channel(name)
+            if channel is not None:
+                self._names(client, channel)
+
+    def _names(self, client, channel):
+        nicks = " ".join(
+            ("@" if nick in channel.ops else "") + member.nick
+            for nick, member in channel.members.items()
+        )
+        client.numeric("353", f"= {channel.name} :{nicks}")
+        client.numeric("366", f"{channel.name} :End of /NAMES list.")
+
+    def irc_part(self, client, params):
+        for name in params[0].split(",") if params else []:
+            channel = self.channel(name)
+            if channel is None or client.nick.lower() not in channel.members:
+                continue
+            channel.broadcast(f":{client.mask} PART {channel.name}")
+            del channel.members[client.nick.lower()]
+            client.channels.discard(name.lower())
+
+    def irc_kick(self, client, params):
+        if len(params) < 2:
+            return
+        channel = self.channel(params[0])
+        reason = params[2] if len(params) > 2 else client.nick
+        if channel is None:
+            client.numeric("403", f"{params[0]} :No such channel")
+            return
+        target = channel.members.get(params[1].lower())
+        if target is None:
+            client.numeric("441", f"{params[1]} {channel.name} :They aren't on that channel")
+            return
+        channel.broadcast(f":{client.mask} KICK {channel.name} {target.nick} :{reason}")
+        del channel.members[target.nick.lower()]
+        target.channels.discard(channel.name.lower())
+
+    def irc_topic(self, client, params):
+        channel = self.channel(params[0]) if params else None
+        if channel is None:
+            return
+        if len(params) == 1:
+            if channel.topic:
+                client.numeric("332", f"{channel.name} :{channel.topic}")
+            else:
+                client.numeric("331", f"{channel.name} :No topic is set")
+            return
+        channel.topic = params[1]
+        channel.broadcast(f":{client.mask} TOPIC {channel.name} :{channel.topic}")
+
+    def irc_mode(self, client, params):
+        if params and params[0].startswith("#"):
+            channel = self.channel(params[0])
+            if channel is not None and len(params) == 1:
+                client.numeric("324", f"{channel.name} +nt")
+
+    # Messages
+
+    def irc_privmsg(self, client, params, command="PRIVMSG"):
+        if len(params) < 2:
+            return
+        text = params[1]
+        for target in params[0].split(","):
+            if target.lower() == "nickserv":
+                self._nickserv(client, text)
+            elif target.startswith("#"):
+                channel = self.channel(target)
+                if channel is not None:
+                    channel.broadcast(f":{client.mask} {command} {channel.name} :{text}", client)
+            else:
+                other = self.client(target)
+                if other is not None:
+                    other.send(f":{client.mask} {command} {other.nick} :{text}")
+                elif command == "PRIVMSG":
+                    client.numeric("401", f"{target} :No such nick/channel")
+
+    def irc_notice(self, client, params):
+        self.irc_privmsg(client, params, command="NOTICE")
+
+    def _nickserv(self, client, text):
+        words = text.split()
+        if not words:
+            return
+        verb = words[0].upper()
+        key = client.nick.lower()
+        if verb == "REGISTER" and len(words) >= 2:
+            if key in self.accounts:
+                reply = f"{client.nick} is already registered."
+            else:
+                self.accounts[key] = words[1]
+                reply = f"Registration successful. Nickname {client.nick} is now registered."
+        elif verb == "IDENTIFY" and len(words) >= 2:
+            if self.accounts.get(key) == words[-1]:
+                reply = "Password accepted - you are now recognized."
+            else:
+                reply = "Invalid password."
+        else:
+            reply = "Unknown command."
+        client.send(f":{SERVICES_MASK} NOTICE {client.nick} :{reply}")
@@ -0,0 +1,285 @@
+"""Drive simulated players through the challenges against a local fake IRC server.
+
+The bot runs as a subprocess connected to benchmarks.fakeircd, so the run is
+fully offline. Run from the repository root:
+
+    python -m benchmarks.loadtest --players 50 --join-rate 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import challenges
+from benchmarks.fakeircd import FakeIRCServer
+from instances import PlayerInstances
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Shared with the bot so players can work out their personal solutions
+INSTANCE_SECRET = "loadtest"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def default_stages(count=None):
+    """(channel, solution) pairs in challenge order, personal solutions are nick functions."""
+    snapshot = challenges.current_snapshot()
+    instances = PlayerInstances(INSTANCE_SECRET)
+    stages = []
+    for channel, details in snapshot.challenges.items():
+        if channel in challenges.PLAYER_CHALLENGES:
+            stages.append(
+                (channel, lambda nick, c=channel: instances.get(snapshot, c, nick).solution)
+            )
+        else:
+            stages.append((channel, details["solution"]))
+    return stages[:count] if count else stages
+
+
+def write_open_windows(directory):
+    """Write a pack replacing every timed challenge with one that is always open."""
+    snapshot = challenges.current_snapshot()
+    entries = []
+    for channel in snapshot.windows:
+        details = snapshot.challenges[channel]
+        entries.append(
+            {
+                "channel": channel,
+                "challenge": details["challenge"],
+                "solution": details["solution"],
+                "requires": list(snapshot.requires[channel]),
+            }
+        )
+    with open(os.path.join(directory, "open-windows.json"), "w") as pack:
+        json.dump({"challenges": entries}, pack)
+
+
+def read_rss(pid):
+    """Current and peak resident set size of a process in kB, from /proc."""
+    rss = peak = None
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, peak
+
+
+class Player:
+    """A raw-socket IRC client playing through a list of stages."""
+
+    def __init__(self, nick, port, bot_nick, stages, submit_interval, timeout):
+        self.nick = nick
+        self.port = port
+        self.bot_nick = bot_nick
+        self.stages = stages
+        self.submit_interval = submit_interval
+        self.timeout = timeout
+        self.latencies = []
+        self.failures = 0
+        self.replies = asyncio.Queue()
+        self.registered = asyncio.Event()
+        self.writer = None
+
+    def send(self, line):
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+
+    async def _read(self, reader):
+        prefix = f":{self.bot_nick}!"
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if line.startswith("PING"):
+                self.send("PONG" + line[4:])
+            elif " 001 " in line:
+                self.registered.set()
+            elif line.startswith(prefix) and " PRIVMSG " in line:
+                self.replies.put_nowait((time.monotonic(), line.split(" :", 1)[-1]))
+
+    async def _wait_for_success(self):
+        while True:
+            received, text = await self.replies.get()
+            if "congratulations" in text.lower():
+                return received
+
+    async def run(self):
+        reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        read_task = asyncio.ensure_future(self._read(reader))
+        try:
+            self.send(f"NICK {self.nick}")
+            self.send(f"USER {self.nick} 0 * :{self.nick}")
+            await asyncio.wait_for(self.registered.wait(), self.timeout)
+            self.send("JOIN #CypherCon")
+            for channel, solution in self.stages:
+                self.send(f"JOIN {channel}")
+                await asyncio.sleep(self.submit_interval)
+                while not self.replies.empty():
+                    self.replies.get_nowait()
+                if callable(solution):
+                    solution = solution(self.nick)
+                submitted = time.monotonic()
+                self.send(f"PRIVMSG {self.bot_nick} :{solution}")
+                try:
+                    received = await asyncio.wait_for(self._wait_for_success(), self.timeout)
+                except asyncio.TimeoutError:
+                    self.failures += 1
+                    return
+                self.latencies.append(received - submitted)
+            self.send("QUIT :done")
+        finally:
+            read_task.cancel()
+            self.writer.close()
+
+
+async def wait_until(predicate, timeout, interval=0.05):
+    """Poll ``predicate`` until it is true or ``timeout`` seconds passed."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition not reached")
+        await asyncio.sleep(interval)
+
+
+async def run_load(
+    players=20,
+    join_rate=10.0,
+    submit_interval=0.5,
+    stages=None,
+    flood_rate=1000.0,
+    flood_burst=1000,
+    timeout=30.0,
+    bot_nick="CTFGameBot",
+):
+    """Run one load test and return its report."""
+    stages = stages or default_stages()
+    server = FakeIRCServer()
+    port = await server.start()
+    bot_lines = [0]
+    bot_commands = {}
+
+    def count_bot_lines(client, command, params):
+        if client.nick == bot_nick:
+            bot_lines[0] += 1
+            bot_commands[command] = bot_commands.get(command, 0) + 1
+
+    server.observers.append(count_bot_lines)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Players cannot wait for the timed challenge's window, open it for the whole run
+        write_open_windows(tmpdir)
+        env = dict(
+            os.environ,
+            BOT_PACKS_DIR=tmpdir,
+            BOT_HOST="127.0.0.1",
+            BOT_PORT=str(port),
+            BOT_NICK=bot_nick,
+            BOT_PROGRESS_DB=os.path.join(tmpdir, "progress.db"),
+            BOT_AUDIT_DIR=os.path.join(tmpdir, "audit"),
+            BOT_FLOOD_RATE=str(flood_rate),
+            BOT_FLOOD_BURST=str(flood_burst),
+            BOT_INSTANCE_SECRET=INSTANCE_SECRET,
+        )
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            "import bot; bot.main()",
+            cwd=ROOT,
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            await wait_until(lambda: server.client(bot_nick) is not None, timeout)
+            started = time.monotonic()
+            simulated = [
+                Player(f"player{i}", port, bot_nick, stages, submit_interval, timeout)
+                for i in range(players)
+            ]
+            tasks = []
+            for player in simulated:
+                tasks.append(asyncio.ensure_future(player.run()))
+                await asyncio.sleep(1.0 / join_rate)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            elapsed = time.monotonic() - started
+            rss, peak_rss = read_rss(proc.pid)
+        finally:
+            if proc.returncode is None:
+                proc.terminate()
+            await proc.wait()
+            await server.stop()
+
+    latencies = [latency for player in simulated for latency in player.latencies]
+    return {
+        "players": players,
+        "stages": len(stages),
+        "solves": len(latencies),
+        "failures": sum(player.failures for player in simulated)
+        + sum(isinstance(result, Exception) for result in results),
+        "elapsed": elapsed,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "bot_lines_per_sec": bot_lines[0] / elapsed,
+        "bot_commands": bot_commands,
+        "server_lines_per_sec": (server.lines_in + server.lines_out) / elapsed,
+        "bot_rss_kb": rss,
+        "bot_peak_rss_kb": peak_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--join-rate", type=float, default=10.0, help="players joining per second")
+    parser.add_argument("--submit-interval", type=float, default=0.5, help="seconds per stage")
+    parser.add_argument("--stages", type=int, default=None, help="challenges to play")
+    parser.add_argument("--flood-rate", type=float, default=1000.0, help="bot lines per second")
+    parser.add_argument("--flood-burst", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-p99", type=float, default=None, help="fail above this p99 (s)")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_load(
+            players=args.players,
+            join_rate=args.join_rate,
+            submit_interval=args.submit_interval,
+            stages=default_stages(args.stages),
+            flood_rate=args.flood_rate,
+            flood_burst=args.flood_burst,
+            timeout=args.timeout,
+        )
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            if isinstance(value, float):
+                value = f"{value:.4f}"
+            print(f"{key:>22}: {value}")
+    if report["failures"]:
+        sys.exit(f"{report['failures']} players timed out")
+    if args.max_p99 is not None and report["latency_p99"] > args.max_p99:
+        sys.exit(f"p99 latency {report['latency_p99']:.4f}s is above {args.max_p99}s")
+
+
+if __name__ == "__main__":
+    main()
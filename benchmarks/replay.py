@@ -0,0 +1,190 @@
+"""Replay a capture of inbound IRC traffic into the bot and collect what it sends.
+
+Captures are recorded by running the bot with BOT_RECORD=<path> (.gz to
+compress). Replay one at recorded speed, N times faster or as fast as
+possible, optionally writing the outbound lines to a file:
+
+    python -m benchmarks.replay run capture.log --speed max --out outbound-a.txt
+
+Run the same capture on two checkouts and compare what they sent:
+
+    python -m benchmarks.replay diff outbound-a.txt outbound-b.txt
+
+Rate limits and time windows follow the clock, so replays faster than 1x can
+throttle or open differently than the recorded event did.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+import irc3
+
+import challenges
+from capture import read_capture
+
+INCLUDES = ("irc3.plugins.core", "irc3.plugins.command", "irc3.plugins.cron", "bot")
+
+
+def command_of(line):
+    """The IRC command of a raw line, after its tags and prefix."""
+    for part in line.split(" ", 3):
+        if part and part[0] not in "@:":
+            return part.upper()
+    return ""
+
+
+def make_bot(loop, nick, seed):
+    """A bot that is never connected, its handlers run for real and nothing reaches a server."""
+    # Same random elements in every replay, so two runs can be compared
+    random.seed(seed)
+    challenges.install_snapshot(challenges.ChallengeSnapshot(challenges.generate_challenges()))
+    bot = irc3.IrcBot(
+        nick=nick,
+        password="replay",
+        email="replay@example.invalid",
+        loop=loop,
+        includes=list(INCLUDES),
+        progress_db=":memory:",
+        metrics_port="",
+        instance_secret="replay",
+        flood_rate=1e6,
+        flood_burst=1000000,
+        ratelimit_max_keys=1000000,
+    )
+    # What irc3's core plugin sets up once the connection is made
+    bot.config["server_config"] = bot.defaults["server_config"].copy()
+    core = bot.get_plugin("irc3.plugins.core.Core")
+    bot.attach_events(insert=True, *core.before_connect_events)
+    return bot
+
+
+async def replay(path, speed=None, nick="CTFGameBot", out=None, seed=0):
+    """Feed a capture through the bot's event handlers, returns a report.
+
+    ``speed`` is a multiple of the recorded pace, None replays as fast as possible.
+    """
+    loop = asyncio.get_running_loop()
+    bot = make_bot(loop, nick, seed)
+    sent = {}
+
+    def send_line(data, nowait=False):
+        command = command_of(data)
+        sent[command] = sent.get(command, 0) + 1
+        if out is not None:
+            out.write(data + "\n")
+
+    bot.send_line = send_line
+    game = bot.get_plugin("bot.CTFGame")
+    handlers = {}  # command -> [events, handler calls, cpu seconds, worst cpu seconds]
+    lines = 0
+    recorded = 0.0
+    started = time.perf_counter()
+    for delta, line in read_capture(path):
+        recorded += delta
+        if speed is not None:
+            wait = started + recorded / speed - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        stats = handlers.setdefault(command_of(line), [0, 0, 0.0, 0.0])
+        stats[0] += 1
+        for match, events in bot.registry.get_event_matches(line, "in"):
+            kwargs = {
+                key: irc3.utils.IrcString(value)
+                for key, value in match.groupdict().items()
+                if value is not None
+            }
+            for event in events:
+                cpu = time.process_time()
+                result = event.callback(**kwargs)
+                if asyncio.iscoroutine(result):
+                    loop.create_task(result)
+                cpu = time.process_time() - cpu
+                stats[1] += 1
+                stats[2] += cpu
+                stats[3] = max(stats[3], cpu)
+        lines += 1
+        # Let the outbound queue and offloaded checks run between lines
+        await asyncio.sleep(0)
+    if game.verify_tasks:
+        await asyncio.gather(*game.verify_tasks)
+    await game.outbound.flush()
+    game.verifiers.shutdown()
+    return {
+        "lines": lines,
+        "recorded_seconds": round(recorded, 3),
+        "replay_seconds": round(time.perf_counter() - started, 3),
+        "handlers": {
+            command: {
+                "events": events,
+                "calls": calls,
+                "cpu_ms": round(cpu * 1e3, 3),
+                "mean_cpu_us": round(cpu / calls * 1e6, 1) if calls else 0.0,
+                "max_cpu_us": round(worst * 1e6, 1),
+            }
+            for command, (events, calls, cpu, worst) in sorted(handlers.items())
+        },
+        "sent": dict(sorted(sent.items())),
+    }
+
+
+def diff_outbound(path_a, path_b, show=10):
+    """Compare two outbound files line by line without loading them."""
+    counts = {}
+    differences = []
+    total = 0
+    with open(path_a, encoding="utf-8") as a, open(path_b, encoding="utf-8") as b:
+        for number, (left, right) in enumerate(itertools.zip_longest(a, b), 1):
+            for side, line in enumerate((left, right)):
+                if line is not None:
+                    command = command_of(line)
+                    counts.setdefault(command, [0, 0])[side] += 1
+            if left != right:
+                total += 1
+                if len(differences) < show:
+                    differences.append((number, left, right))
+    return {
+        "differing_lines": total,
+        "first_differences": [
+            {"line": number, "a": (left or "").rstrip("\n"), "b": (right or "").rstrip("\n")}
+            for number, left, right in differences
+        ],
+        "sent": {
+            command: {"a": a_count, "b": b_count}
+            for command, (a_count, b_count) in sorted(counts.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="replay a capture")
+    run.add_argument("capture")
+    run.add_argument("--speed", default="1", help="multiple of the recorded pace, or max")
+    run.add_argument("--nick", default="CTFGameBot", help="the bot's nick in the capture")
+    run.add_argument("--out", help="write the outbound lines to this file")
+    run.add_argument("--seed", type=int, default=0, help="seed for the random challenges")
+    diff = commands.add_parser("diff", help="compare the outbound lines of two replays")
+    diff.add_argument("a")
+    diff.add_argument("b")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        report = diff_outbound(args.a, args.b)
+    else:
+        speed = None if args.speed == "max" else float(args.speed)
+        out = open(args.out, "w", encoding="utf-8") if args.out else None
+        try:
+            report = asyncio.run(replay(args.capture, speed, args.nick, out, args.seed))
+        finally:
+            if out is not None:
+                out.close()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
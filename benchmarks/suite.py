@@ -0,0 +1,249 @@
+"""Time the game's hot paths and compare them with a committed baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                     # compare with benchmarks/baseline.json
+    python -m benchmarks.suite --out results.json  # and keep this run's results
+    python -m benchmarks.suite --update            # make this run the new baseline
+
+Every path is timed with the built-in challenges and with synthetic packs of
+100 and 1,000 more. A benchmark slower than ``--threshold`` times its
+baseline fails the run. Baselines depend on the machine, record a new one
+when the hardware changes.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+from irc3.utils import IrcString
+
+import challenges
+from benchmarks.bench_packs import write_packs
+from bot import CTFGame
+from challenges import ChallengeSnapshot
+from packs import compile_packs
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = {"default": 0, "pack100": 100, "pack1000": 1000}
+THRESHOLD = 1.5
+REPEAT = 5
+PLAINTEXT = "the quick brown fox jumps over the lazy dog " * 4
+
+
+class RecordingBot:
+    """Stands in for irc3's bot: the game runs for real and what it sends is kept."""
+
+    def __init__(self, config=None):
+        self.nick = "CTFGameBot"
+        self.config = config or {}
+        self.log = logging.getLogger("benchmarks.suite")
+        self.sent = []
+        self.on_topic = None  # called like a TOPIC echo from the server
+
+    def send_line(self, data, nowait=False):
+        self.sent.append(data)
+        if data.startswith("TOPIC ") and self.on_topic is not None:
+            channel, _, topic = data[len("TOPIC ") :].partition(" :")
+            self.on_topic(channel=channel, data=topic)
+
+    def privmsg(self, target, message, nowait=False):
+        self.sent.append(f"PRIVMSG {target} :{message}")
+
+    def notice(self, target, message, nowait=False):
+        self.sent.append(f"NOTICE {target} :{message}")
+
+    def attach_events(self, *events, **kwargs):
+        pass
+
+
+def make_game(snapshot):
+    """A game on a RecordingBot that is in every channel, with limits out of the way."""
+    config = {
+        "progress_db": ":memory:",
+        "metrics_port": "",
+        "instance_secret": "benchmarks",
+        "challenge_refresh_cron": "",
+        "ratelimit_channel": "1000000000/60",
+        "ratelimit_submission": "1000000000/60",
+        "ratelimit_command": "1000000000/60",
+        "ratelimit_max_keys": 1000000,
+    }
+    bot = RecordingBot(config)
+    game = CTFGame(bot)
+    # As if the server had confirmed the bot's JOINs and echoed its TOPICs
+    for channel in ("#CypherCon",) + snapshot.channels:
+        game.track_join(IrcString(f"{bot.nick}!bot@host"), channel)
+    bot.on_topic = game.track_topic
+    return game
+
+
+def build_snapshot(extra):
+    """The built-in challenges followed by ``extra`` pack challenges."""
+    snapshot = ChallengeSnapshot(challenges.generate_challenges())
+    if not extra:
+        return snapshot
+    with tempfile.TemporaryDirectory() as directory:
+        write_packs(directory, extra)
+        snapshot, _ = compile_packs(directory, snapshot)
+    return snapshot
+
+
+def cases(snapshot, game, size):
+    """(name, callable, calls per run) for one challenge set, run against the installed one."""
+    channels = snapshot.channels
+    last = channels[-1]
+    nicks = (IrcString(f"player{i}!user@host{i % 256}") for i in itertools.count())
+    key = challenges.generate_vigenere_key()
+    selected = [
+        ("verify_solution", lambda: challenges.verify_solution(last, "not the answer"), 20000),
+        ("get_next_channel", lambda: challenges.get_next_channel(channels[-2]), 20000),
+        ("get_challenge", lambda: challenges.get_challenge(last), 20000),
+        (
+            "handle_join",
+            lambda: game.handle_join(next(nicks), "#challenge-1-welcome"),
+            2000,
+        ),
+        (
+            "handle_channel_msg",
+            lambda: game.handle_channel_msg(
+                next(nicks), "PRIVMSG", "#challenge-1-welcome", "does anyone have a hint?"
+            ),
+            5000,
+        ),
+        (
+            "handle_privmsg",
+            lambda: game.handle_privmsg(next(nicks), "PRIVMSG", "CTFGameBot", "not the answer"),
+            2000,
+        ),
+        (
+            "handle_challenge_solution",
+            lambda: game.handle_challenge_solution(next(nicks), "fire"),
+            1000,
+        ),
+    ]
+    if size == "default":
+        # Neither depends on the packs
+        selected += [
+            ("generate_challenges", challenges.generate_challenges, 200),
+            ("vigenere_encrypt", lambda: challenges.vigenere_encrypt(PLAINTEXT, key), 5000),
+        ]
+    return selected
+
+
+def measure(func, number, repeat=REPEAT):
+    """Best time per call in microseconds over ``repeat`` runs of ``number`` calls."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def run_suite(sizes=SIZES, scale=1.0, match=None):
+    """{"name[size]": microseconds per call} for every selected benchmark."""
+    original = challenges.current_snapshot()
+    results = {}
+    try:
+        for size, extra in sizes.items():
+            snapshot = build_snapshot(extra)
+            challenges.install_snapshot(snapshot)
+            game = make_game(snapshot)
+            for name, func, number in cases(snapshot, game, size):
+                label = f"{name}[{size}]"
+                if match and match not in label:
+                    continue
+                results[label] = round(measure(func, max(1, int(number * scale))), 3)
+                game.bot.sent.clear()
+            game.verifiers.shutdown()
+    finally:
+        challenges.install_snapshot(original)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Rows of (name, baseline µs, current µs, ratio, status), status is one of
+    ok, faster, slower (over the threshold), new and missing."""
+    rows = []
+    for name in sorted(set(results) | set(baseline)):
+        before, after = baseline.get(name), results.get(name)
+        if before is None:
+            rows.append((name, None, after, None, "new"))
+        elif after is None:
+            rows.append((name, before, None, None, "missing"))
+        else:
+            ratio = after / before if before else float("inf")
+            status = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else "ok"
+            rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def format_rows(rows):
+    def number(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    lines = [f"{'benchmark':<36} {'baseline (us)':>14} {'current (us)':>13} {'ratio':>7}  status"]
+    for name, before, after, ratio, status in rows:
+        lines.append(
+            f"{name:<36} {number(before, '.3f'):>14} {number(after, '.3f'):>13}"
+            f" {number(ratio, '.2f'):>7}  {status}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE, help="baseline results to compare with")
+    parser.add_argument("--out", help="write this run's results to this file")
+    parser.add_argument("--update", action="store_true", help="write the results as the baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help=f"slowdown against the baseline that fails the run (default {THRESHOLD})",
+    )
+    parser.add_argument("--match", help="only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply the calls per run, below 1 to go quicker"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(scale=args.scale, match=args.match)
+    report = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "unit": "microseconds per call",
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+            out.write("\n")
+    if args.update:
+        with open(args.baseline, "w") as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+            out.write("\n")
+        print(f"Wrote {len(results)} results to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as source:
+            baseline = json.load(source)["results"]
+    if args.match:
+        baseline = {name: value for name, value in baseline.items() if args.match in name}
+    rows = compare(results, baseline, args.threshold)
+    print(format_rows(rows))
+    slower = [row[0] for row in rows if row[4] == "slower"]
+    if slower:
+        print(
+            f"\n{len(slower)} benchmark(s) over {args.threshold}x the baseline: {', '.join(slower)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
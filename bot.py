@@ -1,12 +1,49 @@
 import asyncio
+import atexit
+import fnmatch
+import logging
 import os
+import time
 
 import irc3
 from dotenv import load_dotenv
 from irc3.plugins.command import command
 from irc3.plugins.cron import cron
+from irc3.utils import IrcString
 
-from challenges import CHALLENGES, get_challenge, get_next_channel, verify_solution
+from audit import ATTEMPT, LEAK, SOLVE, AuditLog
+from capture import CaptureWriter
+from challenges import (
+    PLAYER_CHALLENGES,
+    current_snapshot,
+    install_snapshot,
+    refresh_challenges,
+    solution_digest,
+)
+from channel_state import ChannelStateCache, parameter_modes
+from dispatch import Router
+from eventlog import EventLogger, setup_queue_logging
+from greeter import JoinAggregator, format_names
+from instances import PlayerInstances
+from leaderboard import Leaderboard
+from leaks import LEAK_ACTIONS, REDACT_CAPS, LeakDetector
+from metrics import LoopLagMonitor, MetricsServer, Registry
+from nearmiss import EXACT, NEAR, NearMisses
+from outbound import OutboundScheduler
+from packs import PackError, compile_packs
+from progress import ProgressStore
+from ratelimit import ALLOW, THROTTLE, SlidingWindowLimiter, parse_rate
+from render import NICK_SLOT, MessageCache
+from senders import SenderConnection, SenderPool
+from sessions import SessionManager
+from startup import (
+    StartupTracker,
+    batch_channels,
+    channel_limit,
+    join_target_limit,
+    target_limit,
+)
+from verifiers import VerifierEngine
 
 # Load environment variables
 load_dotenv()
@@ -16,126 +53,682 @@ load_dotenv()
 class CTFGame:
     def __init__(self, bot):
         self.bot = bot
-        self.log = bot.log
         self.config = bot.config
-        self.channels = set()
-        self.active_challenges = {}
+        # Structured events for hot paths, high-volume ones are sampled
+        self.log = EventLogger(bot.log, self.config.get("log_sample", "submission=100"))
         self.log.info("CTFGame plugin initialized")
         self.registered = False
         self.topic_retries = {}  # Track topic setting retries per channel
+        self.channel_state = ChannelStateCache()
+        self.startup = StartupTracker()
+        # Message texts compiled once per challenge generation
+        self.messages = MessageCache()
+        # Pace outbound messages ourselves, irc3's own flood settings size the bucket
+        rate = float(self.config.get("flood_rate", 1)) / float(
+            self.config.get("flood_rate_delay", 1)
+        )
+        burst = int(self.config.get("flood_burst", 4))
+        max_queue = int(self.config.get("outbound_max_queue", 500))
+        # Private messages are spread over extra sender connections, each with its own bucket
+        nick = self.config.get("nick", "CTFGameBot")
+        senders = [
+            SenderConnection(
+                f"sender{i}",
+                self.config.get("sender_nick", nick) + str(i),
+                self.config.get("host", "localhost"),
+                int(self.config.get("port", 6667)),
+                ssl=bool(self.config.get("ssl", False)),
+                rate=rate,
+                burst=burst,
+                max_queue=max_queue,
+                log=bot.log,
+            )
+            for i in range(1, int(self.config.get("sender_pool", 0)) + 1)
+        ]
+        self.outbound = SenderPool(
+            OutboundScheduler(bot, rate=rate, burst=burst, max_queue=max_queue), senders
+        )
+        self.outbound.on_message = self.on_sender_message
+        # Joins are greeted in batches, nicks greeted recently are skipped
+        self.join_max_names = int(self.config.get("join_max_names", 5))
+        self.greeter = JoinAggregator(
+            self.greet_joins,
+            window=float(self.config.get("join_window", 2.0)),
+            cooldown=float(self.config.get("join_cooldown", 600.0)),
+            max_pending=int(self.config.get("join_max_pending", 500)),
+        )
+        # Per-hostmask budgets for channel attempts, private submissions and commands
+        max_keys = int(self.config.get("ratelimit_max_keys", 10000))
+        self.limits = {
+            category: SlidingWindowLimiter(
+                *parse_rate(self.config.get(f"ratelimit_{category}", default)), max_keys=max_keys
+            )
+            for category, default in (
+                ("channel", "3/60"),
+                ("submission", "10/60"),
+                ("command", "5/60"),
+            )
+        }
+        # Hostmask patterns (nick!user@host) allowed to use admin commands
+        admins = self.config.get("admins", "")
+        if isinstance(admins, str):
+            admins = admins.split(",")
+        self.admins = [pattern.strip().lower() for pattern in admins if pattern.strip()]
+        # Challenges with random elements are regenerated on a schedule
+        refresh_cron = self.config.get("challenge_refresh_cron", "0 */6 * * *")
+        if refresh_cron and hasattr(bot, "add_cron"):
+            bot.add_cron(refresh_cron, self.regenerate_challenges)
+        # Time windows open on minute boundaries, players waiting on one are told at once
+        self.announced = {}  # channel -> when the window we announced opened
+        if hasattr(bot, "add_cron"):
+            bot.add_cron("* * * * *", self.check_windows)
+        # Answers posted in public, and what to do about them
+        self.leaks = LeakDetector(int(self.config.get("leak_min_length", 8)))
+        self.caps = set()  # IRCv3 capabilities the server acknowledged
+        actions = self.config.get("leak_actions", "redact,warn")
+        if isinstance(actions, str):
+            actions = actions.split(",")
+        self.leak_actions = {action.strip() for action in actions} & set(LEAK_ACTIONS)
+        # Wrong answers a few edits away from one get a hint that they are close
+        self.near_misses = NearMisses(int(self.config.get("near_miss_distance", 2)))
+        # Extra challenge packs, compiled together with the built-in challenges
+        packs_dir = self.config.get("packs_dir")
+        if packs_dir and os.path.isdir(packs_dir):
+            self.load_packs(packs_dir)
+        # Every PRIVMSG goes through one routing table
+        self.router = Router(bot)
+        self.build_routes()
+        # Solved challenges per player, persisted with batched writes
+        self.progress = ProgressStore(
+            self.config.get("progress_db", ":memory:"),
+            batch_size=int(self.config.get("progress_batch_size", 100)),
+            flush_interval=float(self.config.get("progress_flush_interval", 1.0)),
+        )
+        # Solves still waiting for their batch are written on the way out
+        atexit.register(self.progress.close)
+        # Per-player challenge variants, derived from the secret whenever they are needed
+        secret = self.config.get("instance_secret")
+        if not secret:
+            self.log.warning("No instance_secret configured, player challenges change on restart")
+            secret = os.urandom(32)
+        self.instances = PlayerInstances(
+            secret, max_size=int(self.config.get("instance_cache_size", 1024))
+        )
+        # Nicks seen recently, ended on QUIT, when idle or to stay under the cap
+        self.sessions = SessionManager(
+            idle=float(self.config.get("session_idle", 3600.0)),
+            max_sessions=int(self.config.get("session_max", 50000)),
+            tick=float(self.config.get("session_tick", 60.0)),
+        )
+        self.sessions.on_end.append(self.instances.forget)
+        # Answers are checked by each challenge's verifier, expensive ones in worker processes
+        self.verifiers = VerifierEngine(
+            workers=int(self.config.get("verifier_workers", 2)),
+            max_pending=int(self.config.get("verifier_max_pending", 32)),
+            timeout=float(self.config.get("verifier_timeout", 5.0)),
+        )
+        self.verify_tasks = set()
+        # Rankings are rebuilt from the stored progress and then updated on every solve
+        self.leaderboard = Leaderboard()
+        self.leaderboard.load(self.progress.solved)
+        self.max_top = int(self.config.get("leaderboard_max_top", 10))
+        self.setup_metrics()
+        # Opt-in capture of every inbound line, for offline replays
+        self.recorder = None
+        record_path = self.config.get("record_path")
+        if record_path:
+            self.recorder = CaptureWriter(record_path)
+            bot.attach_events(irc3.event(r"^(?P<raw>.+)", self.record_line), insert=True)
+            atexit.register(self.recorder.close)
+            self.log.info("Recording inbound traffic to %s", record_path)
+        # Attempts, solves and leaks for python -m audit, kept when audit_dir is set
+        self.audit = None
+        audit_dir = self.config.get("audit_dir")
+        if audit_dir:
+            self.audit = AuditLog(
+                audit_dir,
+                segment_bytes=int(float(self.config.get("audit_segment_mb", 64)) * 1024 * 1024),
+            )
+            atexit.register(self.audit.close)
+            self.log.info("Writing the audit log to %s", audit_dir)
+
+    def setup_metrics(self):
+        """Register the metrics, most are read from existing counters on scrape."""
+        self.metrics = Registry()
+        self.messages_in = self.metrics.counter(
+            "ctf_messages_in_total", "IRC messages received by event type", ["event"]
+        )
+        self.commands_out = self.metrics.counter(
+            "ctf_commands_out_total", "IRC commands sent outside the outbound queue", ["command"]
+        )
+        self.metrics.counter(
+            "ctf_messages_out_total",
+            "Messages sent through the outbound queue by lane",
+            ["lane"],
+            callback=lambda: {(lane,): s["sent"] for lane, s in self.outbound.stats().items()},
+        )
+        self.metrics.counter(
+            "ctf_messages_dropped_total",
+            "Messages dropped from full outbound queues by lane",
+            ["lane"],
+            callback=lambda: {(lane,): s["dropped"] for lane, s in self.outbound.stats().items()},
+        )
+        for stat, help_text in (
+            ("avg_wait", "Average seconds a message waited in the outbound queue by lane"),
+            ("max_wait", "Longest seconds a message waited in the outbound queue by lane"),
+        ):
+            self.metrics.gauge(
+                f"ctf_outbound_{stat}_seconds",
+                help_text,
+                ["lane"],
+                callback=lambda stat=stat: {
+                    (lane,): s[stat] for lane, s in self.outbound.stats().items()
+                },
+            )
+        self.metrics.gauge(
+            "ctf_sender_ready",
+            "Whether each connection can send private messages",
+            ["sender"],
+            callback=lambda: {
+                (name,): int(s["ready"]) for name, s in self.outbound.sender_stats().items()
+            },
+        )
+        self.metrics.counter(
+            "ctf_sender_lines_total",
+            "Lines written by each connection",
+            ["sender"],
+            callback=lambda: {
+                (name,): s["sent"] for name, s in self.outbound.sender_stats().items()
+            },
+        )
+        self.metrics.gauge(
+            "ctf_outbound_queue_depth",
+            "Messages waiting in the outbound queue by lane",
+            ["lane"],
+            callback=lambda: {(lane,): self.outbound.depth(lane) for lane in self.outbound.lanes},
+        )
+        self.metrics.counter(
+            "ctf_routed_total",
+            "PRIVMSG and NOTICE traffic by route",
+            ["route"],
+            callback=lambda: {(route,): count for route, count in self.router.stats().items()},
+        )
+        self.metrics.counter(
+            "ctf_throttled_total",
+            "Messages over a rate limit by category",
+            ["category"],
+            callback=lambda: {
+                (category,): limiter.throttled for category, limiter in self.limits.items()
+            },
+        )
+        self.joins = self.metrics.counter("ctf_joins_total", "Players joining game channels")
+        for stat, help_text in (
+            ("batches", "Greetings sent for a window of joins"),
+            ("greeted", "Players greeted"),
+            ("suppressed", "Joins not greeted, already greeted recently or over the limit"),
+            ("messages_saved", "Messages saved by greeting joins in batches"),
+        ):
+            self.metrics.counter(
+                f"ctf_greeter_{stat}_total",
+                help_text,
+                callback=lambda stat=stat: self.greeter.stats()[stat],
+            )
+        self.metrics.gauge(
+            "ctf_greeter_pending",
+            "Joins waiting for the end of their window",
+            callback=lambda: self.greeter.stats()["pending"],
+        )
+        self.leaked = self.metrics.counter(
+            "ctf_leaks_total", "Messages leaking an answer by channel", ["channel"]
+        )
+        self.solves = self.metrics.counter(
+            "ctf_solves_total", "Challenges solved by channel", ["channel"]
+        )
+        self.near_miss_count = self.metrics.counter(
+            "ctf_near_misses_total", "Wrong answers close to the solution by channel", ["channel"]
+        )
+        self.verify_seconds = self.metrics.histogram(
+            "ctf_verification_seconds", "Time to verify a submission", ["source"]
+        )
+        self.window_notices = self.metrics.counter(
+            "ctf_window_notified_total",
+            "Players told that a challenge's time window opened",
+            ["channel"],
+        )
+        self.verifiers.histogram = self.metrics.histogram(
+            "ctf_verifier_seconds", "Time spent in each verifier", ["verifier"]
+        )
+        self.metrics.gauge(
+            "ctf_verifier_pending",
+            "Expensive checks running or waiting for a worker",
+            callback=lambda: self.verifiers.pending,
+        )
+        for outcome in ("timeouts", "rejected", "errors"):
+            self.metrics.counter(
+                f"ctf_verifier_{outcome}_total",
+                f"Verifier {outcome} by verifier",
+                ["verifier"],
+                callback=lambda outcome=outcome: {
+                    (name,): count for name, count in self.verifiers.stats()[outcome].items()
+                },
+            )
+        self.metrics.gauge(
+            "ctf_sessions", "Nicks with a live session", callback=lambda: len(self.sessions)
+        )
+        self.metrics.gauge(
+            "ctf_session_bytes",
+            "Estimated memory held by sessions",
+            callback=self.sessions.estimated_bytes,
+        )
+        self.metrics.counter(
+            "ctf_sessions_ended_total",
+            "Sessions ended by reason",
+            ["reason"],
+            callback=lambda: {
+                (reason,): count for reason, count in self.sessions.stats()["ended"].items()
+            },
+        )
+        self.loop_lag = self.metrics.histogram(
+            "ctf_event_loop_lag_seconds", "How late the event loop runs a periodic timer"
+        )
+        self.metrics.counter(
+            "ctf_commands_avoided_total",
+            "TOPIC and KICK commands the channel state showed to be unneeded",
+            ["command"],
+            callback=lambda: {
+                (cmd.upper(),): count for cmd, count in self.channel_state.avoided.items()
+            },
+        )
+        self.metrics.gauge(
+            "ctf_channel_members",
+            "Members of the channels the bot is in",
+            callback=lambda: self.channel_state.stats()["members"],
+        )
+        self.metrics.gauge(
+            "ctf_time_to_ready_seconds",
+            "Seconds from connecting to being in every channel",
+            callback=lambda: self.startup.time_to_ready,
+        )
+        self.lag_monitor = LoopLagMonitor(self.loop_lag)
+        port = self.config.get("metrics_port")
+        self.metrics_server = None
+        self.metrics_task = None
+        if port not in (None, ""):
+            self.metrics_server = MetricsServer(
+                self.metrics, self.config.get("metrics_host", "127.0.0.1"), int(port)
+            )
+
+    def start_metrics(self):
+        """Start the event-loop lag monitor and the metrics endpoint, once."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.lag_monitor.start()
+        if self.metrics_server is not None and self.metrics_task is None:
+            self.metrics_task = asyncio.ensure_future(self._serve_metrics())
+
+    async def _serve_metrics(self):
+        try:
+            port = await self.metrics_server.start()
+            self.log.info("Serving metrics on http://%s:%s/metrics", self.metrics_server.host, port)
+        except OSError as e:
+            self.log.error("Could not start the metrics endpoint: %s", e)
+            self.metrics_server = None
+
+    def record_line(self, raw):
+        self.recorder.write(raw)
+
+    def audit_event(self, kind, channel, nick, source, answer=None):
+        """Append an attempt, solve or leak to the audit log, when one is kept."""
+        if self.audit is not None:
+            self.audit.record(kind, channel, nick, source, answer)
 
     def server_ready(self):
         """Called when the bot is ready to join channels."""
         self.log.info("Server ready! Attempting to join channels...")
+        # Channel state is rebuilt from the replies to our JOINs
+        self.channel_state.clear()
+        self.startup.reset()
+        self.start_metrics()
+        self.outbound.start()
+        self.caps.clear()
+        if "redact" in self.leak_actions:
+            # Servers acknowledge capabilities after registration too, redaction waits for it
+            self.outbound.send_command("CAP REQ :" + " ".join(REDACT_CAPS))
         try:
-            # Join all channels immediately
-            asyncio.create_task(self.join_channels())
+            # Join all channels right away, NickServ is handled concurrently
+            self.join_channels()
 
-            # Register with NickServ if not already registered
+            # Register with NickServ, or identify if we registered before a reconnect
             if not self.registered:
                 self.log.info("Attempting to register with NickServ...")
-                self.bot.privmsg(
-                    "NickServ", f'REGISTER {self.config["password"]} {self.config["email"]}'
+                self.outbound.send_command(
+                    f'PRIVMSG NickServ :REGISTER {self.config["password"]} {self.config["email"]}'
                 )
+            else:
+                self.log.info("Identifying with NickServ...")
+                self.outbound.send_command(f'PRIVMSG NickServ :IDENTIFY {self.config["password"]}')
         except Exception as e:
-            self.log.error(f"Error during registration: {str(e)}")
+            self.log.error("Error during registration: %s", e)
+
+    @irc3.event(r"^:\S+ CAP \S+ (?P<subcommand>ACK|NAK) :?(?P<caps>.*)")
+    def on_cap(self, subcommand, caps, **kwargs):
+        """Track the capabilities the server acknowledged."""
+        if subcommand == "NAK":
+            self.log.warning("Server refused capabilities %s, leaks cannot be redacted", caps)
+            return
+        for cap in caps.split():
+            if cap.startswith("-"):
+                self.caps.discard(cap[1:])
+            else:
+                self.caps.add(cap)
+
+    def build_routes(self):
+        """Compile the PRIVMSG routing table for the current challenge channels."""
+        self.router.clear()
+        self.router.add("query", None, "services", "nickserv", self.handle_nickserv)
+        self.router.add("query", None, "user", "submission", self.handle_privmsg)
+        for channel in ("#CypherCon", "#ctf-game"):
+            # Everything is scanned for leaked answers, only commands get a reply
+            self.router.add("channel", channel, "user", "main_channel", self.handle_channel_msg)
+        for channel in current_snapshot().channels:
+            self.router.add("channel", channel, "user", "channel_attempt", self.handle_channel_msg)
 
     @irc3.event(irc3.rfc.PRIVMSG)
-    def handle_nickserv(self, mask, event, target, data):
+    def on_privmsg(self, mask, event, target, data, **kwargs):
+        """Route every PRIVMSG and NOTICE to a single handler."""
+        self.messages_in.inc(event)
+        if mask.nick != self.bot.nick:
+            self.sessions.touch(mask.nick, mask.host)
+        self.router.dispatch(mask, event, target, data, **kwargs)
+
+    def on_sender_message(self, prefix, event, data):
+        """Handle a PRIVMSG a player sent to one of the sender nicks."""
+        # Players answer whichever nick wrote to them, it is the bot all the same
+        self.on_privmsg(IrcString(prefix), event, self.bot.nick, data)
+
+    def handle_nickserv(self, mask, event, target, data, **kwargs):
         """Handle NickServ messages."""
-        if target == self.bot.nick:
-            self.log.info(f"NickServ message: {data}")
-            if "Your nickname is not registered" in data:
-                self.log.info("Attempting to register nickname...")
-                self.bot.privmsg(
-                    "NickServ", f'REGISTER {self.config["password"]} {self.config["email"]}'
-                )
-            elif "Registration successful" in data:
-                self.log.info("Registration successful!")
-                self.registered = True
-                # Join channels after successful registration
-                asyncio.create_task(self.join_channels())
-            elif "Password accepted" in data:
-                self.log.info("Password accepted!")
-                self.registered = True
-                # Join channels after successful authentication
-                asyncio.create_task(self.join_channels())
-
-    async def join_channels(self):
-        """Join all required channels."""
+        self.log.info("NickServ message: %s", data)
+        if "Your nickname is not registered" in data:
+            self.log.info("Attempting to register nickname...")
+            self.outbound.send_command(
+                f'PRIVMSG NickServ :REGISTER {self.config["password"]} {self.config["email"]}'
+            )
+        elif "Registration successful" in data:
+            self.log.info("Registration successful!")
+            self.registered = True
+            # Retry channels that did not confirm yet, they may require a registered nick
+            self.join_channels(retry=True)
+        elif "Password accepted" in data:
+            self.log.info("Password accepted!")
+            self.registered = True
+            # Retry channels that did not confirm yet, they may require a registered nick
+            self.join_channels(retry=True)
+
+    def load_packs(self, directory):
+        """Compile the challenge packs in a directory into a new snapshot."""
         try:
-            # Join the main channel
-            self.log.info("Joining #CypherCon...")
-            self.bot.join("#CypherCon")
-
-            # Join all challenge channels
-            for channel in CHALLENGES.keys():
-                self.log.info(f"Joining {channel}...")
-                self.bot.join(channel)
-                # Add a small delay between joins to avoid flood protection
-                await asyncio.sleep(1)
+            snapshot, report = compile_packs(directory, current_snapshot())
+        except (OSError, PackError) as e:
+            self.log.error("Could not load challenge packs from %s: %s", directory, e)
+            return None
+        install_snapshot(snapshot)
+        self.log.info(
+            "Loaded %d challenges from %d packs in %.1f ms (compiled in %.1f ms)",
+            report["challenges"],
+            report["packs"],
+            report["load_seconds"] * 1000,
+            report["compile_seconds"] * 1000,
+        )
+        return report
+
+    def regenerate_challenges(self):
+        """Swap in a new challenge snapshot, joining any channels it added."""
+        snapshot = refresh_challenges()
+        self.log.info("Challenges regenerated, now at version %s", snapshot.version)
+        self.build_routes()
+        self.join_channels()
+        return snapshot
+
+    def check_windows(self, now=None):
+        """Announce the time windows that opened since the last check."""
+        snapshot = current_snapshot()
+        for channel, window in snapshot.windows.items():
+            if window.is_open(now) and self.announced.get(channel) != window.opened_at:
+                self.announced[channel] = window.opened_at
+                self.announce_window(channel, window, snapshot)
+
+    def announce_window(self, channel, window, snapshot):
+        """Tell the channel and every online player who can solve it now, in one pass."""
+        required = snapshot.requires[channel]
+        waiting = []
+        for key, session in self.sessions.sessions.items():
+            solved = self.progress.solved_channels(key)
+            if (
+                channel not in solved
+                and all(prerequisite in solved for prerequisite in required)
+                and not self.leaks.is_burned(key, channel)
+            ):
+                waiting.append(session.nick)
+        self.log.event("window_open", channel=channel, waiting=len(waiting))
+        line = (
+            f"⏰ The time window for {channel} is open for {window.minutes} minute(s), "
+            "send your answer now!"
+        )
+        # Without TARGMAX the server may not take more than one target per PRIVMSG
+        server_config = self.bot.config.get("server_config", {})
+        max_targets = target_limit(server_config, "PRIVMSG") or 1
+        budget = 512 - len(f"PRIVMSG  :{line}\r\n".encode("utf-8"))
+        for targets in batch_channels([channel, *waiting], max_targets, budget):
+            self.outbound.send_lines(targets, [line], lane="reply")
+        self.window_notices.inc(channel, amount=len(waiting))
+        return waiting
+
+    def is_admin(self, mask):
+        """Check a sender against the configured admin hostmasks."""
+        mask = str(mask).lower()
+        return any(fnmatch.fnmatchcase(mask, pattern) for pattern in self.admins)
+
+    def join_channels(self, retry=False):
+        """Join all required channels in as few JOIN commands as the server allows."""
+        try:
+            channels = self.startup.expect(
+                ["#CypherCon", *current_snapshot().channels], retry=retry
+            )
+            server_config = self.bot.config.get("server_config", {})
+            limit = channel_limit(server_config)
+            if limit is not None and len(self.startup.pending) > limit:
+                self.log.warning("Server allows %s channels, some will not be joined", limit)
+            for targets in batch_channels(channels, join_target_limit(server_config)):
+                self.log.info("Joining %s...", targets)
+                self.outbound.send_command(f"JOIN {targets}")
+                self.commands_out.inc("JOIN")
         except Exception as e:
-            self.log.error(f"Error joining channels: {str(e)}")
+            self.log.error("Error joining channels: %s", e)
 
     def set_channel_topic(self, channel, topic):
         """Set channel topic with retry mechanism."""
+        if not self.channel_state.needs_topic(channel, topic):
+            return
+
         if channel not in self.topic_retries:
             self.topic_retries[channel] = 0
 
         if self.topic_retries[channel] < 3:
             try:
                 self.log.info(
-                    f"Setting topic for {channel} (attempt {self.topic_retries[channel] + 1})"
+                    "Setting topic for %s (attempt %d)", channel, self.topic_retries[channel] + 1
                 )
-                self.bot.topic(channel, topic)
+                self.outbound.send_command(f"TOPIC {channel} :{topic}")
+                self.commands_out.inc("TOPIC")
                 self.topic_retries[channel] += 1
             except Exception as e:
-                self.log.error(f"Error setting topic for {channel}: {str(e)}")
+                self.log.error("Error setting topic for %s: %s", channel, e)
                 self.topic_retries[channel] += 1
         else:
-            self.log.warning(f"Max retries reached for setting topic in {channel}")
+            self.log.warning("Max retries reached for setting topic in %s", channel)
+
+    @irc3.event(irc3.rfc.JOIN)
+    def track_join(self, mask, channel, **kwargs):
+        """Track channel members on JOIN."""
+        self.messages_in.inc("JOIN")
+        own = mask.nick == self.bot.nick
+        self.channel_state.joined(channel, mask.nick, own)
+        if own:
+            # The reply (RPL_CHANNELMODEIS) tells whether the topic is locked to operators
+            self.outbound.send_command(f"MODE {channel}", lane="chatter")
+        if own and self.startup.confirm(channel):
+            self.log.info("Ready: joined all channels in %.2fs", self.startup.time_to_ready)
+
+    @irc3.event(irc3.rfc.PART)
+    def track_part(self, mask, channel, **kwargs):
+        """Track channel members on PART."""
+        self.messages_in.inc("PART")
+        own = mask.nick == self.bot.nick
+        self.channel_state.parted(channel, mask.nick, own)
+        if own:
+            self.startup.lost(channel)
+
+    @irc3.event(irc3.rfc.KICK)
+    def track_kick(self, mask, channel, target, **kwargs):
+        """Track channel members on KICK."""
+        self.messages_in.inc("KICK")
+        own = target == self.bot.nick
+        self.channel_state.parted(channel, target, own)
+        if own:
+            self.startup.lost(channel)
+
+    @irc3.event(irc3.rfc.QUIT)
+    def track_quit(self, mask, **kwargs):
+        """Track channel members on QUIT."""
+        self.messages_in.inc("QUIT")
+        self.channel_state.quit(mask.nick)
+        self.sessions.remove(mask.nick)
+
+    @irc3.event(irc3.rfc.NEW_NICK)
+    def track_nick(self, nick, new_nick, **kwargs):
+        """Track channel members on NICK."""
+        self.messages_in.inc("NICK")
+        self.channel_state.renamed(nick.nick, new_nick)
+        self.sessions.rename(nick.nick, new_nick)
+
+    @irc3.event(irc3.rfc.RPL_NAMREPLY)
+    def track_names(self, channel, data, **kwargs):
+        """Track channel members from the NAMES list."""
+        self.channel_state.names(channel, data)
+
+    @irc3.event(irc3.rfc.RPL_ENDOFNAMES)
+    def track_end_of_names(self, channel, **kwargs):
+        """Mark a channel as synced once its NAMES list ended."""
+        self.channel_state.end_of_names(channel)
+
+    @irc3.event(irc3.rfc.RPL_TOPIC)
+    @irc3.event(irc3.rfc.TOPIC)
+    def track_topic(self, channel, data, **kwargs):
+        """Track channel topics."""
+        self.channel_state.topic_changed(channel, data)
+
+    @irc3.event(irc3.rfc.MODE)
+    def track_mode(self, target, modes, data=None, **kwargs):
+        """Track channel modes."""
+        if target.startswith("#"):
+            kinds = parameter_modes(self.bot.config.get("server_config"))
+            self.channel_state.mode_changed(target, modes, data or "", kinds)
+
+    # irc3's own pattern for 324 misses replies whose modes have no parameters
+    @irc3.event(r"^:\S+ 324 \S+ (?P<channel>\S+) (?P<modes>\S+)( (?P<data>.*)|$)")
+    def track_channel_modes(self, channel, modes, data=None, **kwargs):
+        """Track the full mode list of a channel from RPL_CHANNELMODEIS."""
+        kinds = parameter_modes(self.bot.config.get("server_config"))
+        self.channel_state.modes_listed(channel, modes, data or "", kinds)
 
     @irc3.event(irc3.rfc.JOIN)
     def handle_join(self, mask, channel, **kwargs):
         """Handle when users join channels."""
-        self.log.info(f"Join event: {mask.nick} joined {channel}")
+        if mask.nick == self.bot.nick:
+            return
+        self.log.event("join", nick=mask.nick, channel=channel)
+        self.sessions.touch(mask.nick, mask.host)
+        if channel in current_snapshot() or channel == "#CypherCon":
+            self.joins.inc()
+            # Greetings are batched per channel, see greet_joins
+            self.greeter.add(channel, mask.nick)
+
+    def greet_joins(self, channel, nicks):
+        """Greet everyone who joined a channel during the last join window."""
+        names = format_names(nicks, self.join_max_names)
+        snapshot = current_snapshot()
 
         # Set channel topic for challenge channels
-        if channel in CHALLENGES:
-            challenge, _, _ = get_challenge(channel)
-            self.log.info(f"Setting topic for {channel}")
+        if channel in snapshot:
+            self.log.debug("Setting topic for %s", channel)
             self.set_channel_topic(
                 channel, f"🎮 CTF Challenge Channel | Solve the challenge to get the next channel!"
             )
+            if channel in PLAYER_CHALLENGES:
+                # Everyone has their own variant, only the private welcome shows it
+                self.outbound.send_lines(
+                    channel,
+                    self.messages.render(
+                        ("personal_welcome", channel),
+                        lambda: (
+                            f"👋 Welcome {NICK_SLOT} to {channel}!\n"
+                            f"🎯 Your personal challenge was sent to you privately."
+                        ),
+                        names,
+                    ),
+                    lane="welcome",
+                )
+                for nick in nicks:
+                    self.outbound.send(
+                        nick,
+                        f"👋 Welcome {nick} to {channel}!\n"
+                        f"🎯 Here's your challenge:\n"
+                        f"{self.instances.challenge_text(snapshot, channel, nick)}\n"
+                        f"💡 Submit your answer via private message.",
+                        lane="welcome",
+                    )
+                return
 
-            # Send welcome message with challenge
-            welcome_msg = (
-                f"👋 Welcome {mask.nick} to {channel}!\n"
-                f"🎯 Here's your challenge:\n"
-                f"{challenge}\n"
-                f"💡 Submit your answer in the channel or via private message."
+            welcome = self.messages.get(
+                ("challenge_welcome", channel),
+                lambda: (
+                    f"👋 Welcome {NICK_SLOT} to {channel}!\n"
+                    f"🎯 Here's your challenge:\n"
+                    f"{snapshot.get_challenge(channel)[0]}\n"
+                    f"💡 Submit your answer via private message."
+                ),
             )
-            self.log.info(f"Sending challenge to {mask.nick} in {channel}")
-            self.bot.privmsg(channel, welcome_msg)
+
+            # Send one welcome message with the challenge to the channel
+            self.log.debug("Sending challenge to %d players in %s", len(nicks), channel)
+            self.outbound.send_lines(channel, welcome.render(names), lane="welcome")
             # Also send privately
-            self.bot.privmsg(mask.nick, welcome_msg)
+            for nick in nicks:
+                self.outbound.send_lines(nick, welcome.render(nick), lane="welcome")
 
         # Set topic for main channel
         elif channel == "#CypherCon":
-            self.log.info("Setting topic for main channel")
+            self.log.debug("Setting topic for main channel")
             self.set_channel_topic(
                 channel, "🎮 IRC CTF Game | Find hidden channels and solve challenges!"
             )
+            welcome = self.messages.get(
+                ("main_welcome", channel),
+                lambda: (
+                    f"👋 Welcome {NICK_SLOT} to the IRC CTF Game!\n"
+                    f"🎯 Find hidden channels and solve challenges to progress.\n"
+                    f"💡 Type !start to begin your journey!"
+                ),
+            )
 
             # Send welcome message to main channel
-            welcome_msg = (
-                f"👋 Welcome {mask.nick} to the IRC CTF Game!\n"
-                f"🎯 Find hidden channels and solve challenges to progress.\n"
-                f"💡 Type !start to begin your journey!"
-            )
-            self.bot.privmsg(channel, welcome_msg)
+            self.outbound.send_lines(channel, welcome.render(names), lane="welcome")
             # Also send privately
-            self.bot.privmsg(mask.nick, welcome_msg)
+            for nick in nicks:
+                self.outbound.send_lines(nick, welcome.render(nick), lane="welcome")
 
     @irc3.event(irc3.rfc.JOIN)
     def handle_bot_join(self, mask, channel, **kwargs):
@@ -143,7 +736,7 @@ class CTFGame:
         if mask.nick == self.bot.nick:
             if channel == "#CypherCon":
                 self.log.info("Bot joined main channel, sending initial message")
-                self.bot.privmsg(
+                self.outbound.send(
                     channel,
                     (
                         "🎮 Welcome to the IRC CTF Game!\n"
@@ -151,15 +744,16 @@ class CTFGame:
                         "💡 Type !start to begin your journey!\n"
                         "❓ Type !help for more information"
                     ),
+                    lane="chatter",
                 )
             # Reset topic retries when bot joins a channel
             self.topic_retries[channel] = 0
 
     @irc3.event(irc3.rfc.KICK)
-    def handle_kick(self, mask, channel, target, reason, **kwargs):
+    def handle_kick(self, mask, channel, target, data=None, **kwargs):
         """Handle when the bot is kicked from a channel."""
         if target == self.bot.nick:
-            self.log.info(f"Bot was kicked from {channel} by {mask.nick}: {reason}")
+            self.log.info("Bot was kicked from %s by %s: %s", channel, mask.nick, data)
             # Rejoin the channel after a short delay
             asyncio.create_task(self.rejoin_channel(channel))
 
@@ -167,205 +761,424 @@ class CTFGame:
     def handle_part(self, mask, channel, **kwargs):
         """Handle when the bot parts from a channel."""
         if mask.nick == self.bot.nick:
-            self.log.info(f"Bot parted from {channel}")
+            self.log.info("Bot parted from %s", channel)
             # Rejoin the channel after a short delay
             asyncio.create_task(self.rejoin_channel(channel))
 
     async def rejoin_channel(self, channel):
         """Rejoin a channel after a delay."""
         await asyncio.sleep(5)  # Wait 5 seconds before rejoining
-        self.log.info(f"Attempting to rejoin {channel}")
+        self.log.info("Attempting to rejoin %s", channel)
         try:
-            self.bot.join(channel)
+            self.startup.expect([channel], retry=True)
+            self.outbound.send_command(f"JOIN {channel}")
+            self.commands_out.inc("JOIN")
         except Exception as e:
-            self.log.error(f"Error rejoining {channel}: {str(e)}")
+            self.log.error("Error rejoining %s: %s", channel, e)
+
+    def _within_limit(self, category, mask):
+        """Check a sender's budget, telling them once when they go over it."""
+        verdict = self.limits[category].hit(mask.host)
+        if verdict == THROTTLE:
+            self.log.event("throttle", category=category, nick=mask.nick)
+            self.outbound.send(
+                mask.nick,
+                f"⏳ {mask.nick}, you're going too fast! Wait a minute before trying again.",
+                lane="reply",
+            )
+        return verdict == ALLOW
 
     def handle_command(self, mask, target, data):
         """Handle bot commands."""
         if data.startswith("!"):
-            command = data[1:].lower()
-            self.log.info(f"Command received: {command} from {mask.nick}")
+            if not self._within_limit("command", mask):
+                return
+            command, _, args = data[1:].lower().partition(" ")
+            self.log.event("command", command=command, nick=mask.nick)
 
             if command == "start":
                 # Send to both channel and user
-                self.bot.privmsg(
-                    target, f"🎯 {mask.nick}, check your private messages for instructions!"
+                self.outbound.send(
+                    target,
+                    f"🎯 {mask.nick}, check your private messages for instructions!",
+                    lane="reply",
                 )
-                self.bot.privmsg(
+                self.outbound.send(
                     mask.nick,
                     (
                         f"🎯 {mask.nick}, your first challenge awaits!\n"
                         f"🔍 Join #challenge-1-welcome to begin.\n"
                         f"💡 Type: /join #challenge-1-welcome"
                     ),
+                    lane="reply",
+                )
+            elif command == "top":
+                # isdigit() also accepts digits such as "²" that int() rejects
+                count = int(args) if args.strip().isdecimal() else 5
+                count = max(1, min(count, self.max_top))
+                self.outbound.send(
+                    target, self.leaderboard.top_text(count, self.format_top), lane="reply"
+                )
+            elif command == "rank":
+                rank = self.leaderboard.rank(mask.nick)
+                if rank is None:
+                    text = f"🏅 {mask.nick}, you haven't solved a challenge yet. Type !start!"
+                else:
+                    text = (
+                        f"🏅 {mask.nick}, you are #{rank[0]} of {len(self.leaderboard)} "
+                        f"with {rank[1]} challenges solved."
+                    )
+                self.outbound.send(target, text, lane="reply")
+            elif command == "regenerate" and self.is_admin(mask):
+                snapshot = self.regenerate_challenges()
+                self.outbound.send(
+                    mask.nick,
+                    f"🔄 Challenges regenerated, now at version {snapshot.version}.",
+                    lane="reply",
                 )
             elif command == "help":
                 # Send to both channel and user
-                self.bot.privmsg(target, f"❓ {mask.nick}, check your private messages for help!")
-                self.bot.privmsg(
+                self.outbound.send(
+                    target, f"❓ {mask.nick}, check your private messages for help!", lane="reply"
+                )
+                self.outbound.send(
                     mask.nick,
                     (
                         f"🎮 IRC CTF Game Help:\n"
                         f"!start - Begin your journey\n"
                         f"!help - Show this help message\n"
+                        f"!top [n] - Show the leaderboard\n"
+                        f"!rank - Show your place on the leaderboard\n"
                         f"💡 Each challenge will lead you to the next channel\n"
                         f"🎯 Solve all challenges to win!"
                     ),
+                    lane="reply",
                 )
 
-    @irc3.event(irc3.rfc.PRIVMSG)
-    def handle_channel_msg(self, mask, event, target, data):
-        """Handle channel messages."""
-        # Skip if the message is from the bot itself
-        if mask.nick == self.bot.nick:
-            return
+    @staticmethod
+    def format_top(top):
+        """Render the leaderboard on one line."""
+        if not top:
+            return "🏆 Nobody has solved a challenge yet. Be the first!"
+        places = " ".join(f"{i}. {nick} ({solved})" for i, (nick, solved) in enumerate(top, 1))
+        return f"🏆 Top {len(top)}: {places}"
 
-        # Only process channel messages
-        if target.startswith("#"):
-            self.log.info(f"Channel message in {target} from {mask.nick}: {data}")
-
-            # Handle commands in the main channel
-            if target == "#ctf-game":
-                self.handle_command(mask, target, data)
-
-            # For challenge solutions in channel, always say incorrect
-            elif target in CHALLENGES:
-                self.log.info(f"Solution attempt in channel from {mask.nick} in {target}")
-                self.bot.privmsg(target, f"❌ {mask.nick}, that's not correct. Try again!")
-                # Send private message to guide them
-                self.bot.privmsg(
-                    mask.nick,
-                    (
-                        f"💡 Hey {mask.nick}!\n"
-                        f"To submit solutions, please send them to me privately.\n"
-                        f"This keeps the answers secret for other players.\n"
-                        f"Try sending your answer directly to me!"
-                    ),
-                )
+    def handle_channel_msg(self, mask, event, target, data, tags=None, **kwargs):
+        """Handle channel messages, ordinary chatter gets no reply."""
+        snapshot = current_snapshot()
+        leaked = self.leaks.scan(snapshot, data)
+        if leaked:
+            for channel in leaked:
+                self.audit_event(LEAK, channel, mask.nick, "channel")
+            self.handle_leak(mask, target, leaked, tags)
 
-    @irc3.event(irc3.rfc.PRIVMSG)
-    def handle_privmsg(self, mask, event, target, data):
-        """Handle private messages."""
-        if target == self.bot.nick:  # Only process direct messages to the bot
-            self.log.info(f"Private message from {mask.nick}: {data}")
-            # For private messages, we don't know the channel, so pass None
-            self.handle_challenge_solution(mask, data, current_channel=None)
-
-    @irc3.event("NOTICE")
-    def handle_notice(self, mask, event, target, data):
-        """Handle notice messages."""
-        if target == self.bot.nick:  # Only process notices to the bot
-            self.log.info(f"Notice from {mask.nick}: {data}")
-            # Handle notices the same way as private messages
-            self.handle_challenge_solution(mask, data, current_channel=None)
+        # Handle commands in the main channel
+        elif target not in snapshot and data.startswith("!"):
+            self.handle_command(mask, target, data)
+
+    def handle_leak(self, mask, target, leaked, tags=None):
+        """Apply the configured actions to an answer posted in a channel."""
+        self.log.event(
+            "leak", level=logging.WARNING, nick=mask.nick, channel=target, answers=",".join(leaked)
+        )
+        self.leaked.inc(target)
+        if "redact" in self.leak_actions and tags and self.caps.issuperset(REDACT_CAPS):
+            # IRCv3 message redaction, only once the server acknowledged it
+            msgid = irc3.tags.decode(tags).get("msgid")
+            if msgid:
+                self.outbound.send_command(f"REDACT {target} {msgid} :Answer removed")
+                self.commands_out.inc("REDACT")
+        if "burn" in self.leak_actions:
+            for channel in leaked:
+                if not self.progress.has_solved(mask.nick, channel):
+                    self.leaks.burn(mask.nick, channel)
+        if "warn" in self.leak_actions and self._within_limit("channel", mask):
+            self.outbound.send(
+                mask.nick,
+                (
+                    f"🤫 {mask.nick}, please don't post answers in the channel!\n"
+                    f"💡 Send your answer to me privately, it keeps the challenge fun for everyone."
+                ),
+                lane="reply",
+            )
+        if "kick" in self.leak_actions and self.channel_state.needs_kick(target, mask.nick):
+            self.outbound.send_command(
+                f"KICK {target} {mask.nick} :Please don't post answers in the channel."
+            )
+            self.commands_out.inc("KICK")
+
+    def handle_privmsg(self, mask, event, target, data, **kwargs):
+        """Handle private messages and notices sent to the bot."""
+        if not self._within_limit("submission", mask):
+            return
+        self.log.event("submission", nick=mask.nick, length=len(data))
+        # For private messages, we don't know the channel, so pass None
+        self.handle_challenge_solution(mask, data, current_channel=None)
 
     def handle_challenge_solution(self, mask, solution, current_channel=None):
         """Handle challenge solutions."""
-        self.log.info(f"Processing solution from {mask.nick}: {solution}")
+        # The whole verification runs against one snapshot, even if a regeneration happens
+        snapshot = current_snapshot()
+        started = time.perf_counter()
 
-        # For channel messages, only check that specific channel
-        if current_channel and current_channel in CHALLENGES:
-            self.log.info(f"Checking solution for channel: {current_channel}")
-            if verify_solution(current_channel, solution):
-                self.log.info(f"Solution verified for {current_channel}!")
-                self._send_success_messages(mask, current_channel)
-                # Kick user from channel after solving
-                self.bot.kick(
-                    current_channel,
-                    mask.nick,
-                    "Challenge solved! Check your private messages for the next challenge.",
-                )
-                return
+        # Players can only solve challenges whose prerequisites they have solved
+        available = [
+            channel
+            for channel in snapshot.available(self.progress.solved_channels(mask.nick))
+            if not self.leaks.is_burned(mask.nick, channel)
+        ]
+        if not available:
+            return
 
-        # For private messages, check all channels
+        # For channel messages, only check that specific channel
+        if current_channel and current_channel in snapshot:
+            self.log.debug("Checking solution for channel: %s", current_channel)
+            candidates = [current_channel] if current_channel in available else []
+            source = "channel"
+        # For private messages, check the challenges the player can work on
         elif not current_channel:
-            for channel in CHALLENGES.keys():
-                self.log.info(f"Checking solution for channel: {channel}")
-                if verify_solution(channel, solution):
-                    self.log.info(f"Solution verified for {channel}!")
-                    self._send_success_messages(mask, channel)
-                    # Kick user from channel after solving
-                    self.bot.kick(
-                        channel,
-                        mask.nick,
-                        "Challenge solved! Check your private messages for the next challenge.",
-                    )
+            candidates = available
+            source = "query"
+        else:
+            return
+
+        solved, offloaded = self._find_solved(snapshot, candidates, mask.nick, solution)
+        self.verify_seconds.observe(time.perf_counter() - started, source)
+        if solved:
+            self.audit_event(SOLVE, solved, mask.nick, source)
+            self._complete_challenge(mask, solved, snapshot)
+        elif offloaded:
+            self._verify_offloaded(mask, solution, offloaded, snapshot, source, candidates)
+        elif candidates:
+            # Wrong answers in private are counted against the first challenge left
+            self._wrong_answer(mask, solution, candidates[0], candidates, snapshot, source)
+
+    def _find_solved(self, snapshot, candidates, nick, solution):
+        """(channel the answer solves or None, candidates left to expensive verifiers)."""
+        # Answers shared by every player are found with one index lookup
+        indexed = snapshot.solution_index.get(solution_digest(solution))
+        if indexed in PLAYER_CHALLENGES:
+            indexed = None
+        if indexed in candidates and snapshot.matches_solution(indexed, solution):
+            return indexed, []
+        offloaded = []
+        for channel in candidates:
+            if indexed is None and self._is_indexed(snapshot, channel):
+                # No shared answer has this digest, so this channel cannot match
+                continue
+            if self.verifiers.is_expensive(snapshot, channel):
+                offloaded.append(channel)
+            elif self._matches(snapshot, channel, nick, solution):
+                return channel, []
+        return None, offloaded
+
+    @staticmethod
+    def _is_indexed(snapshot, channel):
+        """Whether the solution index holds the answer to a channel."""
+        return channel in snapshot.canonical and channel not in PLAYER_CHALLENGES
+
+    def _matches(self, snapshot, channel, nick, solution):
+        """Check a cheap answer in place, per-player variants against the player's own."""
+        if channel in PLAYER_CHALLENGES:
+            return self.instances.matches(snapshot, channel, nick, solution)
+        return self.verifiers.check(snapshot, channel, nick, solution)
+
+    def _verify_offloaded(self, mask, solution, channels, snapshot, source, candidates):
+        """Check answers for expensive verifiers without blocking the event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to wait on (tests, tools), check in place
+            for channel in channels:
+                if self.verifiers.check(snapshot, channel, mask.nick, solution):
+                    self.audit_event(SOLVE, channel, mask.nick, source)
+                    self._complete_challenge(mask, channel, snapshot)
                     return
+            self._wrong_answer(mask, solution, channels[0], candidates, snapshot, source)
+            return
+        task = loop.create_task(
+            self._verify_in_pool(mask, solution, channels, snapshot, source, candidates)
+        )
+        self.verify_tasks.add(task)
+        task.add_done_callback(self.verify_tasks.discard)
+
+    async def _verify_in_pool(self, mask, solution, channels, snapshot, source, candidates):
+        results = await asyncio.gather(
+            *(
+                self.verifiers.check_async(snapshot, channel, mask.nick, solution)
+                for channel in channels
+            )
+        )
+        for channel, solved in zip(channels, results):
+            # A second submission may have been accepted while this one waited
+            if solved and not self.progress.has_solved(mask.nick, channel):
+                self.audit_event(SOLVE, channel, mask.nick, source)
+                self._complete_challenge(mask, channel, snapshot)
+                return
+        if None in results:
+            self.outbound.send(
+                mask.nick,
+                f"⏳ {mask.nick}, too many answers are being checked right now. "
+                "Try again in a moment.",
+                lane="reply",
+            )
+        elif not any(results):
+            self._wrong_answer(mask, solution, channels[0], candidates, snapshot, source)
+
+    def _wrong_answer(self, mask, solution, channel, candidates, snapshot, source):
+        """Record a wrong answer, and tell the player when it is close to one of ``candidates``."""
+        known = self._is_known_answer(snapshot, solution, mask.nick)
+        self.audit_event(ATTEMPT, channel, mask.nick, source, None if known else solution)
+        personal = []
+        for candidate in candidates:
+            instance = self.instances.get(snapshot, candidate, mask.nick)
+            if instance is not None:
+                personal.append((candidate, instance.canonical))
+        kind, closest = self.near_misses.classify(snapshot, solution, candidates, personal)
+        if kind == NEAR:
+            self.near_miss_count.inc(closest)
+            self.outbound.send(
+                mask.nick,
+                f"🔥 {mask.nick}, you're close on {closest}! Check your answer for typos.",
+                lane="reply",
+            )
+        elif kind == EXACT and not snapshot.is_time_open(closest):
+            self.outbound.send(
+                mask.nick,
+                f"⏰ {mask.nick}, that is the answer to {closest}, but its time window is "
+                "closed. You'll be told when it opens.",
+                lane="reply",
+            )
+
+    def _is_known_answer(self, snapshot, solution, nick):
+        """Whether a wrong answer is the answer to some challenge, one that is locked or closed."""
+        digest = solution_digest(solution)
+        if digest in snapshot.solution_index:
+            return True
+        for channel in PLAYER_CHALLENGES:
+            instance = self.instances.get(snapshot, channel, nick)
+            if instance is not None and instance.digest == digest:
+                return True
+        return False
 
-    def _send_success_messages(self, mask, solved_channel):
+    def _complete_challenge(self, mask, channel, snapshot):
+        """Record a solve, notify the player and kick them from the solved channel."""
+        self.log.event("solve", nick=mask.nick, channel=channel)
+        self.progress.record_solve(mask.nick, channel)
+        self.leaderboard.record(
+            mask.nick, len(self.progress.solved_channels(mask.nick)), name=mask.nick
+        )
+        self.solves.inc(channel)
+        self._send_success_messages(mask, channel, snapshot)
+        # Kick user from channel after solving, if they are in it
+        if self.channel_state.needs_kick(channel, mask.nick):
+            self.outbound.send_command(
+                f"KICK {channel} {mask.nick} "
+                ":Challenge solved! Check your private messages for the next challenge."
+            )
+            self.commands_out.inc("KICK")
+
+    def _send_success_messages(self, mask, solved_channel, snapshot):
         """Send success messages to the user."""
-        self.log.info(f"Preparing success messages for {mask.nick} in {solved_channel}")
-        next_channel = get_next_channel(solved_channel)
+        self.log.debug("Preparing success messages for %s in %s", mask.nick, solved_channel)
+        # Point at a challenge this solve unlocked, or else any other one still open
+        available = snapshot.available(self.progress.solved_channels(mask.nick))
+        unlocked = [channel for channel in snapshot.unlocks[solved_channel] if channel in available]
+        next_channel = (unlocked or available or [None])[0]
 
         if next_channel:
-            self.log.info(
-                f"Correct solution! Notifying {mask.nick} about next channel: {next_channel}"
-            )
+            self.log.debug("Notifying %s about next channel: %s", mask.nick, next_channel)
 
             try:
-                # Send success message privately
-                success_msg = (
-                    f"🎉 Congratulations! You've solved the challenge in {solved_channel}!"
-                )
-                self.log.info(f"Sending success message to {mask.nick}")
-                self.bot.privmsg(mask.nick, success_msg)
-
-                # Get and send next challenge details privately
-                next_challenge, _, _ = get_challenge(next_channel)
-                next_msg = (
-                    f"🎯 Your next challenge awaits in: {next_channel}\n"
-                    f"💡 Type this command to join: /join {next_channel}\n"
-                    f"\n📝 Here's a preview of your next challenge:\n"
-                    f"{next_challenge}"
+                # Send success message and next challenge details privately
+                personal = self.instances.fetch(snapshot, next_channel, mask.nick)
+                lines = self.messages.render(
+                    ("solved", solved_channel, next_channel),
+                    lambda: (
+                        f"🎉 Congratulations! You've solved the challenge in {solved_channel}!\n"
+                        f"🎯 Your next challenge awaits in: {next_channel}\n"
+                        f"💡 Type this command to join: /join {next_channel}\n"
+                        f"\n📝 Here's a preview of your next challenge:\n"
+                        + ("" if personal else snapshot.get_challenge(next_channel)[0])
+                    ),
                 )
-                self.log.info(f"Sending next challenge details to {mask.nick}")
-                self.bot.privmsg(mask.nick, next_msg)
+                self.log.debug("Sending success message to %s", mask.nick)
+                self.outbound.send_lines(mask.nick, lines, lane="solve")
+                if personal is not None:
+                    self.outbound.send(mask.nick, personal.challenge, lane="solve")
             except Exception as e:
-                self.log.error(f"Error sending messages to {mask.nick}: {str(e)}")
+                self.log.error("Error sending messages to %s: %s", mask.nick, e)
                 # Try to send a simpler message if the detailed one fails
                 try:
-                    self.bot.privmsg(
+                    self.outbound.send(
                         mask.nick,
                         f"🎉 Congratulations! Join {next_channel} for your next challenge!",
+                        lane="solve",
                     )
                 except Exception as e2:
-                    self.log.error(f"Error sending fallback message: {str(e2)}")
+                    self.log.error("Error sending fallback message: %s", e2)
         else:
-            self.log.info(f"Final challenge completed by {mask.nick}!")
+            self.log.info("Final challenge completed by %s!", mask.nick)
             try:
-                final_msg = (
-                    f"🏆 CONGRATULATIONS {mask.nick}! 🏆\n"
-                    f"You've completed all challenges in the CTF game!\n"
-                    f"Thank you for playing! 🎮"
+                lines = self.messages.render(
+                    ("final",),
+                    lambda: (
+                        f"🏆 CONGRATULATIONS {NICK_SLOT}! 🏆\n"
+                        f"You've completed all challenges in the CTF game!\n"
+                        f"Thank you for playing! 🎮"
+                    ),
+                    mask.nick,
                 )
-                self.log.info(f"Sending final congratulations to {mask.nick}")
-                self.bot.privmsg(mask.nick, final_msg)
+                self.log.debug("Sending final congratulations to %s", mask.nick)
+                self.outbound.send_lines(mask.nick, lines, lane="solve")
             except Exception as e:
-                self.log.error(f"Error sending final message to {mask.nick}: {str(e)}")
+                self.log.error("Error sending final message to %s: %s", mask.nick, e)
 
 
 def main():
     # Bot configuration
     config = {
-        "host": "irc.supernets.org",
-        "port": 6667,
+        "host": os.getenv("BOT_HOST", "irc.supernets.org"),
+        "port": int(os.getenv("BOT_PORT", "6667")),
         "nick": os.getenv("BOT_NICK", "CTFGameBot"),
         "username": os.getenv("BOT_USERNAME", "CTFGameBot"),
         "realname": os.getenv("BOT_REALNAME", "IRC CTF Game Bot"),
         "password": os.getenv("BOT_PASSWORD", "your_secure_password_here"),
         "email": os.getenv("BOT_EMAIL", "your_email@example.com"),
+        "progress_db": os.getenv("BOT_PROGRESS_DB", "progress.db"),
+        "flood_rate": float(os.getenv("BOT_FLOOD_RATE", "1")),
+        "flood_burst": int(os.getenv("BOT_FLOOD_BURST", "4")),
+        "admins": os.getenv("BOT_ADMINS", ""),
+        "metrics_port": os.getenv("BOT_METRICS_PORT", "9105"),
+        "instance_secret": os.getenv("BOT_INSTANCE_SECRET", ""),
+        "leak_actions": os.getenv("BOT_LEAK_ACTIONS", "redact,warn"),
+        "leak_min_length": int(os.getenv("BOT_LEAK_MIN_LENGTH", "8")),
+        "packs_dir": os.getenv("BOT_PACKS_DIR", "packs"),
+        "verifier_workers": int(os.getenv("BOT_VERIFIER_WORKERS", "2")),
+        "verifier_timeout": float(os.getenv("BOT_VERIFIER_TIMEOUT", "5")),
+        "session_idle": float(os.getenv("BOT_SESSION_IDLE", "3600")),
+        "session_max": int(os.getenv("BOT_SESSION_MAX", "50000")),
+        "record_path": os.getenv("BOT_RECORD", ""),
+        "sender_pool": int(os.getenv("BOT_SENDER_POOL", "0")),
+        "near_miss_distance": int(os.getenv("BOT_NEAR_MISS_DISTANCE", "2")),
+        "audit_dir": os.getenv("BOT_AUDIT_DIR", ""),
+        "audit_segment_mb": float(os.getenv("BOT_AUDIT_SEGMENT_MB", "64")),
+        "challenge_refresh_cron": os.getenv("BOT_CHALLENGE_REFRESH_CRON", "0 */6 * * *"),
         "includes": [
             "irc3.plugins.core",
             "irc3.plugins.command",
             "irc3.plugins.cron",
             __name__,
         ],
-        "autojoins": ["#CypherCon"],
-        "debug": True,
+        "debug": os.getenv("BOT_DEBUG", "").lower() in ("1", "true", "yes"),
+        "level": os.getenv("BOT_LOG_LEVEL", "INFO").upper(),
+        "log_sample": os.getenv("BOT_LOG_SAMPLE", "submission=100"),
     }
 
     # Create and run the bot
     bot = irc3.IrcBot(**config)
+    # Terminal and file writes happen on a logging thread, not on the event loop
+    atexit.register(setup_queue_logging("irc3", "irc3d", "raw"))
     bot.run(forever=True)
 
 
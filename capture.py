@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import time
+
+# Starts every recording session, the first line after it has a delta of 0
+HEADER = "#ctfcap 1"
+
+
+def open_capture(path, mode):
+    """Open a capture as text, gzip-compressed when the name ends in .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", errors="replace")
+    return open(path, mode, encoding="utf-8", errors="replace")
+
+
+class CaptureWriter:
+    """Appends raw inbound IRC lines to a capture, one ``<delta µs> <line>`` per line.
+
+    Deltas come from the monotonic clock. Lines are buffered and flushed in
+    batches, never more than ``flush_interval`` seconds late.
+    """
+
+    def __init__(self, path, flush_interval=1.0, clock=time.monotonic):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.file = open_capture(path, "a")
+        self.file.write(f"{HEADER} {time.strftime('%Y-%m-%dT%H:%M:%S%z')}\n")
+        self.last = None
+        self.lines = 0
+        self._flush_handle = None
+
+    def write(self, line):
+        now = self.clock()
+        delta = 0 if self.last is None else round((now - self.last) * 1e6)
+        self.last = now
+        self.file.write(f"{delta} {line}\n")
+        self.lines += 1
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Arm a delayed flush, or flush right away when no event loop is running."""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_capture(path):
+    """Yield (seconds since the previous line, line) from a capture without loading it."""
+    with open_capture(path, "r") as capture:
+        for record in capture:
+            if record.startswith("#"):
+                continue
+            delta, _, line = record.rstrip("\n").partition(" ")
+            yield int(delta) / 1e6, line
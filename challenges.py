@@ -1,10 +1,17 @@
 import base64
 import hashlib
+import hmac
+import logging
 import random
 import re
 import string
 import time
-from datetime import datetime
+import unicodedata
+from types import MappingProxyType
+
+from windows import build_window
+
+log = logging.getLogger(__name__)
 
 
 def generate_vigenere_key():
@@ -50,11 +57,57 @@ def create_steganography_text():
     return text
 
 
+def build_vigenere_challenge(plaintext="the quick brown fox jumps over the lazy dog", key=None):
+    """Build the Vigenère challenge, with a fresh random key unless one is given."""
+    vigenere_key = key or generate_vigenere_key()
+
+    return {
+        "challenge": (
+            "🔐 Cipher Challenge\n"
+            "🔍 Decrypt this message:\n"
+            f"{vigenere_encrypt(plaintext, vigenere_key)}\n"
+            f"💡 The key is: {vigenere_key}\n"
+        ),
+        "solution": plaintext,
+        "hint": "The key to understanding is in the pattern...",
+    }
+
+
+# Words for per-player Vigenère plaintexts, 64 of them so each seed byte picks one evenly
+VIGENERE_WORDS = (
+    "amber anchor arrow autumn badger beacon bramble breeze candle canyon cedar cipher "
+    "clover comet copper coral crystal dagger desert ember falcon feather forest garnet "
+    "glacier harbor hollow island ivory jasper lantern lemon meadow meteor mirror needle "
+    "nebula orchid oyster pebble pepper phantom pirate quartz raven riddle river saffron "
+    "shadow silver spiral summit thunder timber tunnel velvet violet walnut willow winter "
+    "wizard yeoman yonder zephyr"
+).split()
+
+
+def build_vigenere_instance(seed):
+    """Build one player's Vigenère challenge from their seed bytes."""
+    key = "".join(string.ascii_lowercase[byte % 26] for byte in seed[:8])
+    plaintext = " ".join(VIGENERE_WORDS[byte % len(VIGENERE_WORDS)] for byte in seed[8:13])
+    return build_vigenere_challenge(plaintext, key)
+
+
+def rotate_vigenere_challenge():
+    """The shared Vigenère entry with a new round, every player's variant is seeded from it."""
+    return dict(build_vigenere_challenge(), round=generate_vigenere_key())
+
+
+# Challenges with random elements, the only ones rebuilt on a regeneration
+DYNAMIC_CHALLENGES = {
+    "#challenge-5-vigenere": rotate_vigenere_challenge,
+}
+# Challenges every player gets their own variant of, built from a per-player seed
+PLAYER_CHALLENGES = {
+    "#challenge-5-vigenere": build_vigenere_instance,
+}
+
+
 def generate_challenges():
     """Generate dynamic challenges with random elements."""
-    # Generate a random Vigenère key
-    vigenere_key = generate_vigenere_key()
-
     return {
         "#challenge-1-welcome": {
             "challenge": (
@@ -97,17 +150,10 @@ def generate_challenges():
             ),
             "solution": "blaze",
             "hint": "The answer lies in the smoke...",
+            # 4:20 on either side of noon, server time
+            "window": "20 4,16 * * *",
         },
-        "#challenge-5-vigenere": {
-            "challenge": (
-                "🔐 Cipher Challenge\n"
-                "🔍 Decrypt this message:\n"
-                f"{vigenere_encrypt('the quick brown fox jumps over the lazy dog', vigenere_key)}\n"
-                "💡 The key is: {vigenere_key}\n"
-            ),
-            "solution": "the quick brown fox jumps over the lazy dog",
-            "hint": "The key to understanding is in the pattern...",
-        },
+        "#challenge-5-vigenere": build_vigenere_challenge(),
         "#challenge-6-stego": {
             "challenge": (
                 "🔍 Steganography Challenge\n"
@@ -134,55 +180,290 @@ def generate_challenges():
     }
 
 
+# Challenges without a "verifier" field compare the answer as a normalized string
+DEFAULT_VERIFIER = "exact"
+
+
+def verifier_name(details):
+    """The verifier a challenge declares."""
+    return details.get("verifier", DEFAULT_VERIFIER)
+
+
+# Anything but letters and digits, in any script
+NOT_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalize_solution(solution):
+    """Normalize a solution the same way for stored answers and submissions.
+
+    NFKC folds full-width and other compatibility characters into their
+    plain forms, runs of whitespace become one space.
+    """
+    return " ".join(unicodedata.normalize("NFKC", solution).lower().split())
+
+
+def canonical_solution(solution):
+    """The form exact answers are compared in: normalized, without spaces or punctuation."""
+    normalized = normalize_solution(solution)
+    compact = normalized.replace(" ", "")
+    if compact.isalnum():
+        return compact
+    # An answer made only of punctuation keeps it
+    return NOT_ALNUM.sub("", compact) or normalized
+
+
+def solution_digest(solution):
+    """Digest of a canonical solution, used as the solution index key."""
+    return hashlib.sha256(canonical_solution(solution).encode("utf-8")).digest()
+
+
+def build_solution_index(challenges):
+    """Map each normalized solution digest to the channel it solves."""
+    index = {}
+    for channel, details in challenges.items():
+        # Other verifiers store a pattern or a hash, not an answer
+        if verifier_name(details) != DEFAULT_VERIFIER:
+            continue
+        index.setdefault(solution_digest(details["solution"]), channel)
+    return index
+
+
+def build_prerequisites(challenges):
+    """Compile the prerequisite DAG into requires, unlocks and roots lookups.
+
+    A challenge without a "requires" entry follows the one before it, which
+    keeps the built-in challenges a straight line.
+    """
+    requires = {}
+    previous = None
+    for channel, details in challenges.items():
+        required = details.get("requires")
+        if required is None:
+            required = () if previous is None else (previous,)
+        requires[channel] = tuple(dict.fromkeys(required))
+        previous = channel
+    unlocks = {channel: [] for channel in challenges}
+    for channel, required in requires.items():
+        for prerequisite in required:
+            if prerequisite not in unlocks:
+                raise ValueError(f"{channel} requires unknown challenge {prerequisite}")
+            unlocks[prerequisite].append(channel)
+    # Kahn's algorithm, anything left over sits on a cycle
+    waiting = {channel: len(required) for channel, required in requires.items()}
+    ready = [channel for channel, count in waiting.items() if count == 0]
+    roots = tuple(ready)
+    visited = 0
+    while ready:
+        channel = ready.pop()
+        visited += 1
+        for following in unlocks[channel]:
+            waiting[following] -= 1
+            if waiting[following] == 0:
+                ready.append(following)
+    if visited != len(requires):
+        cycle = sorted(channel for channel, count in waiting.items() if count)
+        raise ValueError(f"Challenge prerequisites form a cycle: {', '.join(cycle)}")
+    return requires, {channel: tuple(after) for channel, after in unlocks.items()}, roots
+
+
+class ChallengeSnapshot:
+    """An immutable, versioned set of challenges with its solution index.
+
+    Lookups that start on a snapshot keep using it, a regeneration builds a new
+    snapshot and swaps it in with a single assignment.
+    """
+
+    __slots__ = (
+        "version",
+        "challenges",
+        "solution_index",
+        "canonical",
+        "channels",
+        "positions",
+        "requires",
+        "unlocks",
+        "roots",
+        "windows",
+    )
+
+    def __init__(self, challenges, version=0):
+        self.version = version
+        # Unchanged challenges are shared with the previous snapshot, they are read-only
+        frozen = {}
+        for channel, details in challenges.items():
+            if not isinstance(details, MappingProxyType):
+                details = MappingProxyType(dict(details))
+            frozen[channel] = details
+        self.challenges = MappingProxyType(frozen)
+        self.solution_index = MappingProxyType(build_solution_index(self.challenges))
+        # Canonical forms of the answers compared as strings
+        self.canonical = MappingProxyType(
+            {
+                channel: canonical_solution(details["solution"])
+                for channel, details in self.challenges.items()
+                if verifier_name(details) == DEFAULT_VERIFIER
+            }
+        )
+        self.channels = tuple(self.challenges)
+        self.positions = {channel: i for i, channel in enumerate(self.channels)}
+        self.requires, self.unlocks, self.roots = build_prerequisites(self.challenges)
+        self.windows = {}
+        for channel, details in self.challenges.items():
+            window = build_window(details)
+            if window is not None:
+                self.windows[channel] = window
+
+    def __contains__(self, channel):
+        return channel in self.challenges
+
+    def get_challenge(self, channel):
+        """Get challenge details for a channel."""
+        if channel in self.challenges:
+            details = self.challenges[channel]
+            return details["challenge"], details["solution"], details["hint"]
+        return None, None, None
+
+    def is_time_open(self, channel):
+        """Check whether a time-based challenge can be solved right now."""
+        window = self.windows.get(channel)
+        return window is None or window.is_open()
+
+    def verify_solution(self, channel, user_solution):
+        """Verify if a user's solution is correct."""
+        if channel in self.challenges:
+            # Other verifiers are checked by verifiers.VerifierEngine
+            if verifier_name(self.challenges[channel]) != DEFAULT_VERIFIER:
+                return False
+            if not self.is_time_open(channel):
+                log.debug("%s is outside its time window", channel)
+                return False
+
+            expected = self.canonical[channel]
+            actual = canonical_solution(user_solution)
+            # Never log the answers themselves
+            log.debug("Verifying solution for %s: match=%s", channel, expected == actual)
+            return expected == actual
+        return False
+
+    def matches_solution(self, channel, user_solution):
+        """Quietly check a solution for one channel with a constant-time digest comparison."""
+        if (
+            channel not in self.challenges
+            or verifier_name(self.challenges[channel]) != DEFAULT_VERIFIER
+        ):
+            return False
+        expected = solution_digest(self.challenges[channel]["solution"])
+        if not hmac.compare_digest(expected, solution_digest(user_solution)):
+            return False
+        return self.is_time_open(channel)
+
+    def find_solution_channel(self, user_solution):
+        """Find the channel a solution belongs to with a single index lookup."""
+        channel = self.solution_index.get(solution_digest(user_solution))
+        # The dict probe already matched, compare the stored digest in constant time anyway
+        if channel is None or not self.matches_solution(channel, user_solution):
+            return None
+        return channel
+
+    def get_next_channel(self, current_channel):
+        """Get the next challenge channel."""
+        unlocks = self.unlocks.get(current_channel)
+        return unlocks[0] if unlocks else None
+
+    def available(self, solved):
+        """Unsolved channels whose prerequisites are all in ``solved``, in challenge order."""
+        candidates = set(self.roots)
+        for channel in solved:
+            candidates.update(self.unlocks.get(channel, ()))
+        return sorted(
+            (
+                channel
+                for channel in candidates
+                if channel not in solved
+                and all(required in solved for required in self.requires[channel])
+            ),
+            key=self.positions.__getitem__,
+        )
+
+    def with_challenges(self, challenges):
+        """The next version with ``challenges`` added, replacing any with the same channel."""
+        merged = dict(self.challenges)
+        merged.update(challenges)
+        return ChallengeSnapshot(merged, self.version + 1)
+
+    def regenerate(self, builders=None):
+        """Build the next version, only the challenges with random elements are rebuilt.
+
+        A rebuilt challenge with a ``round`` remembers the round it replaced as
+        ``previous_round``, players who have not seen their new variant yet
+        may still answer the old one.
+        """
+        builders = DYNAMIC_CHALLENGES if builders is None else builders
+        challenges = dict(self.challenges)
+        for channel, build in builders.items():
+            challenges[channel] = build()
+            previous = self.challenges.get(channel, {}).get("round")
+            if previous and "round" in challenges[channel]:
+                challenges[channel]["previous_round"] = previous
+        return ChallengeSnapshot(challenges, self.version + 1)
+
+
 # Initialize challenges
-CHALLENGES = generate_challenges()
+SNAPSHOT = ChallengeSnapshot(generate_challenges())
+# Kept in step with SNAPSHOT for code that reads the module attributes directly
+CHALLENGES = SNAPSHOT.challenges
+SOLUTION_INDEX = SNAPSHOT.solution_index
+# Bumped on every refresh so caches derived from the challenges know to rebuild
+GENERATION = SNAPSHOT.version
+
+
+def current_snapshot():
+    """The challenge snapshot new lookups should use."""
+    return SNAPSHOT
 
 
 def get_challenge(channel):
     """Get challenge details for a channel."""
-    if channel in CHALLENGES:
-        challenge = CHALLENGES[channel]["challenge"]
-        solution = CHALLENGES[channel]["solution"]
-        hint = CHALLENGES[channel]["hint"]
-        return challenge, solution, hint
-    return None, None, None
+    return SNAPSHOT.get_challenge(channel)
 
 
 def verify_solution(channel, user_solution):
     """Verify if a user's solution is correct."""
-    if channel in CHALLENGES:
-        # Check time-based challenge
-        if CHALLENGES[channel].get("time_check", False):
-            current_time = datetime.now()
-            if current_time.hour != 4 or current_time.minute != 20:
-                print(
-                    f"Time check failed: Current time is {current_time.hour}:{current_time.minute}"
-                )
-                return False
+    return SNAPSHOT.verify_solution(channel, user_solution)
 
-        expected = CHALLENGES[channel]["solution"].lower()
-        actual = user_solution.lower().strip()
-        print(f"Verifying solution for {channel}:")
-        print(f"Expected: '{expected}'")
-        print(f"Actual: '{actual}'")
-        print(f"Match: {expected == actual}")
-        return expected == actual
-    return False
+
+def is_time_open(channel):
+    """Check whether a time-based challenge can be solved right now."""
+    return SNAPSHOT.is_time_open(channel)
+
+
+def matches_solution(channel, user_solution):
+    """Quietly check a solution for one channel with a constant-time digest comparison."""
+    return SNAPSHOT.matches_solution(channel, user_solution)
+
+
+def find_solution_channel(user_solution):
+    """Find the channel a solution belongs to with a single index lookup."""
+    return SNAPSHOT.find_solution_channel(user_solution)
 
 
 def get_next_channel(current_channel):
     """Get the next challenge channel."""
-    channels = list(CHALLENGES.keys())
-    try:
-        current_index = channels.index(current_channel)
-        if current_index < len(channels) - 1:
-            return channels[current_index + 1]
-    except ValueError:
-        pass
-    return None
+    return SNAPSHOT.get_next_channel(current_channel)
+
+
+def install_snapshot(snapshot):
+    """Make ``snapshot`` the current one."""
+    global SNAPSHOT, CHALLENGES, SOLUTION_INDEX, GENERATION
+    SNAPSHOT = snapshot
+    CHALLENGES, SOLUTION_INDEX, GENERATION = (
+        snapshot.challenges,
+        snapshot.solution_index,
+        snapshot.version,
+    )
+    return snapshot
 
 
 def refresh_challenges():
     """Refresh challenges with new random elements."""
-    global CHALLENGES
-    CHALLENGES = generate_challenges()
+    return install_snapshot(SNAPSHOT.regenerate())
@@ -0,0 +1,171 @@
+NICK_PREFIXES = "~&@%+"
+# Prefixes and modes of the nicks allowed to set the topic of a +t channel
+OPERATOR_PREFIXES = "~&@"
+OPERATOR_MODES = "qao"
+# What RFC 2811 servers use when ISUPPORT does not say
+DEFAULT_CHANMODES = "beI,k,l,imnpst"
+DEFAULT_PREFIX = "(ov)@+"
+
+
+def parameter_modes(server_config=None):
+    """(modes that always take a parameter, modes that take one only when set).
+
+    Read from the CHANMODES and PREFIX the server announced in ISUPPORT.
+    """
+    server_config = server_config or {}
+    kinds = str(server_config.get("CHANMODES", DEFAULT_CHANMODES)).split(",") + ["", ""]
+    prefix = str(server_config.get("PREFIX", DEFAULT_PREFIX))
+    nick_modes = prefix[1 : prefix.find(")")] if prefix.startswith("(") else ""
+    return kinds[0] + kinds[1] + nick_modes, kinds[2]
+
+
+class ChannelState:
+    __slots__ = ("name", "topic", "members", "modes", "synced", "opped")
+
+    def __init__(self, name):
+        self.name = name
+        self.topic = None  # None until the server told us
+        self.members = set()  # lowercase nicks
+        self.modes = set()  # flags without a parameter
+        self.synced = False  # True once the NAMES list after our JOIN ended
+        self.opped = False  # whether we are a channel operator
+
+
+class ChannelStateCache:
+    """Topics, members and modes of the channels the bot is in, fed by server events."""
+
+    def __init__(self):
+        self.channels = {}
+        self.nick = None  # our own nick, lowercase
+        self.avoided = {"topic": 0, "kick": 0}
+
+    def clear(self):
+        """Forget everything, the JOIN replies after a reconnect rebuild the cache."""
+        self.channels = {}
+
+    def get(self, channel):
+        return self.channels.get(channel.lower())
+
+    def joined(self, channel, nick, own):
+        """Handle a JOIN, our own JOIN starts a fresh channel state."""
+        if own:
+            self.nick = nick.lower()
+            self.channels[channel.lower()] = ChannelState(channel)
+        state = self.get(channel)
+        if state is not None:
+            state.members.add(nick.lower())
+
+    def parted(self, channel, nick, own):
+        """Handle a PART or a KICK."""
+        if own:
+            self.channels.pop(channel.lower(), None)
+            return
+        state = self.get(channel)
+        if state is not None:
+            state.members.discard(nick.lower())
+
+    def quit(self, nick):
+        """Handle a QUIT, the nick leaves every channel."""
+        nick = nick.lower()
+        for state in self.channels.values():
+            state.members.discard(nick)
+
+    def renamed(self, old, new):
+        """Handle a NICK change."""
+        old, new = old.lower(), new.lower()
+        for state in self.channels.values():
+            if old in state.members:
+                state.members.discard(old)
+                state.members.add(new)
+
+    def names(self, channel, data):
+        """Handle one RPL_NAMREPLY line."""
+        state = self.get(channel)
+        if state is None:
+            return
+        for entry in data.split():
+            nick = entry.lstrip(NICK_PREFIXES).lower()
+            state.members.add(nick)
+            if nick == self.nick:
+                state.opped = any(char in OPERATOR_PREFIXES for char in entry[: -len(nick)])
+
+    def end_of_names(self, channel):
+        """Handle RPL_ENDOFNAMES, the topic (if any) was sent before the names."""
+        state = self.get(channel)
+        if state is not None:
+            state.synced = True
+            if state.topic is None:
+                state.topic = ""
+
+    def topic_changed(self, channel, topic):
+        """Handle RPL_TOPIC or TOPIC."""
+        state = self.get(channel)
+        if state is not None:
+            state.topic = topic
+
+    def mode_changed(self, channel, modes, params="", kinds=None):
+        """Handle a channel MODE change.
+
+        Flags without a parameter are tracked. Modes with one (bans, keys,
+        limits, nick statuses) only count when they give or take our own
+        operator status. ``kinds`` comes from ``parameter_modes``.
+        """
+        state = self.get(channel)
+        if state is None:
+            return
+        always, when_set = kinds or parameter_modes()
+        params = params.split()
+        adding = True
+        for char in modes:
+            if char in "+-":
+                adding = char == "+"
+            elif char in always or (adding and char in when_set):
+                param = params.pop(0) if params else ""
+                if char in OPERATOR_MODES and param.lower() == self.nick:
+                    state.opped = adding
+            elif adding:
+                state.modes.add(char)
+            else:
+                state.modes.discard(char)
+
+    def modes_listed(self, channel, modes, params="", kinds=None):
+        """Handle RPL_CHANNELMODEIS, the full set of a channel's modes."""
+        state = self.get(channel)
+        if state is not None:
+            state.modes = set()
+            self.mode_changed(channel, modes, params, kinds)
+
+    def needs_topic(self, channel, topic):
+        """Check whether TOPIC has to be sent to get ``topic`` set in a channel.
+
+        It is not needed when the topic is already set, nor when the channel
+        is +t and we are not an operator: the server would refuse it.
+        """
+        state = self.get(channel)
+        if state is None:
+            return True
+        if state.topic == topic or ("t" in state.modes and state.synced and not state.opped):
+            self.avoided["topic"] += 1
+            return False
+        return True
+
+    def is_member(self, channel, nick):
+        """Check whether a nick is in a channel we are in."""
+        state = self.get(channel)
+        return state is not None and nick.lower() in state.members
+
+    def needs_kick(self, channel, nick):
+        """Check whether KICK would do anything, counting the ones avoided."""
+        if self.is_member(channel, nick):
+            return True
+        self.avoided["kick"] += 1
+        return False
+
+    def stats(self):
+        """Tracked channels and members, and the server commands avoided."""
+        return {
+            "channels": len(self.channels),
+            "members": sum(len(state.members) for state in self.channels.values()),
+            "avoided_topic": self.avoided["topic"],
+            "avoided_kick": self.avoided["kick"],
+        }
@@ -0,0 +1,55 @@
+SERVICES = frozenset(("nickserv", "chanserv"))
+
+
+class Router:
+    """Routes each message to exactly one handler through a single dict lookup.
+
+    Routes are keyed by (target kind, channel, sender class). Target kind is
+    ``"query"`` for messages sent to the bot and ``"channel"`` otherwise, the
+    channel is ``None`` for queries and the sender class is one of ``"self"``,
+    ``"services"`` or ``"user"``. Messages without a route are dropped.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.routes = {}
+        self.counters = {}
+        self.dropped = 0
+
+    def add(self, kind, channel, sender, name, handler, prefix=""):
+        """Register the handler for one route, optionally only for data starting with prefix."""
+        self.routes[(kind, channel, sender)] = (name, handler, prefix)
+        self.counters.setdefault(name, 0)
+
+    def clear(self):
+        """Remove every route, counters are kept."""
+        self.routes = {}
+
+    @staticmethod
+    def sender_class(nick, own_nick):
+        """Classify the sender of a message."""
+        if nick == own_nick:
+            return "self"
+        if nick.lower() in SERVICES:
+            return "services"
+        return "user"
+
+    def dispatch(self, mask, event, target, data, **kwargs):
+        """Call the handler routed for this message, returns its route name or None."""
+        nick = self.bot.nick
+        if target == nick:
+            key = ("query", None, self.sender_class(mask.nick, nick))
+        else:
+            key = ("channel", target, self.sender_class(mask.nick, nick))
+        route = self.routes.get(key)
+        if route is None or not data.startswith(route[2]):
+            self.dropped += 1
+            return None
+        name, handler, _ = route
+        self.counters[name] += 1
+        handler(mask, event, target, data, **kwargs)
+        return name
+
+    def stats(self):
+        """Messages routed per route, and dropped messages."""
+        return dict(self.counters, dropped=self.dropped)
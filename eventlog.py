@@ -0,0 +1,103 @@
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def parse_sample_rates(value):
+    """Parse "event=N,..." into {event: N}, logging one in N of those events."""
+    if isinstance(value, dict):
+        return {event: int(every) for event, every in value.items()}
+    rates = {}
+    for entry in str(value or "").split(","):
+        event, _, every = entry.partition("=")
+        if event.strip() and every.strip().isdigit():
+            rates[event.strip()] = int(every)
+    return rates
+
+
+class Fields:
+    """Key/value pairs rendered as ``key=value`` only when a handler formats the record."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        parts = []
+        for key, value in self.fields.items():
+            value = str(value)
+            if not value or any(char in value for char in ' ="\n'):
+                value = json.dumps(value, ensure_ascii=False)
+            parts.append(f"{key}={value}")
+        return " ".join(parts)
+
+
+class EventLogger:
+    """Wraps a logger with level-gated structured events and per-event sampling.
+
+    Plain messages keep the logging %-style so arguments are only formatted
+    when a handler wants the record.
+    """
+
+    def __init__(self, logger, sample_rates=None):
+        self.logger = logger
+        self.sample_rates = parse_sample_rates(sample_rates)
+        self.seen = {}
+
+    def debug(self, msg, *args, **kwargs):
+        self.logger.debug(msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.logger.info(msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self.logger.warning(msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self.logger.error(msg, *args, **kwargs)
+
+    def isEnabledFor(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def event(self, event, level=logging.INFO, **fields):
+        """Log a structured event, sampled events only log one in N occurrences."""
+        if not self.logger.isEnabledFor(level):
+            return
+        every = self.sample_rates.get(event)
+        if every:
+            seen = self.seen[event] = self.seen.get(event, 0) + 1
+            if (seen - 1) % every:
+                return
+            fields["sampled"] = every
+        self.logger.log(level, "%s %s", event, Fields(fields), extra={"event": event})
+
+
+def setup_queue_logging(*names):
+    """Move the handlers of each named logger behind its own queue served by a thread.
+
+    The event loop then only puts records on a queue, the terminal or file
+    writes happen on the listener threads. Each logger keeps its own
+    handlers, records only reach the handlers they reached before. Returns a
+    function that stops every listener, flushing the records still queued.
+    """
+    listeners = []
+    for name in names:
+        logger = logging.getLogger(name)
+        handlers = list(logger.handlers)
+        if not handlers:
+            continue
+        records = queue.SimpleQueue()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(QueueHandler(records))
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        listeners.append(listener)
+
+    def stop():
+        for listener in listeners:
+            listener.stop()
+
+    return stop
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+def format_names(nicks, max_names=5):
+    """Format nicks as "alice, bob and 3 others"."""
+    if len(nicks) <= max_names:
+        if len(nicks) == 1:
+            return nicks[0]
+        return f"{', '.join(nicks[:-1])} and {nicks[-1]}"
+    others = len(nicks) - max_names
+    return f"{', '.join(nicks[:max_names])} and {others} other{'s' if others > 1 else ''}"
+
+
+class JoinAggregator:
+    """Collects joins per channel over a short window and greets them in one batch."""
+
+    def __init__(
+        self,
+        flush,
+        window=2.0,
+        cooldown=600.0,
+        max_pending=500,
+        max_recent=10000,
+        clock=time.monotonic,
+    ):
+        self.flush = flush  # called as flush(channel, nicks) once per window
+        self.window = window
+        self.cooldown = cooldown
+        self.max_pending = max_pending
+        self.max_recent = max_recent
+        self.clock = clock
+        self.pending = {}  # channel -> nicks joined during the current window
+        self.recent = OrderedDict()  # (channel, nick) -> last greeted
+        self._handles = {}
+        self.joins = 0
+        self.batches = 0
+        self.greeted = 0
+        self.suppressed = 0
+
+    def recently_greeted(self, channel, nick):
+        """Check whether a nick was greeted in a channel within the cooldown."""
+        key = (channel, nick.lower())
+        greeted_at = self.recent.get(key)
+        if greeted_at is None:
+            return False
+        if self.clock() - greeted_at > self.cooldown:
+            del self.recent[key]
+            return False
+        return True
+
+    def add(self, channel, nick):
+        """Queue a join for the channel's next greeting, returns False if suppressed."""
+        self.joins += 1
+        nicks = self.pending.setdefault(channel, [])
+        if self.recently_greeted(channel, nick) or nick in nicks or len(nicks) >= self.max_pending:
+            self.suppressed += 1
+            return False
+        nicks.append(nick)
+        if channel not in self._handles:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop: greet right away
+                self._flush_channel(channel)
+                return True
+            self._handles[channel] = loop.call_later(self.window, self._flush_channel, channel)
+        return True
+
+    def _flush_channel(self, channel):
+        self._handles.pop(channel, None)
+        nicks = self.pending.pop(channel, [])
+        if not nicks:
+            return
+        now = self.clock()
+        for nick in nicks:
+            key = (channel, nick.lower())
+            self.recent[key] = now
+            self.recent.move_to_end(key)
+        while len(self.recent) > self.max_recent:
+            self.recent.popitem(last=False)
+        self.batches += 1
+        self.greeted += len(nicks)
+        self.flush(channel, nicks)
+
+    def stats(self):
+        """Join, batch and suppression counters."""
+        return {
+            "joins": self.joins,
+            "batches": self.batches,
+            "greeted": self.greeted,
+            "suppressed": self.suppressed,
+            # Compared to a channel and a private welcome for every join
+            "messages_saved": 2 * self.joins - self.batches - self.greeted,
+            "pending": sum(len(nicks) for nicks in self.pending.values()),
+        }
@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+from collections import OrderedDict
+
+from challenges import PLAYER_CHALLENGES, canonical_solution, solution_digest
+from progress import player_key
+
+
+class Instance:
+    """One player's variant of a challenge, rendered once."""
+
+    __slots__ = ("challenge", "solution", "hint", "digest", "canonical")
+
+    def __init__(self, details):
+        self.challenge = details["challenge"]
+        self.solution = details["solution"]
+        self.hint = details["hint"]
+        self.digest = solution_digest(details["solution"])
+        self.canonical = canonical_solution(details["solution"])
+
+
+class PlayerInstances:
+    """Per-player challenge variants derived from an HMAC of a server secret.
+
+    Nothing is stored per player: a variant is rebuilt from the same seed
+    whenever it falls out of the bounded LRU cache. A regeneration gives the
+    challenge a new ``round``, which is part of the seed, so every player gets
+    a new variant. Until a player is sent their new variant, the answer to the
+    one from the previous round is accepted too.
+    """
+
+    def __init__(self, secret, max_size=1024):
+        self.secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.max_size = max_size
+        self.cache = OrderedDict()  # (player, channel) -> Instance
+        self.fetched = OrderedDict()  # (player, channel) -> round of the variant last sent
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def seed(self, channel, player, round=""):
+        """Deterministic seed bytes for a player's variant of a channel in a round."""
+        message = f"{channel}\n{player_key(player)}"
+        if round:
+            message += f"\n{round}"
+        return hmac.new(self.secret, message.encode("utf-8"), hashlib.sha256).digest()
+
+    def get(self, snapshot, channel, player):
+        """A player's variant of a channel, None when the challenge is the same for everyone."""
+        build = PLAYER_CHALLENGES.get(channel)
+        if build is None or channel not in snapshot:
+            return None
+        if self.version != snapshot.version:
+            self.cache.clear()
+            self.version = snapshot.version
+        key = (player_key(player), channel)
+        instance = self.cache.get(key)
+        if instance is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return instance
+        self.misses += 1
+        seed = self.seed(channel, player, snapshot.challenges[channel].get("round", ""))
+        instance = self.cache[key] = Instance(build(seed))
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return instance
+
+    def fetch(self, snapshot, channel, player):
+        """A player's variant that is about to be sent to them, ending the previous round."""
+        instance = self.get(snapshot, channel, player)
+        if instance is not None:
+            key = (player_key(player), channel)
+            self.fetched[key] = snapshot.challenges[channel].get("round", "")
+            self.fetched.move_to_end(key)
+            if len(self.fetched) > self.max_size:
+                self.fetched.popitem(last=False)
+        return instance
+
+    def challenge_text(self, snapshot, channel, player):
+        """The challenge text a player should see."""
+        instance = self.fetch(snapshot, channel, player)
+        if instance is None:
+            return snapshot.get_challenge(channel)[0]
+        return instance.challenge
+
+    def previous(self, snapshot, channel, player):
+        """The variant of the previous round while the player has not been sent the new one."""
+        details = snapshot.challenges[channel]
+        round = details.get("previous_round")
+        if not round or self.fetched.get((player_key(player), channel)) == details.get("round"):
+            return None
+        return Instance(PLAYER_CHALLENGES[channel](self.seed(channel, player, round)))
+
+    def matches(self, snapshot, channel, player, user_solution):
+        """Check a player's solution against their own variant of a channel."""
+        instance = self.get(snapshot, channel, player)
+        if instance is None:
+            return snapshot.matches_solution(channel, user_solution)
+        digest = solution_digest(user_solution)
+        if not hmac.compare_digest(instance.digest, digest):
+            previous = self.previous(snapshot, channel, player)
+            if previous is None or not hmac.compare_digest(previous.digest, digest):
+                return False
+        return snapshot.is_time_open(channel)
+
+    def forget(self, player):
+        """Drop a player's cached variants, they are rebuilt if the player comes back."""
+        key = player_key(player)
+        for channel in PLAYER_CHALLENGES:
+            self.cache.pop((key, channel), None)
+
+    def stats(self):
+        return {"size": len(self.cache), "hits": self.hits, "misses": self.misses}
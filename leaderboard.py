@@ -0,0 +1,153 @@
+from progress import player_key
+
+
+class FenwickTree:
+    """Binary indexed tree over counts with prefix sums and, over 0/1 flags, k-th lookups."""
+
+    __slots__ = ("size", "tree")
+
+    def __init__(self, size=16):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+
+    def add(self, index, delta):
+        index += 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        """Sum of the flags before ``index``."""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, k):
+        """Index of the ``k``-th (0-based) set flag."""
+        position = 0
+        step = self.size
+        while step:
+            if position + step <= self.size and self.tree[position + step] <= k:
+                position += step
+                k -= self.tree[position]
+            step //= 2
+        return position
+
+    def grow(self, counts):
+        """Double the capacity, rebuilt from the current ``counts``."""
+        self.__init__(self.size * 2)
+        for index, count in enumerate(counts):
+            if count:
+                self.add(index, int(count))
+
+
+class Bucket:
+    """Players with the same number of solves, in the order they reached it."""
+
+    __slots__ = ("tree", "players", "live")
+
+    def __init__(self):
+        self.tree = FenwickTree()
+        self.players = []  # slot -> player, None once they moved on
+        self.live = 0
+
+    def insert(self, player):
+        slot = len(self.players)
+        self.players.append(player)
+        if slot >= self.tree.size:
+            self.tree.grow([player is not None for player in self.players])
+        else:
+            self.tree.add(slot, 1)
+        self.live += 1
+        return slot
+
+    def remove(self, slot):
+        self.players[slot] = None
+        self.tree.add(slot, -1)
+        self.live -= 1
+
+
+class Leaderboard:
+    """Players ranked by challenges solved, earlier solves first on ties.
+
+    Each solve count has its own bucket and players enter a bucket in solve
+    order, so a solve is a removal and an insert in O(log n) and a rank is
+    a prefix count in O(log n). Another tree counts the players per solve
+    count for the players ranked ahead.
+    """
+
+    def __init__(self):
+        self.entries = {}  # player -> (solved, slot)
+        self.buckets = [Bucket()]
+        self.counts = FenwickTree()  # solved -> number of players
+        self.names = {}  # player -> nick as last seen
+        self.cache = {}  # n -> rendered top-n text
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, solved):
+        """Rebuild from ``ProgressStore.solved``, ordered by each player's last solve."""
+        self.__init__()
+        players = sorted(
+            (max(channels.values()), player) for player, channels in solved.items() if channels
+        )
+        for _, player in players:
+            self.record(player, len(solved[player]))
+
+    def _bucket(self, solved):
+        while len(self.buckets) <= solved:
+            self.buckets.append(Bucket())
+        return self.buckets[solved]
+
+    def record(self, player, solved, name=None):
+        """Move a player to ``solved`` challenges, returns their new rank."""
+        key = player_key(player)
+        self.names[key] = name or self.names.get(key, player)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] == solved:
+                return self.rank(key)[0]
+            self.buckets[entry[0]].remove(entry[1])
+            self.counts.add(entry[0], -1)
+        bucket = self._bucket(solved)
+        while solved >= self.counts.size:
+            self.counts.grow([other.live for other in self.buckets])
+        self.counts.add(solved, 1)
+        self.entries[key] = (solved, bucket.insert(key))
+        rank = self.rank(key)[0]
+        # Only cached lists that now include this player changed
+        self.cache = {n: text for n, text in self.cache.items() if n < rank}
+        return rank
+
+    def rank(self, player):
+        """(rank, solved) of a player, or None if they have not solved anything."""
+        entry = self.entries.get(player_key(player))
+        if entry is None:
+            return None
+        solved, slot = entry
+        ahead = len(self.entries) - self.counts.prefix(solved + 1)
+        return ahead + self.buckets[solved].tree.prefix(slot) + 1, solved
+
+    def top(self, n):
+        """The first ``n`` (nick, solved) pairs."""
+        result = []
+        for solved in range(len(self.buckets) - 1, 0, -1):
+            bucket = self.buckets[solved]
+            for k in range(min(bucket.live, n - len(result))):
+                player = bucket.players[bucket.tree.find(k)]
+                result.append((self.names[player], solved))
+            if len(result) >= n:
+                break
+        return result
+
+    def top_text(self, n, render):
+        """``render(top(n))``, cached until a solve changes the first ``n`` places."""
+        text = self.cache.get(n)
+        if text is None:
+            text = self.cache[n] = render(self.top(n))
+        return text
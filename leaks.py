@@ -0,0 +1,118 @@
+from collections import deque
+from itertools import accumulate
+
+from challenges import NOT_ALNUM, PLAYER_CHALLENGES, normalize_solution
+from progress import player_key
+
+LEAK_ACTIONS = ("redact", "warn", "kick", "burn")
+# Capabilities a server must acknowledge before messages can be redacted
+REDACT_CAPS = ("message-tags", "draft/message-redaction")
+# Shorter answers are common words, "fire" or "paris" in chat is rarely a leak
+MIN_LENGTH = 8
+
+
+class AhoCorasick:
+    """Finds every occurrence of many patterns in one pass over the text."""
+
+    __slots__ = ("goto", "fail", "out", "patterns")
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.out = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                following = self.goto[state].get(char)
+                if following is None:
+                    following = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.out.append([])
+                state = following
+            self.out[state].append(index)
+        # Breadth-first, so every failure link points at an already finished state
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[following] = target if target != following else 0
+                self.out[following] = self.out[following] + self.out[self.fail[following]]
+
+    def finditer(self, text):
+        """Yield (start, end, pattern index) for every match."""
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield position + 1 - len(patterns[index]), position + 1, index
+
+
+class LeakDetector:
+    """Spots current solutions posted in public, recompiled whenever the challenges change.
+
+    Messages are compared in the canonical form of answers, so spacing or
+    punctuating an answer out ("b l a z e") does not hide it. Answers shorter
+    than ``min_length`` canonical characters are not looked for.
+    """
+
+    def __init__(self, min_length=MIN_LENGTH):
+        self.min_length = min_length
+        self.version = None
+        self.matcher = None
+        self.channels = []  # pattern index -> channels it solves
+        self.burned = set()  # (player, channel) pairs whose answer the player leaked
+        self.scanned = 0
+        self.leaks = 0
+
+    def compile(self, snapshot):
+        """Build the matcher from every solution shared by all players."""
+        solutions = {}
+        # Only exact answers have a canonical form, the others cannot be spotted in text
+        for channel, solution in snapshot.canonical.items():
+            if channel in PLAYER_CHALLENGES or len(solution) < self.min_length:
+                continue
+            # Answers of only punctuation keep it, they never match the joined words of a message
+            if not NOT_ALNUM.search(solution):
+                solutions.setdefault(solution, []).append(channel)
+        self.matcher = AhoCorasick(solutions)
+        self.channels = list(solutions.values())
+        self.version = snapshot.version
+
+    def scan(self, snapshot, text):
+        """Channels whose answer appears as whole words in ``text``."""
+        if self.version != snapshot.version:
+            self.compile(snapshot)
+        self.scanned += 1
+        # The words of the message run together, remembering where each one starts
+        words = [word for word in NOT_ALNUM.split(normalize_solution(text)) if word]
+        text = "".join(words)
+        bounds = {0, *accumulate(map(len, words))}
+        leaked = []
+        for start, end, index in self.matcher.finditer(text):
+            # "hiddenmessage" in "hiddenmessages" is not a leak
+            if start not in bounds or end not in bounds:
+                continue
+            for channel in self.channels[index]:
+                if channel not in leaked:
+                    leaked.append(channel)
+        if leaked:
+            self.leaks += 1
+        return leaked
+
+    def burn(self, player, channel):
+        self.burned.add((player_key(player), channel))
+
+    def is_burned(self, player, channel):
+        return (player_key(player), channel) in self.burned
+
+    def stats(self):
+        return {"scanned": self.scanned, "leaks": self.leaks, "burned": len(self.burned)}
@@ -0,0 +1,177 @@
+from challenges import PLAYER_CHALLENGES, canonical_solution
+
+EXACT = "exact"
+NEAR = "near"
+WRONG = "wrong"
+
+# Canonical solutions outside these lengths only match exactly
+MIN_LENGTH = 5
+MAX_LENGTH = 64
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance of two strings, ``limit + 1`` as soon as it must be above ``limit``."""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+    # Only cells within ``limit`` of the diagonal can stay within it, the rest count as over
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        previous, lowest = _band_row(previous, i, char, b, limit)
+        # Every later row is at least this row's minimum
+        if lowest > limit:
+            return over
+    return previous[len(b)]
+
+
+def _band_row(previous, i, char, b, limit):
+    """Row ``i`` of the distance table from row ``i - 1``, with its lowest cell."""
+    over = limit + 1
+    width = len(b)
+    current = [over] * (width + 1)
+    if i <= limit:
+        current[0] = i
+    lowest = current[0]
+    for j in range(max(1, i - limit), min(width, i + limit) + 1):
+        cost = previous[j - 1] + (char != b[j - 1])
+        if previous[j] + 1 < cost:
+            cost = previous[j] + 1
+        if current[j - 1] + 1 < cost:
+            cost = current[j - 1] + 1
+        if cost > over:
+            cost = over
+        current[j] = cost
+        if cost < lowest:
+            lowest = cost
+    return current, lowest
+
+
+def deletions(word, depth):
+    """Every string left after deleting up to ``depth`` characters of ``word``, itself included."""
+    found = {word}
+    # Deleting left to right only, each set of positions is deleted once
+    layer = [(word, 0)]
+    for _ in range(depth):
+        layer = [
+            (part[:i] + part[i + 1 :], i) for part, start in layer for i in range(start, len(part))
+        ]
+        found.update(part for part, _ in layer)
+    return found
+
+
+class DeletionIndex:
+    """Strings indexed by their deletion neighbourhood, each with the edits it tolerates.
+
+    Two strings at most k edits apart share a string left after deleting at
+    most k characters from each, so a lookup is a fixed number of dict probes
+    followed by a distance check of the few words they find, whatever the
+    number of words.
+    """
+
+    __slots__ = ("words", "variants", "depth", "longest")
+
+    def __init__(self):
+        self.words = {}  # word -> (edits tolerated, values)
+        self.variants = {}  # string left after deletions -> words it comes from
+        self.depth = 0
+        self.longest = 0
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word, value, limit):
+        """Add ``value`` under ``word``, found by lookups at most ``limit`` edits away."""
+        entry = self.words.get(word)
+        if entry is not None:
+            entry[1].append(value)
+            return
+        self.words[word] = (limit, [value])
+        if limit:
+            self.depth = max(self.depth, limit)
+            self.longest = max(self.longest, len(word))
+        for variant in deletions(word, limit):
+            self.variants.setdefault(variant, []).append(word)
+
+    def search(self, word):
+        """(distance, word, values) for every word within the edits it tolerates of ``word``."""
+        # Nothing that tolerates edits is this close in length, only the word itself can match
+        depth = self.depth if len(word) <= self.longest + self.depth else 0
+        found = []
+        seen = set()
+        for variant in deletions(word, depth):
+            for candidate in self.variants.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                limit, values = self.words[candidate]
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    found.append((distance, candidate, values))
+        return found
+
+
+class NearMisses:
+    """Classifies answers as exact, near misses or wrong, recompiled whenever the challenges change.
+
+    Shared solutions are kept in a deletion index of their canonical forms,
+    so a lookup costs the same with 10 or 1,000 challenges. How far off an
+    answer may be grows with the solution's length.
+    """
+
+    def __init__(self, max_distance=2):
+        self.max_distance = max_distance
+        self.version = None
+        self.index = DeletionIndex()
+        self.checked = 0
+        self.near = 0
+
+    def compile(self, snapshot):
+        """Build the index from every solution shared by all players."""
+        index = DeletionIndex()
+        for channel, solution in snapshot.canonical.items():
+            if channel not in PLAYER_CHALLENGES and solution:
+                index.add(solution, channel, self.allowed(solution))
+        self.index = index
+        self.version = snapshot.version
+
+    def allowed(self, solution):
+        """Edits an answer may be off from a canonical solution of this length, still close."""
+        # Short answers are too easy to guess from a hint, long ones too costly to index
+        if not MIN_LENGTH <= len(solution) <= MAX_LENGTH:
+            return 0
+        return min(self.max_distance, 1 if len(solution) < 12 else 2)
+
+    def classify(self, snapshot, answer, channels, personal=()):
+        """(EXACT, NEAR or WRONG, channel) of an answer for the closest of ``channels``.
+
+        ``personal`` holds (channel, canonical solution) pairs of the player's
+        own variants, they are compared one by one.
+        """
+        if self.version != snapshot.version:
+            self.compile(snapshot)
+        self.checked += 1
+        answer = canonical_solution(answer)
+        channels = set(channels)
+        best = None
+        for distance, _, matched in self.index.search(answer):
+            for channel in matched:
+                if channel in channels and (best is None or distance < best[0]):
+                    best = (distance, channel)
+        for channel, solution in personal:
+            limit = self.allowed(solution)
+            distance = edit_distance(answer, solution, limit)
+            if distance <= limit and (best is None or distance < best[0]):
+                best = (distance, channel)
+        if best is None:
+            return WRONG, None
+        if best[0]:
+            self.near += 1
+            return NEAR, best[1]
+        return EXACT, best[1]
+
+    def stats(self):
+        return {"checked": self.checked, "near": self.near, "solutions": len(self.index)}
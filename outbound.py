@@ -0,0 +1,215 @@
+import asyncio
+import time
+from collections import deque
+
+from render import split_utf8
+
+# Lanes in priority order, the scheduler always drains the first non-empty lane
+LANES = ("control", "solve", "reply", "welcome", "chatter")
+
+
+class TokenBucket:
+    """Token bucket pacing the lines sent on one connection."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, tokens=1):
+        """Seconds to wait until ``tokens`` are available."""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def consume(self, tokens=1):
+        """Take ``tokens`` from the bucket."""
+        self._refill()
+        self.tokens -= tokens
+
+
+class _Item:
+    __slots__ = ("target", "lines", "queued_at", "started")
+
+    def __init__(self, target, lines, queued_at):
+        self.target = target
+        self.lines = deque(lines)
+        self.queued_at = queued_at
+        self.started = False
+
+
+class _Lane:
+    __slots__ = ("items", "pending", "depth", "sent", "dropped", "coalesced", "waits", "max_wait")
+
+    def __init__(self):
+        self.items = deque()
+        self.pending = {}  # target -> queued item that has not started sending yet
+        self.depth = 0  # queued lines
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.waits = 0.0
+        self.max_wait = 0.0
+
+
+class OutboundScheduler:
+    """Paces outbound traffic through a token bucket and priority lanes.
+
+    Messages are queued per target and written as PRIVMSGs. Other commands,
+    such as JOIN, KICK or TOPIC, are queued as raw lines with ``send_command``
+    and share the same bucket, on the control lane ahead of every message.
+    """
+
+    def __init__(self, bot, rate=1.0, burst=4, max_queue=500, clock=time.monotonic):
+        self.bot = bot
+        self.clock = clock
+        self.bucket = TokenBucket(rate, burst, clock=clock)
+        self.max_queue = max_queue
+        self.lanes = {name: _Lane() for name in LANES}
+        self.targets = {}  # target -> queued lines, in any lane
+        self._task = None
+
+    def send(self, target, message, lane="reply"):
+        """Queue a (possibly multi-line) message, returns False if it was dropped."""
+        lines = [
+            chunk for line in message.split("\n") if line.strip() for chunk in split_utf8(line)
+        ]
+        return self.send_lines(target, lines, lane)
+
+    def send_command(self, line, lane="control"):
+        """Queue a raw IRC command, returns False if it was dropped."""
+        # Raw lines have no target, they queue together in the order they were sent
+        return self.send_lines(None, [line], lane)
+
+    def send_lines(self, target, lines, lane="reply"):
+        """Queue lines that already fit in a PRIVMSG, returns False if they were dropped."""
+        if not lines:
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (tests, shutdown): write straight through
+            for line in lines:
+                self._write(target, line)
+            self.lanes[lane].sent += len(lines)
+            return True
+
+        queue = self.lanes[lane]
+        if queue.depth + len(lines) > self.max_queue:
+            queue.dropped += len(lines)
+            return False
+        self._queue(queue, target, lines)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return True
+
+    def _queue(self, queue, target, lines):
+        item = queue.pending.get(target)
+        if item is not None:
+            # Coalesce with the message already waiting for this target, a line sent twice
+            # on purpose is still sent twice
+            item.lines.extend(lines)
+            queue.coalesced += 1
+        else:
+            item = _Item(target, lines, self.clock())
+            queue.items.append(item)
+            queue.pending[target] = item
+        queue.depth += len(lines)
+        self.targets[target] = self.targets.get(target, 0) + len(lines)
+
+    def _write(self, target, line):
+        # Lines are already split, skip irc3's own splitting and flood queue
+        if target is None:
+            self.bot.send_line(line, nowait=True)
+        else:
+            self.bot.send_line(f"PRIVMSG {target} :{line}", nowait=True)
+
+    def _next_lane(self):
+        for name in LANES:
+            if self.lanes[name].items:
+                return self.lanes[name]
+        return None
+
+    async def _run(self):
+        while True:
+            queue = self._next_lane()
+            if queue is None:
+                return
+            delay = self.bucket.delay()
+            if delay:
+                await asyncio.sleep(delay)
+                # A higher priority message may have arrived while waiting
+                continue
+            item = queue.items[0]
+            if not item.started:
+                item.started = True
+                queue.pending.pop(item.target, None)
+            line = item.lines.popleft()
+            if not item.lines:
+                queue.items.popleft()
+            queue.depth -= 1
+            self._sent_one(item.target)
+            self.bucket.consume()
+            try:
+                self._write(item.target, line)
+            except Exception as e:
+                self.bot.log.error("Error sending to %s: %s", item.target, e)
+            wait = self.clock() - item.queued_at
+            queue.sent += 1
+            queue.waits += wait
+            queue.max_wait = max(queue.max_wait, wait)
+
+    def _sent_one(self, target):
+        left = self.targets[target] - 1
+        if left:
+            self.targets[target] = left
+        else:
+            del self.targets[target]
+
+    async def flush(self):
+        """Wait until every queued line has been written."""
+        while self._task is not None and not self._task.done():
+            await self._task
+
+    def queued(self, target):
+        """Lines still waiting to be written to ``target``."""
+        return self.targets.get(target, 0)
+
+    def drain(self):
+        """Take every queued line out, as (lane, target, lines) in the order they would be sent."""
+        drained = []
+        for name, queue in self.lanes.items():
+            drained.extend((name, item.target, list(item.lines)) for item in queue.items)
+            queue.items.clear()
+            queue.pending.clear()
+            queue.depth = 0
+        self.targets.clear()
+        return drained
+
+    def depth(self, lane=None):
+        """Number of queued lines in one lane, or in all lanes."""
+        if lane is not None:
+            return self.lanes[lane].depth
+        return sum(queue.depth for queue in self.lanes.values())
+
+    def stats(self):
+        """Queue depth, drops and time-to-wire per lane."""
+        return {
+            name: {
+                "depth": queue.depth,
+                "sent": queue.sent,
+                "dropped": queue.dropped,
+                "coalesced": queue.coalesced,
+                "avg_wait": queue.waits / queue.sent if queue.sent else 0.0,
+                "max_wait": queue.max_wait,
+            }
+            for name, queue in self.lanes.items()
+        }
@@ -0,0 +1,153 @@
+import json
+import os
+import time
+
+from verifiers import prepare
+from windows import build_window
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Field name -> (type, required)
+FIELDS = {
+    "channel": (str, True),
+    "challenge": (str, True),
+    "solution": (str, True),
+    "hint": (str, False),
+    "requires": (list, False),
+    "time_check": (bool, False),
+    "verifier": (str, False),
+    "window": (str, False),
+    "window_minutes": (int, False),
+    "timezone": (str, False),
+}
+EXTENSIONS = (".json", ".toml")
+DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+if tomllib is not None:
+    DECODE_ERRORS += (tomllib.TOMLDecodeError,)
+
+
+class PackError(ValueError):
+    """A challenge pack that does not match the schema."""
+
+
+def read_pack(path):
+    """Parse one JSON or TOML pack file."""
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise PackError(f"{path}: TOML packs need Python 3.11 or the tomli package")
+        with open(path, "rb") as pack:
+            return tomllib.load(pack)
+    with open(path, encoding="utf-8") as pack:
+        return json.load(pack)
+
+
+def validate_pack(data, source):
+    """Check a parsed pack against the schema, returns {channel: details}.
+
+    Challenges without "requires" follow the one before them in the pack,
+    the first one of a pack needs nothing.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("challenges"), list):
+        raise PackError(f"{source}: expected a table with a 'challenges' list")
+    challenges = {}
+    previous = None
+    for number, entry in enumerate(data["challenges"], 1):
+        where = f"{source}: challenge {number}"
+        _check_fields(entry, where)
+        channel = entry["channel"]
+        _check_channel(channel, where, challenges)
+        if not entry["solution"].strip():
+            raise PackError(f"{where}: empty solution")
+        challenges[channel] = _build_details(channel, entry, previous, where)
+        previous = channel
+    return challenges
+
+
+def _check_fields(entry, where):
+    """Check that an entry has every required field, each of the right type, and no others."""
+    if not isinstance(entry, dict):
+        raise PackError(f"{where}: expected a table")
+    unknown = sorted(set(entry) - set(FIELDS))
+    if unknown:
+        raise PackError(f"{where}: unknown fields {', '.join(unknown)}")
+    for field, (kind, required) in FIELDS.items():
+        if field not in entry:
+            if required:
+                raise PackError(f"{where}: missing '{field}'")
+        elif not isinstance(entry[field], kind):
+            raise PackError(f"{where}: '{field}' must be a {kind.__name__}")
+
+
+def _check_channel(channel, where, challenges):
+    if not channel.startswith("#") or " " in channel or "," in channel:
+        raise PackError(f"{where}: '{channel}' is not a channel name")
+    if channel in challenges:
+        raise PackError(f"{where}: {channel} is defined twice")
+
+
+def _build_details(channel, entry, previous, where):
+    """The challenge details of an entry, checked by its verifier and time window."""
+    requires = entry.get("requires", [previous] if previous else [])
+    if not all(isinstance(required, str) for required in requires):
+        raise PackError(f"{where}: 'requires' must list channel names")
+    details = {
+        "challenge": entry["challenge"],
+        "solution": entry["solution"],
+        "hint": entry.get("hint", ""),
+        "requires": requires,
+    }
+    if entry.get("time_check"):
+        details["time_check"] = True
+    for field in ("verifier", "window", "window_minutes", "timezone"):
+        if field in entry:
+            details[field] = entry[field]
+    try:
+        prepare(channel, details)
+        build_window(details)
+    except ValueError as e:
+        raise PackError(f"{where}: {e}") from e
+    return details
+
+
+def load_packs(directory):
+    """Load every pack in a directory, in file name order."""
+    challenges = {}
+    files = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(EXTENSIONS):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            data = read_pack(path)
+        except DECODE_ERRORS as e:
+            raise PackError(f"{path}: {e}") from e
+        for channel, details in validate_pack(data, path).items():
+            if channel in challenges:
+                raise PackError(f"{path}: {channel} is already defined by another pack")
+            challenges[channel] = details
+        files += 1
+    return challenges, files
+
+
+def compile_packs(directory, base):
+    """Add the packs in ``directory`` to the ``base`` snapshot, with a load time report."""
+    started = time.perf_counter()
+    challenges, files = load_packs(directory)
+    loaded = time.perf_counter()
+    try:
+        snapshot = base.with_challenges(challenges)
+    except ValueError as e:
+        raise PackError(str(e)) from e
+    compiled = time.perf_counter()
+    return snapshot, {
+        "packs": files,
+        "challenges": len(challenges),
+        "load_seconds": loaded - started,
+        "compile_seconds": compiled - loaded,
+    }
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import sqlite3
+import time
+
+log = logging.getLogger(__name__)
+
+
+def player_key(nick):
+    """Normalize a nick or account name into a progress key."""
+    return nick.lower()
+
+
+class ProgressStore:
+    """Per-player solved challenges, kept in memory and written behind to SQLite."""
+
+    def __init__(self, path=":memory:", batch_size=100, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.solved = {}  # player -> {channel: solved_at}
+        self.pending = []
+        self._flush_handle = None
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS solves ("
+            "player TEXT NOT NULL, channel TEXT NOT NULL, solved_at REAL NOT NULL, "
+            "PRIMARY KEY (player, channel)) WITHOUT ROWID"
+        )
+        self.db.commit()
+        self.load()
+
+    def load(self):
+        """Rebuild the in-memory index from disk."""
+        solved = {}
+        for player, channel, solved_at in self.db.execute(
+            "SELECT player, channel, solved_at FROM solves"
+        ):
+            entry = solved.get(player)
+            if entry is None:
+                entry = solved[player] = {}
+            entry[channel] = solved_at
+        self.solved = solved
+
+    def solved_channels(self, player):
+        """Channels solved by a player, mapped to when they were solved."""
+        return self.solved.get(player_key(player), {})
+
+    def has_solved(self, player, channel):
+        """Check whether a player already solved a channel."""
+        return channel in self.solved_channels(player)
+
+    def record_solve(self, player, channel, solved_at=None):
+        """Record a solve in memory and queue it for the next batched write."""
+        key = player_key(player)
+        entry = self.solved.setdefault(key, {})
+        if channel in entry:
+            return False
+        if solved_at is None:
+            solved_at = time.time()
+        entry[channel] = solved_at
+        self.pending.append((key, channel, solved_at))
+        if len(self.pending) >= self.batch_size:
+            self._try_flush()
+        else:
+            self.schedule_flush()
+        return True
+
+    def schedule_flush(self):
+        """Arm a delayed flush, or flush right away when no event loop is running."""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._try_flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self._try_flush)
+
+    def _try_flush(self):
+        """Flush, and on a database error log it and keep the solves for another try."""
+        try:
+            return self.flush()
+        except sqlite3.Error:
+            log.exception("Could not write %d solves, retrying later", len(self.pending))
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop to retry on, the next solve or close tries again
+                return 0
+            self._flush_handle = loop.call_later(self.flush_interval, self._try_flush)
+            return 0
+
+    def flush(self):
+        """Write every pending solve in a single transaction."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        try:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO solves (player, channel, solved_at) VALUES (?, ?, ?)",
+                    pending,
+                )
+        except sqlite3.Error:
+            # Keep the solves queued so the next flush retries them
+            self.pending = pending + self.pending
+            raise
+        return len(pending)
+
+    def close(self):
+        """Flush pending solves and close the database, a second call does nothing."""
+        if self.db is None:
+            return
+        try:
+            self.flush()
+        except sqlite3.Error:
+            log.exception("Lost %d solves that could not be written", len(self.pending))
+        self.db.close()
+        self.db = None
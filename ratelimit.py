@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+
+ALLOW = "allow"
+THROTTLE = "throttle"  # first message over the budget, worth one notice
+DROP = "drop"
+
+
+def parse_rate(value):
+    """Parse a "limit/seconds" string such as "5/60"."""
+    limit, _, window = str(value).partition("/")
+    return int(limit), float(window or 60)
+
+
+class SlidingWindowLimiter:
+    """Approximate sliding-window rate limiter with a bounded LRU of keys.
+
+    Each key only keeps the counts of the current and previous fixed window;
+    the previous count is weighted by how much of it still overlaps the
+    sliding window.
+    """
+
+    def __init__(self, limit, window, max_keys=10000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self.keys = OrderedDict()  # key -> [window start, previous count, current count, notified]
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def hit(self, key):
+        """Count one message from ``key``, returns ALLOW, THROTTLE or DROP."""
+        now = self.clock()
+        entry = self.keys.get(key)
+        if entry is None:
+            entry = self.keys[key] = [now, 0, 0, False]
+            if len(self.keys) > self.max_keys:
+                self.keys.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.keys.move_to_end(key)
+            elapsed = now - entry[0]
+            if elapsed >= self.window:
+                # Roll the window, a gap of two windows forgets everything
+                entry[1] = entry[2] if elapsed < 2 * self.window else 0
+                entry[2] = 0
+                entry[0] += (elapsed // self.window) * self.window
+        overlap = 1.0 - (now - entry[0]) / self.window
+        if entry[1] * overlap + entry[2] < self.limit:
+            entry[2] += 1
+            entry[3] = False
+            self.allowed += 1
+            return ALLOW
+        self.throttled += 1
+        if entry[3]:
+            return DROP
+        entry[3] = True
+        return THROTTLE
+
+    def throttled_keys(self):
+        """Number of keys currently over their budget."""
+        return sum(1 for entry in self.keys.values() if entry[3])
+
+    def stats(self):
+        return {
+            "keys": len(self.keys),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "throttled_keys": self.throttled_keys(),
+            "evicted": self.evicted,
+        }
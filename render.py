@@ -0,0 +1,88 @@
+import challenges
+
+# Placeholder for the nick in compiled templates, it never appears in challenge text
+NICK_SLOT = "\x00"
+# Bytes left for the text of a PRIVMSG once "PRIVMSG <target> :" and CRLF are taken off
+LINE_BUDGET = 512 - len("PRIVMSG  :\r\n") - 50
+NICKLEN = 30
+
+
+def split_utf8(text, budget=LINE_BUDGET):
+    """Split text into chunks of at most ``budget`` UTF-8 bytes, preferring spaces."""
+    data = text.encode("utf-8")
+    if len(data) <= budget:
+        return [text]
+    chunks = []
+    while len(data) > budget:
+        end = budget
+        # Never cut inside a multi-byte character
+        while end > 0 and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        space = data.rfind(b" ", 0, end + 1)
+        if space > 0:
+            end = space
+        chunks.append(data[:end].decode("utf-8").rstrip(" "))
+        data = data[end:].lstrip(b" ")
+    if data:
+        chunks.append(data.decode("utf-8"))
+    return [chunk for chunk in chunks if chunk]
+
+
+class Template:
+    """A message compiled once into ready-to-send lines with an optional nick slot."""
+
+    __slots__ = ("lines", "budget")
+
+    def __init__(self, text, budget=LINE_BUDGET):
+        self.budget = budget
+        lines = []
+        for line in text.split("\n"):
+            if not line.strip():
+                continue
+            slots = line.count(NICK_SLOT)
+            for chunk in split_utf8(line, budget - slots * (NICKLEN - len(NICK_SLOT))):
+                lines.append(tuple(chunk.split(NICK_SLOT)) if NICK_SLOT in chunk else chunk)
+        self.lines = lines
+
+    def render(self, nick=""):
+        """Lines with the nick filled in."""
+        rendered = []
+        for line in self.lines:
+            if line.__class__ is str:
+                rendered.append(line)
+                continue
+            line = nick.join(line)
+            if len(nick) > NICKLEN:
+                # Long substitutions (lists of nicks) may need splitting again
+                rendered.extend(split_utf8(line, self.budget))
+            else:
+                rendered.append(line)
+        return rendered
+
+
+class MessageCache:
+    """Compiled templates, dropped whenever the challenges are regenerated."""
+
+    def __init__(self, budget=LINE_BUDGET):
+        self.budget = budget
+        self.templates = {}
+        self.generation = challenges.GENERATION
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Compiled template for ``key``, ``build()`` returns the text on a miss."""
+        if self.generation != challenges.GENERATION:
+            self.templates = {}
+            self.generation = challenges.GENERATION
+        template = self.templates.get(key)
+        if template is None:
+            self.misses += 1
+            template = self.templates[key] = Template(build(), self.budget)
+        else:
+            self.hits += 1
+        return template
+
+    def render(self, key, build, nick=""):
+        """Shortcut for ``get(key, build).render(nick)``."""
+        return self.get(key, build).render(nick)
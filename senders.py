@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import logging
+import ssl as ssl_module
+
+from dispatch import SERVICES
+from outbound import OutboundScheduler
+from progress import player_key
+
+# What a server calls the character that starts a channel name, on every common network
+CHANNEL_PREFIXES = "#&+!"
+
+
+def _score(name, key):
+    # Python's tuple hash spreads these keys too unevenly over a handful of names
+    return hashlib.blake2b(key, digest_size=8, key=name.encode("utf-8")).digest()
+
+
+class SenderConnection:
+    """An extra connection to the server that writes paced PRIVMSGs.
+
+    It registers a nick of its own, answers PINGs and reconnects with a
+    growing delay after it loses the connection. ``on_ready`` and ``on_down``
+    are called with the connection when it can send and when it stops.
+    Players reply to the nick that wrote to them, so ``on_message`` is called
+    as ``on_message(prefix, event, data)`` for each PRIVMSG a user sends to
+    this nick. Notices and services are left to the main connection.
+    """
+
+    def __init__(
+        self,
+        name,
+        nick,
+        host,
+        port,
+        ssl=False,
+        username=None,
+        realname="IRC CTF Game Bot",
+        rate=1.0,
+        burst=4,
+        max_queue=500,
+        reconnect_delay=1.0,
+        max_reconnect_delay=60.0,
+        log=None,
+    ):
+        self.name = name
+        self.nick = nick
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.username = username or nick
+        self.realname = realname
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.log = log or logging.getLogger("senders")
+        self.outbound = OutboundScheduler(self, rate=rate, burst=burst, max_queue=max_queue)
+        self.ready = False
+        self.connects = 0
+        self.disconnects = 0
+        self.on_ready = None
+        self.on_down = None
+        self.on_message = None
+        self.writer = None
+        self._closed = False
+
+    def send_line(self, data, nowait=False):
+        if self.writer is None or self.writer.is_closing():
+            raise ConnectionError(f"{self.name} is not connected")
+        self.writer.write(data.encode("utf-8", "replace") + b"\r\n")
+
+    async def run(self):
+        """Stay connected until ``close``, reconnecting after every failure."""
+        delay = self.reconnect_delay
+        while not self._closed:
+            try:
+                context = ssl_module.create_default_context() if self.ssl else None
+                reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port, ssl=context
+                )
+                self.connects += 1
+                await self._session(reader)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                self.log.warning("Sender %s lost its connection: %s", self.name, e)
+            finally:
+                was_ready = self.ready
+                self._disconnected()
+            if self._closed:
+                break
+            if was_ready:
+                # It worked until now, try again soon
+                delay = self.reconnect_delay
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _session(self, reader):
+        nick = self.nick
+        self.send_line(f"NICK {nick}")
+        self.send_line(f"USER {self.username} 0 * :{self.realname}")
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            words = line.split(" ", 2)
+            command = words[1] if line.startswith(":") and len(words) > 1 else words[0]
+            if command == "PING":
+                self.send_line("PONG " + line.split(" ", 1)[1])
+            elif command == "001":
+                self.nick = words[2].split(" ", 1)[0]
+                self.ready = True
+                self.log.info("Sender %s is ready as %s", self.name, self.nick)
+                if self.on_ready is not None:
+                    self.on_ready(self)
+            elif command == "433" and not self.ready:
+                # Nick in use, try another one
+                nick += "_"
+                self.send_line(f"NICK {nick}")
+            elif command == "PRIVMSG" and len(words) > 2:
+                self._received(words[0][1:], command, words[2])
+            elif command == "ERROR":
+                self.log.warning("Sender %s was disconnected: %s", self.name, line)
+                return
+
+    def _received(self, prefix, event, params):
+        target, _, data = params.partition(" ")
+        nick, user_mask, _ = prefix.partition("!")
+        # Only what users send to this nick is passed on, the server and services talk to
+        # the connection itself, and their replies are meant for the main one
+        if (
+            self.on_message is None
+            or not user_mask
+            or nick.lower() in SERVICES
+            or target.lower() != self.nick.lower()
+        ):
+            return
+        try:
+            self.on_message(prefix, event, data[1:] if data.startswith(":") else data)
+        except Exception:
+            # A bad message must not take the connection down with it
+            self.log.exception("Sender %s could not handle a message from %s", self.name, nick)
+
+    def _disconnected(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.disconnects += 1
+        if self.ready:
+            self.ready = False
+            if self.on_down is not None:
+                self.on_down(self)
+
+    def close(self):
+        self._closed = True
+        if self.writer is not None and not self.writer.is_closing():
+            self.send_line("QUIT :Bye")
+            self.writer.close()
+
+
+class SenderPool:
+    """Spreads private messages over the main connection and extra sender connections.
+
+    It offers the OutboundScheduler interface. A message to a single nick goes
+    to the connection that nick hashes to among those ready to send, so each
+    connection's flood limit only carries part of the players. Channels and
+    multi-target messages stay on the main connection. A nick with lines still
+    queued on a connection keeps using it, which keeps each player's messages
+    in order. When a sender drops out, its queue moves to the others.
+    Messages players send to a sender nick go to ``on_message``.
+    """
+
+    def __init__(self, primary, senders=()):
+        self.primary = primary  # the main connection's OutboundScheduler
+        self.senders = list(senders)
+        self.shards = [("main", primary)]  # (name, scheduler) of the connections that can send
+        self.moved = 0  # lines moved off senders that dropped out
+        self.on_message = None  # called as on_message(prefix, event, data)
+        self._tasks = []
+        for sender in self.senders:
+            sender.on_ready = self._sender_ready
+            sender.on_down = self._sender_down
+            sender.on_message = self._message
+
+    @property
+    def lanes(self):
+        return self.primary.lanes
+
+    def start(self):
+        """Connect the senders, once, from a running event loop."""
+        if self._tasks or not self.senders:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._tasks = [loop.create_task(sender.run()) for sender in self.senders]
+
+    def close(self):
+        for sender in self.senders:
+            sender.close()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def _message(self, prefix, event, data):
+        if self.on_message is not None:
+            self.on_message(prefix, event, data)
+
+    def _sender_ready(self, sender):
+        self.shards.append((sender.name, sender.outbound))
+
+    def _sender_down(self, sender):
+        self.shards = [(name, shard) for name, shard in self.shards if shard is not sender.outbound]
+        for lane, target, lines in sender.outbound.drain():
+            self.moved += len(lines)
+            self.send_lines(target, lines, lane)
+
+    def route(self, target):
+        """The scheduler that writes to ``target``."""
+        if len(self.shards) == 1 or target[0] in CHANNEL_PREFIXES or "," in target:
+            return self.primary
+        for _, shard in self.shards:
+            if shard.queued(target):
+                return shard
+        # Rendezvous hashing: a sender coming or going only moves its own share of nicks
+        key = player_key(target).encode("utf-8")
+        _, shard = max(self.shards, key=lambda entry: _score(entry[0], key))
+        return shard
+
+    def send(self, target, message, lane="reply"):
+        return self.route(target).send(target, message, lane)
+
+    def send_lines(self, target, lines, lane="reply"):
+        return self.route(target).send_lines(target, lines, lane)
+
+    def send_command(self, line, lane="control"):
+        """Queue a raw command on the main connection, the one in the channels."""
+        return self.primary.send_command(line, lane)
+
+    async def flush(self):
+        """Wait until every queued line on every connection has been written."""
+        while any(shard.depth() for _, shard in self.shards):
+            await asyncio.gather(*(shard.flush() for _, shard in self.shards))
+
+    def depth(self, lane=None):
+        return sum(shard.depth(lane) for _, shard in self._all())
+
+    def _all(self):
+        return [("main", self.primary)] + [
+            (sender.name, sender.outbound) for sender in self.senders
+        ]
+
+    def stats(self):
+        """Per-lane totals over every connection, as OutboundScheduler.stats reports them."""
+        totals = {}
+        for _, shard in self._all():
+            for lane, stats in shard.stats().items():
+                total = totals.setdefault(
+                    lane, {"depth": 0, "sent": 0, "dropped": 0, "coalesced": 0, "waits": 0.0}
+                )
+                for key in ("depth", "sent", "dropped", "coalesced"):
+                    total[key] += stats[key]
+                total["waits"] += stats["avg_wait"] * stats["sent"]
+                total["max_wait"] = max(total.get("max_wait", 0.0), stats["max_wait"])
+        for total in totals.values():
+            waits = total.pop("waits")
+            total["avg_wait"] = waits / total["sent"] if total["sent"] else 0.0
+        return totals
+
+    def sender_stats(self):
+        """Lines sent and whether it is ready, per connection."""
+        ready = {name for name, _ in self.shards}
+        return {
+            name: {
+                "ready": name in ready,
+                "sent": sum(lane["sent"] for lane in shard.stats().values()),
+            }
+            for name, shard in self._all()
+        }
@@ -0,0 +1,139 @@
+import math
+import sys
+import time
+
+from progress import player_key
+
+
+class Session:
+    """What the bot keeps about one nick while it is around."""
+
+    __slots__ = ("nick", "host", "started", "seen", "messages", "slot")
+
+    def __init__(self, nick, host, now):
+        self.nick = nick
+        self.host = host
+        self.started = now
+        self.seen = now
+        self.messages = 0
+        self.slot = 0
+
+
+class SessionManager:
+    """Sessions of recently active nicks, bounded in count and in idle time.
+
+    Idle sessions are found with a timer wheel: a session sits in the slot
+    of the tick it would expire on and activity only updates ``seen``. When
+    the wheel reaches a slot, sessions that were active meanwhile move to a
+    later slot and the others end. The wheel turns as events come in, so
+    no timer runs while the bot is quiet.
+    """
+
+    def __init__(self, idle=3600.0, max_sessions=50000, tick=60.0, clock=time.monotonic):
+        self.idle = idle
+        self.max_sessions = max_sessions
+        self.tick = tick
+        self.clock = clock
+        self.sessions = {}  # player key -> Session
+        # Enough slots that a session never expires more than one lap ahead
+        self.wheel = [set() for _ in range(math.ceil(idle / tick) + 2)]
+        self.current = int(clock() // tick)  # last tick the wheel processed
+        self.ended = {"idle": 0, "cap": 0, "quit": 0}
+        self.on_end = []  # callables taking the player key of an ended session
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, nick):
+        return self.sessions.get(player_key(nick))
+
+    def _place(self, key, session):
+        expires = max(int((session.seen + self.idle) // self.tick), self.current + 1)
+        session.slot = expires % len(self.wheel)
+        self.wheel[session.slot].add(key)
+
+    def advance(self, now=None):
+        """Turn the wheel up to ``now``, ending the sessions idle for too long."""
+        now = self.clock() if now is None else now
+        target = int(now // self.tick)
+        # Coming back after more than a lap, every slot only needs one visit
+        self.current = max(self.current, target - len(self.wheel))
+        while self.current < target:
+            self.current += 1
+            index = self.current % len(self.wheel)
+            due, self.wheel[index] = self.wheel[index], set()
+            for key in due:
+                session = self.sessions[key]
+                if now - session.seen >= self.idle:
+                    self._end(key, "idle")
+                else:
+                    self._place(key, session)
+
+    def touch(self, nick, host=None):
+        """Record activity from a nick, starting a session if it has none."""
+        now = self.clock()
+        self.advance(now)
+        key = player_key(nick)
+        session = self.sessions.get(key)
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                self._evict_idlest()
+            session = self.sessions[key] = Session(nick, host, now)
+            self._place(key, session)
+        else:
+            session.seen = now
+            session.nick = nick
+            if host is not None:
+                session.host = host
+        session.messages += 1
+        return session
+
+    def rename(self, old, new):
+        """Carry a session over a NICK change."""
+        key = player_key(old)
+        session = self.sessions.pop(key, None)
+        if session is None:
+            return None
+        self.wheel[session.slot].discard(key)
+        new_key = player_key(new)
+        # Whoever had the new nick before is gone
+        self._end(new_key, "quit")
+        session.nick = new
+        self.sessions[new_key] = session
+        self.wheel[session.slot].add(new_key)
+        return session
+
+    def remove(self, nick, reason="quit"):
+        """End a nick's session, after a QUIT for instance."""
+        self._end(player_key(nick), reason)
+
+    def _evict_idlest(self):
+        """End the session that would expire first, to stay under ``max_sessions``."""
+        for step in range(1, len(self.wheel) + 1):
+            slot = self.wheel[(self.current + step) % len(self.wheel)]
+            if slot:
+                key = min(slot, key=lambda key: self.sessions[key].seen)
+                self._end(key, "cap")
+                return
+
+    def _end(self, key, reason):
+        session = self.sessions.pop(key, None)
+        if session is None:
+            return
+        self.wheel[session.slot].discard(key)
+        self.ended[reason] += 1
+        for callback in self.on_end:
+            callback(key)
+
+    def estimated_bytes(self):
+        """Rough memory held by the sessions: records, their strings and the containers."""
+        total = sys.getsizeof(self.sessions) + sum(sys.getsizeof(slot) for slot in self.wheel)
+        for key, session in self.sessions.items():
+            total += sys.getsizeof(key) + sys.getsizeof(session) + sys.getsizeof(session.nick)
+            if session.host is not None:
+                total += sys.getsizeof(session.host)
+        return total
+
+    def stats(self):
+        self.advance()
+        return {"sessions": len(self.sessions), "ended": dict(self.ended)}
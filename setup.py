@@ -28,6 +28,7 @@ setup(
     install_requires=[
         "irc3>=1.9.0",
         "python-dotenv>=0.19.0",
+        "croniter>=1.0.0",
     ],
     entry_points={
         "console_scripts": [
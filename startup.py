@@ -0,0 +1,94 @@
+import time
+
+# "JOIN " plus CRLF, the rest of the 512 byte line is left for channel names
+JOIN_BUDGET = 512 - len("JOIN \r\n")
+
+
+def target_limit(server_config, command):
+    """Maximum targets per ``command`` from ISUPPORT TARGMAX, None when not advertised."""
+    for entry in str(server_config.get("TARGMAX", "")).split(","):
+        name, _, limit = entry.partition(":")
+        if name.upper() == command and limit.isdigit():
+            return int(limit)
+    return None
+
+
+def join_target_limit(server_config):
+    """Maximum channels per JOIN from ISUPPORT TARGMAX, None when unlimited."""
+    return target_limit(server_config, "JOIN")
+
+
+def channel_limit(server_config, prefix="#"):
+    """Maximum channels we may be in from ISUPPORT CHANLIMIT, None when unknown."""
+    for entry in str(server_config.get("CHANLIMIT", "")).split(","):
+        prefixes, _, limit = entry.partition(":")
+        if prefix in prefixes and limit.isdigit():
+            return int(limit)
+    return None
+
+
+def batch_channels(channels, max_targets=None, max_bytes=JOIN_BUDGET):
+    """Group channels into comma-separated JOIN targets within the server limits."""
+    batches = []
+    batch = []
+    size = 0
+    for channel in channels:
+        length = len(channel.encode("utf-8")) + (1 if batch else 0)
+        if batch and (size + length > max_bytes or len(batch) == max_targets):
+            batches.append(",".join(batch))
+            batch, size = [], 0
+            length -= 1
+        batch.append(channel)
+        size += length
+    if batch:
+        batches.append(",".join(batch))
+    return batches
+
+
+class StartupTracker:
+    """Tracks channel JOINs from connection to the bot being in every channel."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Start over, on a new connection."""
+        self.started = self.clock()
+        self.pending = set()
+        self.confirmed = set()
+        self.ready_at = None
+
+    def expect(self, channels, retry=False):
+        """Channels that still need a JOIN, pending ones are only returned again on retry."""
+        wanted = []
+        for channel in channels:
+            key = channel.lower()
+            if key in self.confirmed or (key in self.pending and not retry):
+                continue
+            self.pending.add(key)
+            wanted.append(channel)
+        return wanted
+
+    def confirm(self, channel):
+        """Record a JOIN confirmation, returns True when the last pending channel arrives."""
+        key = channel.lower()
+        if key not in self.pending:
+            return False
+        self.pending.discard(key)
+        self.confirmed.add(key)
+        if not self.pending and self.ready_at is None:
+            self.ready_at = self.clock()
+            return True
+        return False
+
+    def lost(self, channel):
+        """Forget a confirmed channel after being kicked or parting."""
+        self.confirmed.discard(channel.lower())
+
+    @property
+    def time_to_ready(self):
+        """Seconds from the start to being in every channel, None until ready."""
+        if self.ready_at is None:
+            return None
+        return self.ready_at - self.started
@@ -0,0 +1,197 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from audit import (
+    ATTEMPT,
+    LEAK,
+    RECORD,
+    SOLVE,
+    AuditLog,
+    analyze,
+    hash_answer,
+    iter_records,
+    list_segments,
+    read_names,
+)
+from bot import CTFGame
+from challenges import current_snapshot
+
+
+class TestAuditLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "audit")
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open_log(self, **kwargs):
+        return AuditLog(self.directory, clock=lambda: self.now, **kwargs)
+
+    def test_round_trip(self):
+        """Test that records keep their fields and ids survive a restart."""
+        log = self.open_log()
+        log.record(ATTEMPT, "#one", "Alice", answer=" Water ")
+        log.record(SOLVE, "#one", "alice", "channel")
+        log.close()
+        log = self.open_log()
+        log.record(ATTEMPT, "#two", "ALICE", answer="water")
+        log.close()
+        water = hash_answer("water")
+        self.assertEqual(
+            list(iter_records(self.directory)),
+            [
+                (1000.0, 1, water, 1, ATTEMPT, 0),
+                (1000.0, 1, 0, 1, SOLVE, 1),
+                (1000.0, 1, water, 2, ATTEMPT, 0),
+            ],
+        )
+
+    def test_answer_names_are_bounded(self):
+        """Test that wrong answers only take a fixed id and at most a capped number of names."""
+        log = self.open_log(max_answer_names=2)
+        for number in range(5):
+            log.record(ATTEMPT, "#one", "alice", answer=f"guess {number}")
+        log.record(ATTEMPT, "#one", "alice", answer="guess 0")
+        log.close()
+        answers = read_names(self.directory)["answer"]
+        self.assertEqual(
+            answers, {hash_answer("guess 0"): "guess 0", hash_answer("guess 1"): "guess 1"}
+        )
+        ids = [record[2] for record in iter_records(self.directory)]
+        self.assertEqual(ids, [hash_answer(f"guess {number}") for number in (0, 1, 2, 3, 4, 0)])
+        # The cap holds across restarts
+        log = self.open_log(max_answer_names=2)
+        log.record(ATTEMPT, "#one", "alice", answer="guess 9")
+        log.close()
+        self.assertEqual(len(read_names(self.directory)["answer"]), 2)
+
+    def test_batches(self):
+        """Test that records are only written once the batch is full."""
+        log = self.open_log(batch_size=3)
+        log._flush_handle = object()  # pretend a delayed flush is already armed
+        log.record(ATTEMPT, "#one", "a", answer="x")
+        log.record(ATTEMPT, "#one", "b", answer="y")
+        self.assertEqual(list(iter_records(self.directory)), [])
+        log._flush_handle = None
+        log.record(SOLVE, "#one", "c")
+        self.assertEqual(len(list(iter_records(self.directory))), 3)
+        log.close()
+
+    def test_segments(self):
+        """Test that segments are capped in size and a torn record is dropped."""
+        log = self.open_log(segment_bytes=RECORD.size * 2 + 5, batch_size=100)
+        for number in range(5):
+            log.record(ATTEMPT, "#one", f"player{number}", answer="x")
+        log.close()
+        segments = list_segments(self.directory)
+        self.assertEqual(len(segments), 3)
+        for name in segments[:2]:
+            self.assertEqual(os.path.getsize(os.path.join(self.directory, name)), RECORD.size * 2)
+        with open(os.path.join(self.directory, segments[-1]), "ab") as segment:
+            segment.write(b"torn")
+        self.assertEqual(len(list(iter_records(self.directory))), 5)
+        log = self.open_log(segment_bytes=RECORD.size * 2 + 5)
+        log.record(SOLVE, "#one", "player0")
+        log.close()
+        self.assertEqual(len(list_segments(self.directory)), 3)
+        self.assertEqual(list(iter_records(self.directory))[-1][4], SOLVE)
+
+
+class TestAnalyze(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        self.now = 0.0
+        # Tiny segments, so the report combines several of them
+        log = AuditLog(self.directory, segment_bytes=RECORD.size * 3, clock=lambda: self.now)
+        events = [
+            (0, ATTEMPT, "#one", "alice", "water"),
+            (10, ATTEMPT, "#one", "bob", "water"),
+            (20, ATTEMPT, "#one", "bob", "earth"),
+            (30, SOLVE, "#one", "alice", None),
+            (50, ATTEMPT, "#two", "alice", "air"),
+            (60, LEAK, "#one", "carol", None),
+            (70, SOLVE, "#one", "bob", None),
+            (130, SOLVE, "#two", "alice", None),
+        ]
+        for self.now, kind, channel, player, answer in events:
+            log.record(kind, channel, player, answer=answer)
+        log.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_report(self):
+        """Test the funnel, solve times and wrong answers of each challenge."""
+        report = analyze(self.directory, top=1)
+        self.assertEqual(report["events"], 8)
+        self.assertEqual(report["players"], 3)
+        one = report["challenges"]["#one"]
+        self.assertEqual(
+            (one["players"], one["solved"], one["attempts"], one["leaks"]), (2, 2, 5, 1)
+        )
+        self.assertEqual(one["solve_rate"], 1.0)
+        # alice solved 30s after her first attempt, bob 60s after his
+        self.assertEqual(one["solve_seconds"], {"p50": 30.0, "p90": 60.0, "p99": 60.0})
+        self.assertEqual(one["wrong_answers"], [("water", 2)])
+        two = report["challenges"]["#two"]
+        # Counted from alice's solve of #one
+        self.assertEqual(two["solve_seconds"]["p50"], 100.0)
+        self.assertEqual(two["wrong_answers"], [("air", 1)])
+
+    def test_workers(self):
+        """Test that segments read in worker processes give the same report."""
+        self.assertEqual(analyze(self.directory, workers=2), analyze(self.directory))
+
+
+class TestBotAudit(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {"audit_dir": self.tmpdir.name}
+        self.game = CTFGame(self.mock_bot)
+        self.mask = MagicMock()
+        self.mask.nick = "TestUser"
+
+    def tearDown(self):
+        self.game.audit.close()
+        self.tmpdir.cleanup()
+
+    def test_attempts_solves_and_leaks(self):
+        """Test that submissions and leaked answers end up in the audit log."""
+        self.game.handle_challenge_solution(self.mask, "london")
+        self.game.handle_challenge_solution(self.mask, "fire")
+        self.game.handle_channel_msg(self.mask, "PRIVMSG", "#CypherCon", "it is hidden message")
+        self.game.audit.flush()
+        kinds = [record[4] for record in iter_records(self.tmpdir.name)]
+        self.assertEqual(kinds, [ATTEMPT, SOLVE, LEAK])
+        report = analyze(self.tmpdir.name)
+        welcome = report["challenges"]["#challenge-1-welcome"]
+        self.assertEqual((welcome["players"], welcome["solved"]), (1, 1))
+        self.assertEqual(welcome["wrong_answers"], [("london", 1)])
+        self.assertEqual(report["challenges"]["#challenge-6-stego"]["leaks"], 1)
+
+    def test_no_flags_stored(self):
+        """Test that a wrong attempt with the answer to a locked challenge keeps no text."""
+        snapshot = current_snapshot()
+        flag = snapshot.challenges[snapshot.channels[2]]["solution"]
+        self.game.handle_challenge_solution(self.mask, flag)
+        self.game.audit.flush()
+        self.assertEqual([record[2] for record in iter_records(self.tmpdir.name)], [0])
+        report = analyze(self.tmpdir.name)
+        self.assertEqual(report["challenges"]["#challenge-1-welcome"]["wrong_answers"], [])
+        self.assertEqual(read_names(self.tmpdir.name)["answer"], {})
+
+    def test_disabled(self):
+        """Test that no audit log is kept unless a directory is configured."""
+        self.mock_bot.config = {}
+        self.assertIsNone(CTFGame(self.mock_bot).audit)
+
+
+if __name__ == "__main__":
+    unittest.main()
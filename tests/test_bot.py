@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from challenges import current_snapshot, get_next_channel, verify_solution
+
+
+class TestCTFGame(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.log = MagicMock()
+        self.mock_bot.config = {}
+        self.game = CTFGame(self.mock_bot)
+
+    def sent(self):
+        return "\n".join(call.args[0] for call in self.mock_bot.send_line.call_args_list)
+
+    def test_challenge_verification(self):
+        """Test that challenge solutions are correctly verified"""
+        # Test correct solutions
+        self.assertTrue(verify_solution("#challenge-1-welcome", "fire"))
+        self.assertTrue(verify_solution("#challenge-2-binary", "paris"))
+        self.assertTrue(
+            verify_solution("#challenge-3-crypto", "What is the most secret point in the dlrow?")
+        )
+        self.assertTrue(verify_solution("#challenge-7-final", "CTF{1RC_Ch4ll3ng3_M4st3r}"))
+
+        # Test incorrect solutions
+        self.assertFalse(verify_solution("#challenge-1-welcome", "water"))
+        self.assertFalse(verify_solution("#challenge-2-binary", "london"))
+        self.assertFalse(verify_solution("#challenge-3-crypto", "wrong answer"))
+        self.assertFalse(verify_solution("#challenge-7-final", "wrong flag"))
+
+    def test_next_channel(self):
+        """Test that next channels are correctly determined"""
+        self.assertEqual(get_next_channel("#challenge-1-welcome"), "#challenge-2-binary")
+        self.assertEqual(get_next_channel("#challenge-2-binary"), "#challenge-3-crypto")
+        self.assertEqual(get_next_channel("#challenge-6-stego"), "#challenge-7-final")
+        self.assertIsNone(get_next_channel("#challenge-7-final"))
+
+    def test_challenge_content(self):
+        """Test that challenge content is properly formatted"""
+        for channel in current_snapshot().channels:
+            challenge, solution, hint = current_snapshot().get_challenge(channel)
+            self.assertIsInstance(challenge, str)
+            self.assertIsInstance(solution, str)
+            self.assertIsInstance(hint, str)
+            self.assertTrue(len(challenge) > 0)
+            self.assertTrue(len(solution) > 0)
+
+    def test_handle_join(self):
+        """Test the join handler"""
+        mock_mask = MagicMock()
+        mock_mask.nick = "TestUser"
+
+        # Test joining a challenge channel
+        self.game.handle_join(mock_mask, "#challenge-1-welcome")
+        self.assertIn("PRIVMSG #challenge-1-welcome :", self.sent())
+
+    def test_handle_challenge_solution(self):
+        """Test challenge solution handling"""
+        mock_mask = MagicMock()
+        mock_mask.nick = "TestUser"
+
+        # Test correct solution
+        self.game.handle_challenge_solution(mock_mask, "fire")
+        self.assertIn("You've solved the challenge in #challenge-1-welcome", self.sent())
+        self.assertIn("Your next challenge awaits in: #challenge-2-binary", self.sent())
+
+        # Test final challenge solution
+        for channel in current_snapshot().channels[1:-1]:
+            self.game.progress.record_solve(mock_mask.nick, channel)
+        self.mock_bot.send_line.reset_mock()
+        self.game.handle_challenge_solution(mock_mask, "CTF{1RC_Ch4ll3ng3_M4st3r}")
+        self.assertIn("CONGRATULATIONS TestUser", self.sent())
+
+    def test_solution_index_lookup(self):
+        """Test that shared answers are found in the solution index, not checked one by one."""
+        mock_mask = MagicMock()
+        mock_mask.nick = "TestUser"
+        self.game.verifiers.check = MagicMock(return_value=False)
+        self.game.handle_challenge_solution(mock_mask, "Fire")
+        self.assertTrue(self.game.progress.has_solved("TestUser", "#challenge-1-welcome"))
+        self.game.handle_challenge_solution(mock_mask, "not it")
+        self.game.verifiers.check.assert_not_called()
+
+    def test_reply_to_sender_nick(self):
+        """Test that an answer sent to a sender nick is handled like one sent to the bot."""
+        self.game.on_sender_message("TestUser!user@host", "PRIVMSG", "fire")
+        self.assertTrue(self.game.progress.has_solved("TestUser", "#challenge-1-welcome"))
+        self.assertIn("You've solved the challenge in #challenge-1-welcome", self.sent())
+
+    def test_near_miss(self):
+        """Test that a wrong answer close to the solution gets a hint and others get none."""
+        mock_mask = MagicMock()
+        mock_mask.nick = "TestUser"
+        for channel in current_snapshot().channels[:-1]:
+            self.game.progress.record_solve(mock_mask.nick, channel)
+        self.game.handle_challenge_solution(mock_mask, "CTF{1RC_Ch4ll3ng3_M4st3}")
+        self.assertIn("you're close on #challenge-7-final", self.sent())
+        self.mock_bot.send_line.reset_mock()
+        self.game.handle_challenge_solution(mock_mask, "no idea")
+        self.assertEqual(self.sent(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import challenges
+from benchmarks.replay import command_of, diff_outbound, replay
+from bot import CTFGame
+from capture import CaptureWriter, read_capture
+
+LINES = [
+    ":srv 001 CTFGameBot :Welcome",
+    ":srv 005 CTFGameBot TARGMAX=PRIVMSG:4,JOIN:4 :are supported by this server",
+    ":srv 376 CTFGameBot :End of /MOTD command.",
+    ":CTFGameBot!bot@host JOIN #challenge-1-welcome",
+    ":alice!a@host JOIN #challenge-1-welcome",
+    "@msgid=1 :alice!a@host PRIVMSG #challenge-1-welcome :hello everyone",
+    ":alice!a@host PRIVMSG CTFGameBot :fire",
+    ":alice!a@host NICK :alice_",
+    ":alice_!a@host QUIT :bye",
+]
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.now = 0.0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, lines, step=0.25):
+        path = os.path.join(self.tmpdir.name, name)
+        writer = CaptureWriter(path, clock=lambda: self.now)
+        for line in lines:
+            writer.write(line)
+            self.now += step
+        writer.close()
+        return path
+
+    def test_round_trip(self):
+        """Test that lines and their spacing survive a capture, compressed or not."""
+        for name in ("capture.log", "capture.log.gz"):
+            path = self.write(name, LINES[:3])
+            self.assertEqual(
+                list(read_capture(path)), [(0.0, LINES[0]), (0.25, LINES[1]), (0.25, LINES[2])]
+            )
+
+    def test_append_sessions(self):
+        """Test that a new recording session appends and starts from a zero delta."""
+        path = self.write("capture.log", LINES[:2])
+        self.now += 100
+        self.write("capture.log", LINES[2:4])
+        self.assertEqual([delta for delta, _ in read_capture(path)], [0.0, 0.25, 0.0, 0.25])
+        with open(path) as capture:
+            self.assertEqual(sum(line.startswith("#ctfcap") for line in capture), 2)
+
+    def test_bot_records(self):
+        """Test that the recorder is only attached when a capture path is configured."""
+        mock_bot = MagicMock()
+        mock_bot.config = {}
+        self.assertIsNone(CTFGame(mock_bot).recorder)
+        mock_bot.attach_events.assert_not_called()
+        path = os.path.join(self.tmpdir.name, "capture.log")
+        mock_bot.config = {"record_path": path}
+        game = CTFGame(mock_bot)
+        mock_bot.attach_events.assert_called_once()
+        game.record_line(LINES[0])
+        game.recorder.close()
+        self.assertEqual(list(read_capture(path)), [(0.0, LINES[0])])
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = challenges.current_snapshot()
+
+    def tearDown(self):
+        challenges.install_snapshot(self.original)
+        self.tmpdir.cleanup()
+
+    def test_command_of(self):
+        """Test that the command is found after tags and prefix."""
+        self.assertEqual(command_of(LINES[5]), "PRIVMSG")
+        self.assertEqual(command_of("PING :srv"), "PING")
+
+    def test_replay(self):
+        """Test that a replay runs the handlers and collects the outbound commands."""
+        path = os.path.join(self.tmpdir.name, "capture.log.gz")
+        writer = CaptureWriter(path)
+        for line in LINES:
+            writer.write(line)
+        writer.close()
+        outputs = []
+        for _ in range(2):
+            out = io.StringIO()
+            report = asyncio.run(replay(path, speed=None, out=out))
+            outputs.append(out.getvalue())
+        self.assertEqual(report["lines"], len(LINES))
+        self.assertEqual(report["handlers"]["PRIVMSG"]["events"], 2)
+        self.assertGreater(report["handlers"]["PRIVMSG"]["calls"], 0)
+        self.assertEqual(report["sent"]["KICK"], 1)
+        self.assertIn("PRIVMSG NickServ :REGISTER", outputs[0])
+        self.assertIn("Congratulations", outputs[0])
+        # Seeded replays of the same capture send the same lines
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_diff(self):
+        """Test the streaming comparison of two outbound files."""
+        a = os.path.join(self.tmpdir.name, "a.txt")
+        b = os.path.join(self.tmpdir.name, "b.txt")
+        with open(a, "w") as out:
+            out.write("JOIN #a\nPRIVMSG x :hi\nKICK #a x :bye\n")
+        with open(b, "w") as out:
+            out.write("JOIN #a\nPRIVMSG x :hello\n")
+        report = diff_outbound(a, b)
+        self.assertEqual(report["differing_lines"], 2)
+        self.assertEqual(
+            report["first_differences"][0],
+            {"line": 2, "a": "PRIVMSG x :hi", "b": "PRIVMSG x :hello"},
+        )
+        self.assertEqual(report["sent"]["KICK"], {"a": 1, "b": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
 import unittest
+from unittest.mock import MagicMock
 
-from challenges import get_challenge, get_next_channel, verify_solution
+from irc3.utils import IrcString
+
+import challenges
+from bot import CTFGame
+from challenges import (
+    current_snapshot,
+    find_solution_channel,
+    get_challenge,
+    get_next_channel,
+    refresh_challenges,
+    verify_solution,
+)
 
 
 class TestChallenges(unittest.TestCase):
@@ -38,6 +50,75 @@ class TestChallenges(unittest.TestCase):
         self.assertIsNotNone(solution)
         self.assertIsNotNone(hint)
 
+    def test_solution_index_lookup(self):
+        """Test that the solution index finds the channel for a solution."""
+        self.assertEqual(find_solution_channel("fire"), "#challenge-1-welcome")
+        self.assertEqual(find_solution_channel("  PARIS "), "#challenge-2-binary")
+        self.assertEqual(find_solution_channel("hidden message"), "#challenge-6-stego")
+        self.assertIsNone(find_solution_channel("wrong"))
+
+    def test_normalized_answers(self):
+        """Test that width, case, spacing and punctuation do not change an answer."""
+        self.assertTrue(verify_solution("#challenge-7-final", "ctf{ 1rc_ch4ll3ng3_m4st3r }"))
+        self.assertTrue(verify_solution("#challenge-7-final", "ＣＴＦ｛１ＲＣ_ch4ll3ng3_m4st3r｝"))
+        self.assertTrue(verify_solution("#challenge-6-stego", "hidden   message"))
+        self.assertEqual(find_solution_channel("Hidden-Message!"), "#challenge-6-stego")
+        self.assertFalse(verify_solution("#challenge-6-stego", "hidden messages"))
+
+    def test_solution_index_refresh(self):
+        """Test that the solution index is rebuilt together with the challenges."""
+        old_index = challenges.SOLUTION_INDEX
+        refresh_challenges()
+        self.assertIsNot(challenges.SOLUTION_INDEX, old_index)
+        self.assertEqual(len(challenges.SOLUTION_INDEX), len(challenges.CHALLENGES))
+        self.assertEqual(find_solution_channel("ctf{1rc_ch4ll3ng3_m4st3r}"), "#challenge-7-final")
+
+
+class TestChallengeSnapshots(unittest.TestCase):
+    def test_snapshot_is_read_only(self):
+        """Test that a snapshot cannot be changed in place."""
+        snapshot = current_snapshot()
+        with self.assertRaises(TypeError):
+            snapshot.challenges["#challenge-1-welcome"] = {}
+        with self.assertRaises(TypeError):
+            snapshot.challenges["#challenge-1-welcome"]["solution"] = "water"
+
+    def test_regeneration_is_incremental(self):
+        """Test that only challenges with random elements are rebuilt."""
+        old = current_snapshot()
+        new = refresh_challenges()
+        self.assertIs(current_snapshot(), new)
+        self.assertEqual(new.version, old.version + 1)
+        self.assertIs(
+            new.challenges["#challenge-1-welcome"], old.challenges["#challenge-1-welcome"]
+        )
+        self.assertIsNot(
+            new.challenges["#challenge-5-vigenere"], old.challenges["#challenge-5-vigenere"]
+        )
+        self.assertEqual(new.channels, old.channels)
+
+    def test_old_snapshot_keeps_working(self):
+        """Test that a lookup started on an old snapshot finishes against it."""
+        old = current_snapshot()
+        refresh_challenges()
+        self.assertTrue(old.matches_solution("#challenge-2-binary", "paris"))
+        self.assertEqual(old.get_next_channel("#challenge-1-welcome"), "#challenge-2-binary")
+
+    def test_admin_regenerate_command(self):
+        """Test that only admins can regenerate the challenges from IRC."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"admins": "admin!*@trusted.example"}
+        game = CTFGame(mock_bot)
+        mock_bot.add_cron.assert_any_call("0 */6 * * *", game.regenerate_challenges)
+        version = current_snapshot().version
+        game.on_privmsg(IrcString("eve!eve@evil.example"), "PRIVMSG", "#CypherCon", "!regenerate")
+        self.assertEqual(current_snapshot().version, version)
+        game.on_privmsg(
+            IrcString("admin!admin@trusted.example"), "PRIVMSG", "#CypherCon", "!regenerate"
+        )
+        self.assertEqual(current_snapshot().version, version + 1)
+
 
 if __name__ == "__main__":
     unittest.main()
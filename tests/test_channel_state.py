@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from channel_state import ChannelStateCache, parameter_modes
+
+
+class TestChannelStateCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ChannelStateCache()
+        self.cache.joined("#chan", "bot", own=True)
+        self.cache.names("#chan", "@bot +alice bob")
+        self.cache.end_of_names("#chan")
+
+    def test_members(self):
+        """Test member tracking through JOIN, NICK, PART, KICK and QUIT."""
+        self.assertTrue(self.cache.is_member("#CHAN", "Alice"))
+        self.cache.joined("#chan", "carol", own=False)
+        self.cache.renamed("carol", "caroline")
+        self.assertTrue(self.cache.is_member("#chan", "caroline"))
+        self.assertFalse(self.cache.is_member("#chan", "carol"))
+        self.cache.parted("#chan", "alice", own=False)
+        self.cache.quit("bob")
+        self.assertEqual(self.cache.get("#chan").members, {"bot", "caroline"})
+        self.cache.parted("#chan", "bot", own=True)
+        self.assertIsNone(self.cache.get("#chan"))
+
+    def test_topic_and_modes(self):
+        """Test that TOPIC is only needed when the topic differs."""
+        self.assertTrue(self.cache.needs_topic("#chan", "hello"))
+        self.cache.topic_changed("#chan", "hello")
+        self.assertFalse(self.cache.needs_topic("#chan", "hello"))
+        self.cache.mode_changed("#chan", "+nt-n")
+        self.assertEqual(self.cache.get("#chan").modes, {"t"})
+        self.assertEqual(self.cache.stats()["avoided_topic"], 1)
+
+    def test_parameter_modes(self):
+        """Test that modes with a parameter are skipped along with it."""
+        kinds = parameter_modes({"CHANMODES": "beI,k,l,imnst", "PREFIX": "(ohv)@%+"})
+        self.assertEqual(kinds, ("beIkohv", "l"))
+        self.cache.mode_changed("#chan", "+kbml-l", "secret *!*@spam 10", kinds)
+        self.assertEqual(self.cache.get("#chan").modes, {"m"})
+        self.cache.modes_listed("#chan", "+ntl", "20", kinds)
+        self.assertEqual(self.cache.get("#chan").modes, {"n", "t"})
+
+    def test_operator_status(self):
+        """Test that a +t topic is only set while we are an operator."""
+        self.cache.modes_listed("#chan", "+nt")
+        self.assertTrue(self.cache.get("#chan").opped)
+        self.assertTrue(self.cache.needs_topic("#chan", "hello"))
+        self.cache.mode_changed("#chan", "-o+v", "BOT alice")
+        self.assertFalse(self.cache.get("#chan").opped)
+        self.assertFalse(self.cache.needs_topic("#chan", "hello"))
+        self.cache.mode_changed("#chan", "+o", "bot")
+        self.assertTrue(self.cache.needs_topic("#chan", "hello"))
+
+    def test_kick_only_members(self):
+        """Test that KICK is only needed for present members."""
+        self.assertTrue(self.cache.needs_kick("#chan", "bob"))
+        self.assertFalse(self.cache.needs_kick("#chan", "dave"))
+        self.assertFalse(self.cache.needs_kick("#other", "bob"))
+        self.assertEqual(self.cache.stats()["avoided_kick"], 2)
+
+
+class TestGameChannelState(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {}
+        self.game = CTFGame(self.mock_bot)
+        self.mask = MagicMock()
+        self.mask.nick = "TestUser"
+
+    def sent(self, command):
+        lines = [call.args[0] for call in self.mock_bot.send_line.call_args_list]
+        return [line for line in lines if line.startswith(command + " ")]
+
+    def test_kick_after_solve(self):
+        """Test that a solver is only kicked when present in the channel."""
+        bot_mask = MagicMock()
+        bot_mask.nick = "CTFGameBot"
+        self.game.track_join(bot_mask, "#challenge-1-welcome")
+        self.game.track_join(self.mask, "#challenge-1-welcome")
+        self.game.handle_challenge_solution(self.mask, "fire")
+        self.assertEqual(len(self.sent("KICK")), 1)
+        self.assertTrue(self.sent("KICK")[0].startswith("KICK #challenge-1-welcome TestUser :"))
+
+        self.game.handle_challenge_solution(self.mask, "paris")
+        self.assertEqual(len(self.sent("KICK")), 1)
+
+    def test_topic_not_resent(self):
+        """Test that a topic already set is not sent again."""
+        bot_mask = MagicMock()
+        bot_mask.nick = "CTFGameBot"
+        self.game.track_join(bot_mask, "#CypherCon")
+        self.game.track_topic("#CypherCon", "topic")
+        self.game.set_channel_topic("#CypherCon", "topic")
+        self.assertEqual(self.sent("TOPIC"), [])
+
+    def test_locked_topic_and_metrics(self):
+        """Test that a +t topic is left alone without operator status, and the count exported."""
+        bot_mask = MagicMock()
+        bot_mask.nick = "CTFGameBot"
+        self.game.track_join(bot_mask, "#CypherCon")
+        self.assertEqual(self.sent("MODE"), ["MODE #CypherCon"])
+        self.game.track_names("#CypherCon", "CTFGameBot alice")
+        self.game.track_end_of_names("#CypherCon")
+        self.game.track_channel_modes("#CypherCon", "+nt")
+        self.game.set_channel_topic("#CypherCon", "topic")
+        self.assertEqual(self.sent("TOPIC"), [])
+        self.assertIn('ctf_commands_avoided_total{command="TOPIC"} 1', self.game.metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
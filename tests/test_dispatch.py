@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from dispatch import Router
+
+
+class TestRouter(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.nick = "CTFGameBot"
+        self.router = Router(self.bot)
+        self.calls = []
+        self.router.add("query", None, "user", "submission", self.record("submission"))
+        self.router.add("query", None, "services", "nickserv", self.record("nickserv"))
+        self.router.add("channel", "#main", "user", "command", self.record("command"), "!")
+
+    def record(self, name):
+        return lambda mask, event, target, data: self.calls.append((name, data))
+
+    def mask(self, nick):
+        mask = MagicMock()
+        mask.nick = nick
+        return mask
+
+    def test_routes_to_one_handler(self):
+        """Test that each message reaches exactly one handler."""
+        self.router.dispatch(self.mask("alice"), "PRIVMSG", "CTFGameBot", "fire")
+        self.router.dispatch(self.mask("NickServ"), "NOTICE", "CTFGameBot", "Password accepted")
+        self.router.dispatch(self.mask("alice"), "PRIVMSG", "#main", "!start")
+        self.assertEqual(
+            self.calls,
+            [("submission", "fire"), ("nickserv", "Password accepted"), ("command", "!start")],
+        )
+
+    def test_drops_unrouted(self):
+        """Test that chatter, unknown channels and our own messages are dropped."""
+        self.router.dispatch(self.mask("alice"), "PRIVMSG", "#main", "hello everyone")
+        self.router.dispatch(self.mask("alice"), "PRIVMSG", "#elsewhere", "!start")
+        self.router.dispatch(self.mask("CTFGameBot"), "PRIVMSG", "#main", "!start")
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.router.stats()["dropped"], 3)
+
+
+class TestGameRouting(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {}
+        self.game = CTFGame(self.mock_bot)
+        self.mask = MagicMock()
+        self.mask.nick = "TestUser"
+
+    def test_chatter_is_not_logged(self):
+        """Test that main channel chatter is dropped before logging."""
+        self.mock_bot.log.reset_mock()
+        self.game.on_privmsg(self.mask, "PRIVMSG", "#CypherCon", "hi all")
+        self.mock_bot.log.info.assert_not_called()
+        self.mock_bot.log.log.assert_not_called()
+        self.mock_bot.send_line.assert_not_called()
+
+    def test_private_submission(self):
+        """Test that a private message is handled as a submission."""
+        self.game.on_privmsg(self.mask, "PRIVMSG", "CTFGameBot", "fire")
+        self.assertTrue(self.game.progress.has_solved("TestUser", "#challenge-1-welcome"))
+        self.assertEqual(self.game.router.stats()["submission"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import logging
+import unittest
+
+from challenges import verify_solution
+from eventlog import EventLogger, Fields, parse_sample_rates, setup_queue_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Loud:
+    """Counts how often it gets formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "loud"
+
+
+class TestEventLogger(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(f"test.eventlog.{self.id()}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+        self.log = EventLogger(self.logger, "chatter=3")
+
+    def test_fields_format(self):
+        """Test that fields render as key=value, quoting values with spaces."""
+        self.assertEqual(str(Fields({"nick": "alice", "text": "a b"})), 'nick=alice text="a b"')
+
+    def test_parse_sample_rates(self):
+        """Test parsing the sampling configuration."""
+        self.assertEqual(
+            parse_sample_rates("chatter=100, join=10,bad"), {"chatter": 100, "join": 10}
+        )
+
+    def test_disabled_level_is_not_formatted(self):
+        """Test that records below the level never format their arguments."""
+        loud = Loud()
+        self.log.debug("value %s", loud)
+        self.log.event("solve", level=logging.DEBUG, value=loud)
+        self.assertEqual(loud.formatted, 0)
+        self.assertEqual(self.handler.messages, [])
+
+    def test_event_sampling(self):
+        """Test that sampled events log one in N occurrences."""
+        for i in range(7):
+            self.log.event("chatter", n=i)
+        self.log.event("solve", nick="alice")
+        self.assertEqual(
+            self.handler.messages,
+            [
+                "chatter n=0 sampled=3",
+                "chatter n=3 sampled=3",
+                "chatter n=6 sampled=3",
+                "solve nick=alice",
+            ],
+        )
+
+    def test_queue_logging(self):
+        """Test that records still reach the original handler through the queue."""
+        stop = setup_queue_logging(self.logger.name)
+        self.log.info("hello %s", "world")
+        stop()
+        self.assertEqual(self.handler.messages, ["hello world"])
+        self.assertNotIn(self.handler, self.logger.handlers)
+
+    def test_queue_per_logger(self):
+        """Test that each logger's records only reach that logger's handlers, once."""
+        other = logging.getLogger(f"{self.logger.name}.raw")
+        other.propagate = False
+        raw = ListHandler()
+        other.addHandler(raw)
+        stop = setup_queue_logging(self.logger.name, other.name)
+        self.log.info("plugin")
+        other.info("raw line")
+        stop()
+        self.assertEqual(self.handler.messages, ["plugin"])
+        self.assertEqual(raw.messages, ["raw line"])
+
+
+class TestChallengeLogging(unittest.TestCase):
+    def test_verify_solution_is_quiet(self):
+        """Test that verifying a solution no longer prints the expected answer."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            verify_solution("#challenge-1-welcome", "water")
+        self.assertEqual(output.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
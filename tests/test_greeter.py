@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+from greeter import JoinAggregator, format_names
+
+
+class TestFormatNames(unittest.TestCase):
+    def test_format_names(self):
+        """Test combined greeting names."""
+        self.assertEqual(format_names(["alice"]), "alice")
+        self.assertEqual(format_names(["alice", "bob"]), "alice and bob")
+        self.assertEqual(format_names(["alice", "bob", "carol"]), "alice, bob and carol")
+        nicks = [f"user{i}" for i in range(41)]
+        self.assertEqual(format_names(nicks, max_names=2), "user0, user1 and 39 others")
+
+
+class TestJoinAggregator(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.now = 0.0
+
+    def flush(self, channel, nicks):
+        self.batches.append((channel, list(nicks)))
+
+    def clock(self):
+        return self.now
+
+    def test_batches_joins_in_window(self):
+        """Test that joins inside one window produce a single greeting."""
+        greeter = JoinAggregator(self.flush, window=0.01, clock=self.clock)
+
+        async def go():
+            for nick in ("alice", "bob", "carol"):
+                greeter.add("#chan", nick)
+            greeter.add("#other", "dave")
+            await asyncio.sleep(0.05)
+
+        asyncio.run(go())
+        self.assertEqual(
+            sorted(self.batches), [("#chan", ["alice", "bob", "carol"]), ("#other", ["dave"])]
+        )
+        self.assertEqual(greeter.stats()["messages_saved"], 2 * 4 - 2 - 4)
+
+    def test_recently_greeted_suppressed(self):
+        """Test that a nick is not greeted again within the cooldown."""
+        greeter = JoinAggregator(self.flush, cooldown=60, clock=self.clock)
+        self.assertTrue(greeter.add("#chan", "alice"))
+        self.assertFalse(greeter.add("#chan", "Alice"))
+        self.now = 61
+        self.assertTrue(greeter.add("#chan", "alice"))
+        self.assertEqual(len(self.batches), 2)
+        self.assertEqual(greeter.stats()["suppressed"], 1)
+
+    def test_max_pending(self):
+        """Test that joins beyond the per-window cap are suppressed."""
+        greeter = JoinAggregator(self.flush, window=0.01, max_pending=2, clock=self.clock)
+
+        async def go():
+            results = [greeter.add("#chan", nick) for nick in ("a", "b", "c")]
+            await asyncio.sleep(0.05)
+            return results
+
+        self.assertEqual(asyncio.run(go()), [True, True, False])
+        self.assertEqual(self.batches, [("#chan", ["a", "b"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
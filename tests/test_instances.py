@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from challenges import current_snapshot, refresh_challenges, vigenere_encrypt
+from instances import PlayerInstances
+
+VIGENERE = "#challenge-5-vigenere"
+
+
+class TestPlayerInstances(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = current_snapshot()
+        self.instances = PlayerInstances("secret", max_size=2)
+
+    def test_deterministic_variants(self):
+        """Test that variants depend only on the secret, the channel, the player and the round."""
+        alice = self.instances.get(self.snapshot, VIGENERE, "Alice")
+        again = PlayerInstances("secret").get(self.snapshot, VIGENERE, "alice")
+        bob = self.instances.get(self.snapshot, VIGENERE, "bob")
+        other = PlayerInstances("other").get(self.snapshot, VIGENERE, "alice")
+        self.assertEqual(alice.solution, again.solution)
+        self.assertNotEqual(alice.solution, bob.solution)
+        self.assertNotEqual(alice.solution, other.solution)
+
+    def test_regeneration_changes_variants(self):
+        """Test that regenerating the challenges gives every player a new variant."""
+        old = self.instances.get(self.snapshot, VIGENERE, "alice")
+        new = self.instances.get(refresh_challenges(), VIGENERE, "alice")
+        self.assertNotEqual(old.solution, new.solution)
+        # The old snapshot keeps its round, so a lookup started on it is unchanged
+        self.assertEqual(
+            self.instances.get(self.snapshot, VIGENERE, "alice").solution, old.solution
+        )
+
+    def test_previous_round_until_fetched(self):
+        """Test that the last round's answer counts until the player is sent the new variant."""
+        old = self.instances.fetch(self.snapshot, VIGENERE, "alice")
+        snapshot = refresh_challenges()
+        self.assertTrue(self.instances.matches(snapshot, VIGENERE, "alice", old.solution))
+        new = self.instances.challenge_text(snapshot, VIGENERE, "alice")
+        self.assertNotEqual(new, old.challenge)
+        self.assertFalse(self.instances.matches(snapshot, VIGENERE, "alice", old.solution))
+        solution = self.instances.get(snapshot, VIGENERE, "alice").solution
+        self.assertTrue(self.instances.matches(snapshot, VIGENERE, "alice", solution))
+        # Only the round just replaced is remembered
+        older = self.instances.get(snapshot, VIGENERE, "bob").solution
+        snapshot = refresh_challenges()
+        self.assertTrue(self.instances.matches(snapshot, VIGENERE, "bob", older))
+        snapshot = refresh_challenges()
+        self.assertFalse(self.instances.matches(snapshot, VIGENERE, "bob", older))
+
+    def test_key_is_in_the_text(self):
+        """Test that the text shows the real key and the matching ciphertext."""
+        text = self.instances.get(self.snapshot, VIGENERE, "alice").challenge
+        self.assertNotIn("{vigenere_key}", text)
+        key = text.split("The key is: ")[1].strip()
+        ciphertext = text.splitlines()[2]
+        solution = self.instances.get(self.snapshot, VIGENERE, "alice").solution
+        self.assertEqual(vigenere_encrypt(solution, key), ciphertext)
+
+    def test_shared_challenges(self):
+        """Test that challenges without variants fall back to the snapshot."""
+        self.assertIsNone(self.instances.get(self.snapshot, "#challenge-1-welcome", "alice"))
+        self.assertTrue(self.instances.matches(self.snapshot, "#challenge-1-welcome", "a", "fire"))
+
+    def test_bounded_cache(self):
+        """Test that the cache keeps only the most recently used players."""
+        for player in ("a", "b", "a", "c"):
+            self.instances.get(self.snapshot, VIGENERE, player)
+        self.assertEqual(list(self.instances.cache), [("a", VIGENERE), ("c", VIGENERE)])
+        self.assertEqual(self.instances.stats(), {"size": 2, "hits": 1, "misses": 3})
+
+
+class TestPersonalSolutions(unittest.TestCase):
+    def test_only_own_solution_counts(self):
+        """Test that a player cannot submit someone else's answer."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"instance_secret": "secret"}
+        game = CTFGame(mock_bot)
+        snapshot = current_snapshot()
+        for player in ("alice", "bob"):
+            for channel in snapshot.channels[:4]:
+                game.progress.record_solve(player, channel)
+        alice = MagicMock()
+        alice.nick = "alice"
+        alice.host = "alice@example.com"
+        bob_answer = game.instances.get(snapshot, VIGENERE, "bob").solution
+        game.on_privmsg(alice, "PRIVMSG", "CTFGameBot", bob_answer)
+        game.on_privmsg(alice, "PRIVMSG", "CTFGameBot", snapshot.challenges[VIGENERE]["solution"])
+        self.assertFalse(game.progress.has_solved("alice", VIGENERE))
+        alice_answer = game.instances.get(snapshot, VIGENERE, "alice").solution
+        game.on_privmsg(alice, "PRIVMSG", "CTFGameBot", alice_answer)
+        self.assertTrue(game.progress.has_solved("alice", VIGENERE))
+
+
+if __name__ == "__main__":
+    unittest.main()
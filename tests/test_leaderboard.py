@@ -0,0 +1,114 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from leaderboard import FenwickTree, Leaderboard
+
+
+class TestFenwickTree(unittest.TestCase):
+    def test_prefix_and_find(self):
+        """Test prefix counts and k-th lookups, including after growing."""
+        tree = FenwickTree(4)
+        flags = [1, 0, 1, 1]
+        for index, flag in enumerate(flags):
+            if flag:
+                tree.add(index, 1)
+        self.assertEqual(tree.prefix(3), 2)
+        self.assertEqual([tree.find(k) for k in range(3)], [0, 2, 3])
+        flags.append(1)
+        tree.grow(flags)
+        self.assertEqual(tree.size, 8)
+        self.assertEqual(tree.find(3), 4)
+
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        self.board = Leaderboard()
+
+    def test_ranking_and_tie_breaks(self):
+        """Test that more solves rank first and earlier solvers win ties."""
+        self.board.record("alice", 1)
+        self.board.record("bob", 1)
+        self.board.record("carol", 2)
+        self.board.record("bob", 2)
+        self.assertEqual(self.board.rank("carol"), (1, 2))
+        self.assertEqual(self.board.rank("BOB"), (2, 2))
+        self.assertEqual(self.board.rank("alice"), (3, 1))
+        self.assertIsNone(self.board.rank("dave"))
+        self.assertEqual(self.board.top(5), [("carol", 2), ("bob", 2), ("alice", 1)])
+
+    def test_matches_sorting(self):
+        """Test random solves against a full sort."""
+        rng = random.Random(7)
+        solved = {}
+        reached = {}
+        for step in range(2000):
+            player = f"p{rng.randrange(150)}"
+            solved[player] = solved.get(player, 0) + 1
+            reached[player] = step
+            self.board.record(player, solved[player])
+        expected = sorted(solved, key=lambda p: (-solved[p], reached[p]))
+        self.assertEqual([nick for nick, _ in self.board.top(20)], expected[:20])
+        for rank, player in enumerate(expected, 1):
+            self.assertEqual(self.board.rank(player), (rank, solved[player]))
+
+    def test_top_cache_invalidation(self):
+        """Test that the cached top text only changes when the top n changes."""
+        renders = []
+
+        def render(top):
+            renders.append(top)
+            return repr(top)
+
+        for i in range(5):
+            self.board.record(f"p{i}", 2)
+        first = self.board.top_text(3, render)
+        self.assertEqual(self.board.top_text(3, render), first)
+        self.board.record("late", 1)  # ranks 6th, the top 3 is unchanged
+        self.board.top_text(3, render)
+        self.assertEqual(len(renders), 1)
+        self.board.record("late", 3)  # now first
+        self.assertIn("late", self.board.top_text(3, render))
+        self.assertEqual(len(renders), 2)
+
+    def test_load_from_progress(self):
+        """Test rebuilding from stored solves, ordered by last solve time."""
+        self.board.load(
+            {
+                "alice": {"#a": 1.0, "#b": 5.0},
+                "bob": {"#a": 2.0, "#b": 3.0},
+                "carol": {"#a": 4.0},
+            }
+        )
+        self.assertEqual(self.board.top(3), [("bob", 2), ("alice", 2), ("carol", 1)])
+
+
+class TestLeaderboardCommands(unittest.TestCase):
+    def test_top_and_rank(self):
+        """Test the !top and !rank commands after a solve."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "Alice"
+        mask.host = "alice@example.com"
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "fire")
+        mock_bot.send_line.reset_mock()
+        game.on_privmsg(mask, "PRIVMSG", "#CypherCon", "!top 3")
+        game.on_privmsg(mask, "PRIVMSG", "#CypherCon", "!top ²")
+        game.on_privmsg(mask, "PRIVMSG", "#CypherCon", "!rank")
+        lines = [call.args[0] for call in mock_bot.send_line.call_args_list]
+        self.assertEqual(
+            lines,
+            [
+                "PRIVMSG #CypherCon :🏆 Top 1: 1. Alice (1)",
+                "PRIVMSG #CypherCon :🏆 Top 1: 1. Alice (1)",
+                "PRIVMSG #CypherCon :🏅 Alice, you are #1 of 1 with 1 challenges solved.",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
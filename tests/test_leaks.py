@@ -0,0 +1,123 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from challenges import current_snapshot
+from leaks import AhoCorasick, LeakDetector
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_overlapping_matches(self):
+        """Test that overlapping and nested patterns are all found."""
+        matcher = AhoCorasick(["he", "she", "his", "hers"])
+        found = sorted(
+            (start, matcher.patterns[index]) for start, _, index in matcher.finditer("ushers")
+        )
+        self.assertEqual(found, [(1, "she"), (2, "he"), (2, "hers")])
+
+    def test_matches_naive_search(self):
+        """Test random texts against a plain substring search."""
+        rng = random.Random(3)
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(20)]
+        matcher = AhoCorasick(patterns)
+        for _ in range(50):
+            text = "".join(rng.choice("abcd") for _ in range(30))
+            expected = {
+                (start, index)
+                for index, pattern in enumerate(patterns)
+                for start in range(len(text))
+                if text.startswith(pattern, start)
+            }
+            found = {(start, index) for start, _, index in matcher.finditer(text)}
+            self.assertEqual(found, expected)
+
+
+class TestLeakDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = LeakDetector()
+        self.snapshot = current_snapshot()
+
+    def test_whole_words_only(self):
+        """Test that answers only count as leaks when they stand alone."""
+        self.assertEqual(
+            self.detector.scan(self.snapshot, "the answer is HIDDEN MESSAGE!"),
+            ["#challenge-6-stego"],
+        )
+        self.assertEqual(self.detector.scan(self.snapshot, "no hiddenmessages here"), [])
+        self.assertEqual(self.detector.scan(self.snapshot, "hello all"), [])
+
+    def test_spaced_out_answers(self):
+        """Test that spacing or punctuating an answer out does not hide it."""
+        self.assertEqual(
+            self.detector.scan(self.snapshot, "try h-i-d-d-e-n m.e.s.s.a.g.e"),
+            ["#challenge-6-stego"],
+        )
+        self.assertEqual(
+            self.detector.scan(self.snapshot, "ctf { 1rc ch4ll3ng3 m4st3r }"),
+            ["#challenge-7-final"],
+        )
+
+    def test_short_answers_are_skipped(self):
+        """Test that short answers, common words in chat, are not leaks."""
+        for text in ("we sat around the fire", "paris in the spring", "b l a z e"):
+            self.assertEqual(self.detector.scan(self.snapshot, text), [])
+        self.assertEqual(
+            LeakDetector(min_length=4).scan(self.snapshot, "b l a z e"), ["#challenge-4-timed"]
+        )
+
+    def test_personal_answers_are_skipped(self):
+        """Test that shared text of per-player challenges is not a leak."""
+        solution = self.snapshot.challenges["#challenge-5-vigenere"]["solution"]
+        self.assertEqual(self.detector.scan(self.snapshot, solution), [])
+
+
+class TestLeakHandling(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {"leak_actions": "redact,warn,burn"}
+        self.game = CTFGame(self.mock_bot)
+        self.mask = MagicMock()
+        self.mask.nick = "Leaker"
+        self.mask.host = "leaker@example.com"
+
+    def test_chatter_gets_no_reply(self):
+        """Test that ordinary chatter in a challenge channel is ignored."""
+        self.game.on_privmsg(self.mask, "PRIVMSG", "#challenge-1-welcome", "is it water?")
+        self.mock_bot.send_line.assert_not_called()
+
+    def test_leak_is_redacted_warned_and_burned(self):
+        """Test the configured actions on a leaked answer."""
+        self.game.on_cap("ACK", "message-tags draft/message-redaction")
+        self.game.on_privmsg(
+            self.mask, "PRIVMSG", "#CypherCon", "hidden message", tags="msgid=abc123;time=2024"
+        )
+        lines = [call.args[0] for call in self.mock_bot.send_line.call_args_list]
+        self.assertEqual(lines[0], "REDACT #CypherCon abc123 :Answer removed")
+        self.assertTrue(lines[1].startswith("PRIVMSG Leaker :🤫 Leaker"))
+        self.assertTrue(self.game.leaks.is_burned("leaker", "#challenge-6-stego"))
+        # The burned answer no longer solves the challenge for the leaker
+        for channel in current_snapshot().channels[:5]:
+            self.game.progress.record_solve("leaker", channel)
+        self.game.on_privmsg(self.mask, "PRIVMSG", "CTFGameBot", "hidden message")
+        self.assertFalse(self.game.progress.has_solved("leaker", "#challenge-6-stego"))
+
+    def test_no_redaction_without_caps(self):
+        """Test that leaks are not redacted until the server acknowledges redaction."""
+        self.game.server_ready()
+        self.assertIn(
+            "CAP REQ :message-tags draft/message-redaction",
+            [call.args[0] for call in self.mock_bot.send_line.call_args_list],
+        )
+        self.mock_bot.send_line.reset_mock()
+        self.game.on_cap("NAK", "message-tags draft/message-redaction")
+        self.game.on_privmsg(
+            self.mask, "PRIVMSG", "#CypherCon", "hidden message", tags="msgid=abc123"
+        )
+        lines = [call.args[0] for call in self.mock_bot.send_line.call_args_list]
+        self.assertFalse(any(line.startswith("REDACT") for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import asyncio
+import unittest
+
+from benchmarks.loadtest import default_stages, percentile, run_load
+
+
+class TestPercentile(unittest.TestCase):
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+
+class TestLoadHarness(unittest.TestCase):
+    def test_small_run(self):
+        """Test that simulated players solve their stages against the fake server."""
+        report = asyncio.run(
+            run_load(players=3, join_rate=50, submit_interval=0.05, stages=default_stages(3))
+        )
+        self.assertEqual(report["failures"], 0)
+        self.assertEqual(report["solves"], 9)
+        self.assertIsNotNone(report["latency_p99"])
+        self.assertGreater(report["bot_lines_per_sec"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
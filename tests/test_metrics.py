@@ -0,0 +1,129 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from metrics import LoopLagMonitor, MetricsServer, Registry
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_exposition(self):
+        """Test that counters render with HELP, TYPE and escaped labels."""
+        counter = self.registry.counter("ctf_test_total", "A test counter", ["event"])
+        counter.inc("PRIVMSG")
+        counter.inc("PRIVMSG")
+        counter.inc('say "hi"')
+        text = self.registry.render()
+        self.assertIn("# HELP ctf_test_total A test counter\n", text)
+        self.assertIn("# TYPE ctf_test_total counter\n", text)
+        self.assertIn('ctf_test_total{event="PRIVMSG"} 2\n', text)
+        self.assertIn('ctf_test_total{event="say \\"hi\\""} 1\n', text)
+
+    def test_callback_gauge(self):
+        """Test that callback metrics are read on scrape and skip missing values."""
+        depth = {"solve": 3}
+        self.registry.gauge(
+            "ctf_depth", "Queue depth", ["lane"], callback=lambda: {("solve",): depth["solve"]}
+        )
+        self.registry.gauge("ctf_ready", "Not ready yet", callback=lambda: None)
+        depth["solve"] = 5
+        text = self.registry.render()
+        self.assertIn('ctf_depth{lane="solve"} 5\n', text)
+        self.assertNotIn("\nctf_ready ", text)
+
+    def test_histogram_buckets(self):
+        """Test that histogram buckets are cumulative and end with +Inf."""
+        histogram = self.registry.histogram("ctf_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        text = self.registry.render()
+        self.assertIn('ctf_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('ctf_seconds_bucket{le="1"} 3\n', text)
+        self.assertIn('ctf_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("ctf_seconds_sum 6.05\n", text)
+        self.assertIn("ctf_seconds_count 4\n", text)
+
+
+class TestEndpoint(unittest.TestCase):
+    def test_scrape_over_http(self):
+        """Test that the endpoint serves the registry and 404s other paths."""
+        registry = Registry()
+        registry.counter("ctf_test_total", "A test counter").inc()
+
+        async def scrape(path):
+            server = MetricsServer(registry, port=0)
+            port = await server.start()
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                response = await reader.read()
+                writer.close()
+                return response.decode()
+            finally:
+                await server.stop()
+
+        response = asyncio.run(scrape("/metrics"))
+        self.assertTrue(response.startswith("HTTP/1.0 200 OK"))
+        self.assertIn("ctf_test_total 1\n", response)
+        self.assertTrue(asyncio.run(scrape("/nope")).startswith("HTTP/1.0 404"))
+
+    def test_loop_lag(self):
+        """Test that a blocked event loop shows up as lag."""
+        histogram = Registry().histogram("lag", "Loop lag")
+        monitor = LoopLagMonitor(histogram, interval=0.01)
+
+        async def block():
+            monitor.start()
+            await asyncio.sleep(0)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+            monitor.stop()
+
+        asyncio.run(block())
+        counts, total = histogram.values[()]
+        self.assertGreaterEqual(total, 0.03)
+
+
+class TestGameMetrics(unittest.TestCase):
+    def test_solve_metrics(self):
+        """Test that a solve is counted per challenge and its verification timed."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "TestUser"
+        mask.host = "user@example.com"
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "fire")
+        text = game.metrics.render()
+        self.assertIn('ctf_messages_in_total{event="PRIVMSG"} 1\n', text)
+        self.assertIn('ctf_solves_total{channel="#challenge-1-welcome"} 1\n', text)
+        self.assertIn('ctf_verification_seconds_count{source="query"} 1\n', text)
+        self.assertIn('ctf_routed_total{route="submission"} 1\n', text)
+        self.assertIn('ctf_outbound_max_wait_seconds{lane="solve"} 0\n', text)
+
+    def test_greeter_metrics(self):
+        """Test that greeted, batched and suppressed joins are exported."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "TestUser"
+        mask.host = "user@example.com"
+        game.handle_join(mask, "#CypherCon")
+        game.handle_join(mask, "#CypherCon")
+        text = game.metrics.render()
+        self.assertIn("ctf_joins_total 2\n", text)
+        self.assertIn("ctf_greeter_batches_total 1\n", text)
+        self.assertIn("ctf_greeter_suppressed_total 1\n", text)
+        self.assertIn("ctf_greeter_messages_saved_total 2\n", text)
+        self.assertIn("ctf_greeter_pending 0\n", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import random
+import unittest
+
+from challenges import ChallengeSnapshot
+from nearmiss import EXACT, NEAR, WRONG, DeletionIndex, NearMisses, deletions, edit_distance
+
+
+def make_snapshot():
+    return ChallengeSnapshot(
+        {
+            "#one": {"challenge": "", "solution": "CTF{1rc_ch4ll3ng3}", "hint": ""},
+            "#two": {"challenge": "", "solution": "hidden message", "hint": ""},
+            "#three": {"challenge": "", "solution": "fire", "hint": ""},
+            "#four": {"challenge": "", "solution": "hidden.*", "hint": "", "verifier": "regex"},
+        }
+    )
+
+
+class TestEditDistance(unittest.TestCase):
+    def test_distance(self):
+        """Test the edit distance of a few known pairs."""
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+        self.assertEqual(edit_distance("", "abc"), 3)
+        self.assertEqual(edit_distance("flag", "flag"), 0)
+
+    def test_limit(self):
+        """Test that a bounded distance stops at limit + 1."""
+        self.assertEqual(edit_distance("kitten", "sitting", 1), 2)
+        self.assertEqual(edit_distance("a", "abcdefgh", 2), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 3), 3)
+
+
+class TestDeletionIndex(unittest.TestCase):
+    def test_search_matches_scan(self):
+        """Test that a lookup finds the same words as comparing with every word."""
+        rng = random.Random(7)
+        words = {"".join(rng.choice("abcd") for _ in range(rng.randint(3, 8))) for _ in range(300)}
+        limits = {word: rng.randint(0, 2) for word in words}
+        index = DeletionIndex()
+        for word in words:
+            index.add(word, word.upper(), limits[word])
+        self.assertEqual(len(index), len(words))
+        for query in ("abcd", "aaaa", "dcbadcba", "bb", "abcdabcdabcdabcd"):
+            expected = {w for w in words if edit_distance(query, w) <= limits[w]}
+            found = index.search(query)
+            self.assertEqual({word for _, word, _ in found}, expected)
+            for distance, word, values in found:
+                self.assertEqual(distance, edit_distance(query, word))
+                self.assertEqual(values, [word.upper()])
+
+    def test_deletions(self):
+        """Test the strings left after deleting characters."""
+        self.assertEqual(deletions("abc", 1), {"abc", "ab", "ac", "bc"})
+        self.assertEqual(len(deletions("abcd", 2)), 1 + 4 + 6)
+
+
+class TestNearMisses(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = make_snapshot()
+        self.near = NearMisses()
+        self.channels = self.snapshot.channels
+
+    def test_classify(self):
+        """Test that answers are exact, near misses or wrong."""
+        classify = self.near.classify
+        self.assertEqual(
+            classify(self.snapshot, "ctf{ 1RC_ch4ll3ng3 }", self.channels), (EXACT, "#one")
+        )
+        self.assertEqual(
+            classify(self.snapshot, "ctf{1rc_ch4ll3ng}", self.channels), (NEAR, "#one")
+        )
+        self.assertEqual(classify(self.snapshot, "hiden message", self.channels), (NEAR, "#two"))
+        self.assertEqual(classify(self.snapshot, "something else", self.channels), (WRONG, None))
+        self.assertEqual(self.near.stats(), {"checked": 4, "near": 2, "solutions": 3})
+
+    def test_short_answers(self):
+        """Test that short answers are only ever exact or wrong."""
+        self.assertEqual(
+            self.near.classify(self.snapshot, "FIRE", self.channels), (EXACT, "#three")
+        )
+        self.assertEqual(self.near.classify(self.snapshot, "fira", self.channels), (WRONG, None))
+
+    def test_only_given_channels(self):
+        """Test that only the channels a player can work on are considered."""
+        self.assertEqual(
+            self.near.classify(self.snapshot, "hiden message", ["#one", "#three"]), (WRONG, None)
+        )
+        self.assertEqual(
+            self.near.classify(self.snapshot, "hidden.*", self.channels), (WRONG, None)
+        )
+
+    def test_personal(self):
+        """Test that a player's own variants are compared too."""
+        personal = [("#five", "attackatdawn")]
+        self.assertEqual(
+            self.near.classify(self.snapshot, "attack at dusk", ["#five"], personal), (WRONG, None)
+        )
+        self.assertEqual(
+            self.near.classify(self.snapshot, "Attack at dawm", ["#five"], personal),
+            (NEAR, "#five"),
+        )
+
+    def test_disabled(self):
+        """Test that a distance of 0 turns near misses off."""
+        near = NearMisses(max_distance=0)
+        self.assertEqual(
+            near.classify(self.snapshot, "hiden message", self.channels), (WRONG, None)
+        )
+        self.assertEqual(near.classify(self.snapshot, "hidden message", self.channels)[0], EXACT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from outbound import OutboundScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        """Test that the bucket allows a burst and then refills at its rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        for _ in range(3):
+            self.assertEqual(bucket.delay(), 0.0)
+            bucket.consume()
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        clock.now = 0.5
+        self.assertEqual(bucket.delay(), 0.0)
+
+
+class TestOutboundScheduler(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.sent = []
+        self.bot.send_line.side_effect = lambda data, nowait=False: self.sent.append(
+            tuple(data[len("PRIVMSG ") :].split(" :", 1))
+        )
+
+    def run_async(self, scheduler, sends):
+        async def go():
+            for args, lane in sends:
+                scheduler.send(*args, lane=lane)
+            await scheduler.flush()
+
+        asyncio.run(go())
+
+    def test_without_loop_writes_directly(self):
+        """Test that messages are written straight through without an event loop."""
+        scheduler = OutboundScheduler(self.bot)
+        scheduler.send("alice", "line one\nline two", lane="welcome")
+        self.assertEqual(self.sent, [("alice", "line one"), ("alice", "line two")])
+
+    def test_priority_lanes(self):
+        """Test that solve traffic is written before queued welcome broadcasts."""
+        scheduler = OutboundScheduler(self.bot, rate=1000, burst=100)
+        self.run_async(
+            scheduler,
+            [
+                (("#chan", "welcome bob"), "welcome"),
+                (("#chan", "chatter"), "chatter"),
+                (("alice", "solved!"), "solve"),
+            ],
+        )
+        self.assertEqual(self.sent[0], ("alice", "solved!"))
+        self.assertEqual(self.sent[-1], ("#chan", "chatter"))
+
+    def test_commands_go_first(self):
+        """Test that raw commands are paced on the control lane, ahead of every message."""
+        lines = []
+        self.bot.send_line.side_effect = lambda data, nowait=False: lines.append(data)
+        scheduler = OutboundScheduler(self.bot, rate=1000, burst=100)
+
+        async def go():
+            scheduler.send("alice", "solved!", lane="solve")
+            scheduler.send_command("KICK #chan alice :Solved")
+            scheduler.send_command("JOIN #next")
+            await scheduler.flush()
+
+        asyncio.run(go())
+        self.assertEqual(
+            lines, ["KICK #chan alice :Solved", "JOIN #next", "PRIVMSG alice :solved!"]
+        )
+        self.assertEqual(scheduler.stats()["control"]["sent"], 2)
+
+    def test_coalescing(self):
+        """Test that queued messages to the same target are merged, repeated lines included."""
+        scheduler = OutboundScheduler(self.bot, rate=1000, burst=100)
+        self.run_async(
+            scheduler,
+            [(("bob", "hello"), "reply"), (("bob", "hello"), "reply"), (("bob", "bye"), "reply")],
+        )
+        self.assertEqual(self.sent, [("bob", "hello"), ("bob", "hello"), ("bob", "bye")])
+        self.assertEqual(scheduler.stats()["reply"]["coalesced"], 2)
+
+    def test_bounded_queue_drops(self):
+        """Test that a full lane drops new messages and counts them."""
+        scheduler = OutboundScheduler(self.bot, rate=1000, burst=100, max_queue=2)
+
+        async def go():
+            self.assertTrue(scheduler.send("a", "one\ntwo", lane="chatter"))
+            self.assertFalse(scheduler.send("b", "three", lane="chatter"))
+            self.assertEqual(scheduler.depth("chatter"), 2)
+            await scheduler.flush()
+
+        asyncio.run(go())
+        stats = scheduler.stats()["chatter"]
+        self.assertEqual(stats["dropped"], 1)
+        self.assertEqual(stats["sent"], 2)
+        self.assertEqual(stats["depth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import challenges
+import packs
+from bot import CTFGame
+from challenges import ChallengeSnapshot, current_snapshot
+from packs import PackError, compile_packs, load_packs
+
+TOML_PACK = """
+[[challenges]]
+channel = "#pack-b"
+challenge = "Second"
+solution = "beta"
+requires = ["#pack-a"]
+
+[[challenges]]
+channel = "#pack-c"
+challenge = "Third"
+solution = "gamma"
+requires = ["#pack-a"]
+
+[[challenges]]
+channel = "#pack-d"
+challenge = "Fourth"
+solution = "delta"
+requires = ["#pack-b", "#pack-c"]
+"""
+
+
+class TestPacks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+        self.original = current_snapshot()
+
+    def tearDown(self):
+        challenges.install_snapshot(self.original)
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        with open(os.path.join(self.dir, name), "w", encoding="utf-8") as pack:
+            pack.write(content if isinstance(content, str) else json.dumps(content))
+
+    def test_linear_json_pack(self):
+        """Test that challenges without requires follow the previous one in the pack."""
+        self.write(
+            "a.json",
+            {
+                "challenges": [
+                    {"channel": "#one", "challenge": "1", "solution": "a"},
+                    {"channel": "#two", "challenge": "2", "solution": "b", "hint": "h"},
+                ]
+            },
+        )
+        self.write("notes.txt", "ignored")
+        loaded, files = load_packs(self.dir)
+        self.assertEqual(files, 1)
+        self.assertEqual(loaded["#one"]["requires"], [])
+        self.assertEqual(loaded["#two"]["requires"], ["#one"])
+
+    @unittest.skipIf(packs.tomllib is None, "no TOML parser available")
+    def test_branching_dag(self):
+        """Test branching and joining prerequisites across JSON and TOML packs."""
+        self.write(
+            "1-start.json",
+            {"challenges": [{"channel": "#pack-a", "challenge": "First", "solution": "alpha"}]},
+        )
+        self.write("2-more.toml", TOML_PACK)
+        snapshot, report = compile_packs(self.dir, ChallengeSnapshot({}))
+        self.assertEqual(report["packs"], 2)
+        self.assertEqual(report["challenges"], 4)
+        self.assertGreaterEqual(report["load_seconds"], 0)
+        self.assertEqual(snapshot.unlocks["#pack-a"], ("#pack-b", "#pack-c"))
+        self.assertEqual(snapshot.available({}), ["#pack-a"])
+        self.assertEqual(snapshot.available({"#pack-a": 1}), ["#pack-b", "#pack-c"])
+        self.assertEqual(snapshot.available({"#pack-a": 1, "#pack-b": 2}), ["#pack-c"])
+        self.assertEqual(
+            snapshot.available({"#pack-a": 1, "#pack-b": 2, "#pack-c": 3}), ["#pack-d"]
+        )
+
+    def test_schema_errors(self):
+        """Test that invalid packs are rejected with the file and challenge named."""
+        cases = [
+            {"challenges": [{"channel": "#x", "challenge": "1"}]},
+            {"challenges": [{"channel": "#x", "challenge": "1", "solution": "a", "prize": 5}]},
+            {"challenges": [{"channel": "#x", "challenge": "1", "solution": 5}]},
+            {"challenges": [{"channel": "x", "challenge": "1", "solution": "a"}]},
+            {"challenge": []},
+        ]
+        for case in cases:
+            self.write("bad.json", case)
+            with self.assertRaises(PackError) as raised:
+                load_packs(self.dir)
+            self.assertIn("bad.json", str(raised.exception))
+        self.write("bad.json", "{not json")
+        with self.assertRaises(PackError):
+            load_packs(self.dir)
+
+    def test_graph_errors(self):
+        """Test that unknown prerequisites and cycles are rejected."""
+        self.write(
+            "bad.json",
+            {
+                "challenges": [
+                    {"channel": "#x", "challenge": "1", "solution": "a", "requires": ["#y"]}
+                ]
+            },
+        )
+        with self.assertRaisesRegex(PackError, "unknown challenge #y"):
+            compile_packs(self.dir, ChallengeSnapshot({}))
+        self.write(
+            "bad.json",
+            {
+                "challenges": [
+                    {"channel": "#x", "challenge": "1", "solution": "a", "requires": ["#y"]},
+                    {"channel": "#y", "challenge": "2", "solution": "b"},
+                ]
+            },
+        )
+        with self.assertRaisesRegex(PackError, "cycle"):
+            compile_packs(self.dir, ChallengeSnapshot({}))
+
+    def test_bot_plays_a_branch(self):
+        """Test that a pack branch unlocked by the first challenge can be solved."""
+        self.write(
+            "side.json",
+            {
+                "challenges": [
+                    {
+                        "channel": "#side-quest",
+                        "challenge": "Side",
+                        "solution": "detour",
+                        "requires": ["#challenge-1-welcome"],
+                    }
+                ]
+            },
+        )
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"packs_dir": self.dir}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "Alice"
+        mask.host = "alice@example.com"
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "detour")
+        self.assertFalse(game.progress.has_solved("alice", "#side-quest"))
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "fire")
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "detour")
+        self.assertTrue(game.progress.has_solved("alice", "#side-quest"))
+        route = game.router.routes[("channel", "#side-quest", "user")]
+        self.assertEqual(route[0], "channel_attempt")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from progress import ProgressStore
+
+
+class TestProgressStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "progress.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_record_and_reload(self):
+        """Test that solves survive a restart."""
+        store = ProgressStore(self.path, batch_size=10)
+        self.assertTrue(store.record_solve("Alice", "#challenge-1-welcome", solved_at=1.0))
+        self.assertFalse(store.record_solve("alice", "#challenge-1-welcome"))
+        store.close()
+
+        store = ProgressStore(self.path)
+        self.assertTrue(store.has_solved("ALICE", "#challenge-1-welcome"))
+        self.assertEqual(store.solved_channels("alice"), {"#challenge-1-welcome": 1.0})
+        store.close()
+
+    def test_write_behind_batches(self):
+        """Test that solves are only written once the batch is full."""
+        store = ProgressStore(self.path, batch_size=3)
+        store._flush_handle = object()  # pretend a delayed flush is already armed
+        store.record_solve("a", "#one")
+        store.record_solve("b", "#one")
+        self.assertEqual(len(store.pending), 2)
+        store._flush_handle = None
+        store.record_solve("c", "#one")
+        self.assertEqual(store.pending, [])
+        count = store.db.execute("SELECT COUNT(*) FROM solves").fetchone()[0]
+        self.assertEqual(count, 3)
+        store.close()
+
+    def test_failed_flush_is_retried(self):
+        """Test that a timed flush hitting a database error keeps the solves and tries again."""
+        store = ProgressStore(self.path, flush_interval=0.01)
+        real_db = store.db
+        broken = MagicMock()
+        broken.__enter__.side_effect = sqlite3.OperationalError("database is locked")
+
+        async def go():
+            store.db = broken
+            with self.assertLogs("progress", "ERROR"):
+                store.record_solve("alice", "#one")
+                await asyncio.sleep(0.05)
+            self.assertEqual(len(store.pending), 1)
+            store.db = real_db
+            await asyncio.sleep(0.05)
+
+        asyncio.run(go())
+        self.assertEqual(store.pending, [])
+        count = store.db.execute("SELECT COUNT(*) FROM solves").fetchone()[0]
+        self.assertEqual(count, 1)
+        store.close()
+        store.close()
+
+
+class TestSolutionProgress(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {}
+        self.game = CTFGame(self.mock_bot)
+        self.mask = MagicMock()
+        self.mask.nick = "TestUser"
+
+    def test_cannot_skip_ahead(self):
+        """Test that a later challenge's answer is refused until earlier ones are solved."""
+        progress = self.game.progress
+        self.game.handle_challenge_solution(self.mask, "paris")
+        self.assertFalse(progress.has_solved("TestUser", "#challenge-2-binary"))
+
+        self.game.handle_challenge_solution(self.mask, "fire")
+        self.assertTrue(progress.has_solved("TestUser", "#challenge-1-welcome"))
+
+        self.game.handle_challenge_solution(self.mask, "paris")
+        self.assertTrue(progress.has_solved("TestUser", "#challenge-2-binary"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from ratelimit import ALLOW, DROP, THROTTLE, SlidingWindowLimiter, parse_rate
+
+
+class TestSlidingWindowLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = SlidingWindowLimiter(3, 60, max_keys=2, clock=lambda: self.now)
+
+    def test_budget(self):
+        """Test that a sender is throttled once, then dropped, then allowed again."""
+        results = [self.limiter.hit("a@host") for _ in range(5)]
+        self.assertEqual(results, [ALLOW, ALLOW, ALLOW, THROTTLE, DROP])
+        self.assertEqual(self.limiter.throttled_keys(), 1)
+        self.now = 150
+        self.assertEqual(self.limiter.hit("a@host"), ALLOW)
+        self.assertEqual(self.limiter.throttled_keys(), 0)
+
+    def test_sliding_window(self):
+        """Test that the previous window still counts while it overlaps."""
+        for _ in range(3):
+            self.limiter.hit("a@host")
+        self.now = 70  # previous window still covers 5/6 of the sliding window
+        self.assertEqual(self.limiter.hit("a@host"), ALLOW)
+        self.assertEqual(self.limiter.hit("a@host"), THROTTLE)
+        self.now = 115  # only 1/12 overlap left
+        self.assertEqual(self.limiter.hit("a@host"), ALLOW)
+
+    def test_lru_eviction(self):
+        """Test that memory is bounded by evicting the least recently seen key."""
+        self.limiter.hit("a")
+        self.limiter.hit("b")
+        self.limiter.hit("a")
+        self.limiter.hit("c")
+        self.assertEqual(list(self.limiter.keys), ["a", "c"])
+        self.assertEqual(self.limiter.stats()["evicted"], 1)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/30"), (5, 30.0))
+        self.assertEqual(parse_rate("5"), (5, 60.0))
+
+
+class TestGameRateLimits(unittest.TestCase):
+    def test_channel_attempts_collapsed(self):
+        """Test that a flood of leaked answers collapses to a single notice."""
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"ratelimit_channel": "2/60"}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "TestUser"
+        mask.host = "user@example.com"
+        for _ in range(10):
+            game.on_privmsg(mask, "PRIVMSG", "#challenge-1-welcome", "hidden message")
+        # 2 leaks warned with 2 private lines each, then one notice
+        self.assertEqual(mock_bot.send_line.call_count, 2 * 2 + 1)
+        self.assertEqual(game.limits["channel"].stats()["throttled"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from challenges import refresh_challenges
+from render import NICK_SLOT, MessageCache, Template, split_utf8
+
+
+class TestSplitUtf8(unittest.TestCase):
+    def test_short_text_untouched(self):
+        """Test that text within the budget is kept as one chunk."""
+        self.assertEqual(split_utf8("hello world", 100), ["hello world"])
+
+    def test_splits_on_spaces(self):
+        """Test that long text is split at spaces within the byte budget."""
+        self.assertEqual(split_utf8("aaaa bbbb cccc", 9), ["aaaa bbbb", "cccc"])
+
+    def test_never_splits_characters(self):
+        """Test that multi-byte characters are never cut in half."""
+        text = "🎯" * 10
+        chunks = split_utf8(text, 10)
+        self.assertEqual("".join(chunks), text)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.encode("utf-8")), 10)
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_nick(self):
+        """Test that lines are pre-split and only the nick is substituted."""
+        template = Template(f"👋 Hi {NICK_SLOT}!\n\nsecond line")
+        self.assertEqual(template.render("alice"), ["👋 Hi alice!", "second line"])
+        self.assertEqual(template.render("bob"), ["👋 Hi bob!", "second line"])
+
+    def test_long_substitution_is_split(self):
+        """Test that a substitution longer than a nick still fits the budget."""
+        template = Template(f"Welcome {NICK_SLOT}!", budget=60)
+        names = ", ".join(f"player{i}" for i in range(20))
+        for line in template.render(names):
+            self.assertLessEqual(len(line.encode("utf-8")), 60)
+
+
+class TestMessageCache(unittest.TestCase):
+    def test_cache_invalidated_on_refresh(self):
+        """Test that templates are compiled once per challenge generation."""
+        cache = MessageCache()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return f"Hello {NICK_SLOT}"
+
+        self.assertEqual(cache.render("hello", build, "alice"), ["Hello alice"])
+        self.assertEqual(cache.render("hello", build, "bob"), ["Hello bob"])
+        self.assertEqual(len(builds), 1)
+        refresh_challenges()
+        cache.render("hello", build, "carol")
+        self.assertEqual(len(builds), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
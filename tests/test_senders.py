@@ -0,0 +1,186 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from benchmarks.fakeircd import FakeIRCServer
+from benchmarks.loadtest import wait_until
+from outbound import OutboundScheduler
+from senders import SenderConnection, SenderPool
+
+NICKS = [f"player{i}" for i in range(60)]
+
+
+class FakeSender:
+    def __init__(self, name):
+        self.name = name
+        self.sent = []
+        self.outbound = OutboundScheduler(self, rate=1000, burst=1000)
+        self.log = MagicMock()
+
+    def send_line(self, data, nowait=False):
+        self.sent.append(data)
+
+
+class TestSenderPool(unittest.TestCase):
+    def setUp(self):
+        self.main = FakeSender("main")
+        self.senders = [FakeSender(f"sender{i}") for i in (1, 2)]
+        self.pool = SenderPool(self.main.outbound, self.senders)
+
+    def test_without_senders(self):
+        """Test that everything goes through the main connection until a sender is ready."""
+        self.pool.send("alice", "hello")
+        self.assertEqual(self.main.sent, ["PRIVMSG alice :hello"])
+
+    def test_routing(self):
+        """Test that nicks are spread over ready senders while channels stay on the main one."""
+        for sender in self.senders:
+            self.pool._sender_ready(sender)
+        shards = {nick: self.pool.route(nick) for nick in NICKS}
+        for sender in [self.main] + self.senders:
+            self.assertGreater(list(shards.values()).count(sender.outbound), 5)
+        self.assertIs(self.pool.route("#challenge-1-welcome"), self.main.outbound)
+        self.assertIs(self.pool.route("alice,bob"), self.main.outbound)
+        # Only the nicks of a sender that goes away move
+        self.pool._sender_down(self.senders[0])
+        for nick, shard in shards.items():
+            if shard is not self.senders[0].outbound:
+                self.assertIs(self.pool.route(nick), shard)
+
+    def test_drop_out_keeps_order(self):
+        """Test that lines queued on a failed sender move on in order."""
+
+        async def go():
+            self.pool._sender_ready(self.senders[0])
+            nick = next(n for n in NICKS if self.pool.route(n) is self.senders[0].outbound)
+            for number in range(5):
+                self.pool.send(nick, f"line {number}")
+            self.pool._sender_down(self.senders[0])
+            # Still queued on the main connection, so later lines follow it there
+            self.pool.send(nick, "line 5")
+            self.pool._sender_ready(self.senders[0])
+            self.pool.send(nick, "line 6")
+            await self.pool.flush()
+            return nick
+
+        nick = asyncio.run(go())
+        self.assertEqual(self.main.sent, [f"PRIVMSG {nick} :line {n}" for n in range(7)])
+        self.assertEqual(self.senders[0].sent, [])
+        self.assertEqual(self.pool.moved, 5)
+
+    def test_stats(self):
+        """Test that the lane stats add up over every connection."""
+        self.pool._sender_ready(self.senders[0])
+        for nick in NICKS[:10]:
+            self.pool.send(nick, "hello", lane="solve")
+        self.assertEqual(self.pool.stats()["solve"]["sent"], 10)
+        self.assertEqual(sum(s["sent"] for s in self.pool.sender_stats().values()), 10)
+        self.assertEqual(
+            {name: s["ready"] for name, s in self.pool.sender_stats().items()},
+            {"main": True, "sender1": True, "sender2": False},
+        )
+
+
+class TestSenderConnection(unittest.TestCase):
+    def test_connect_fail_and_rejoin(self):
+        """Test that senders register, drop out when disconnected and come back."""
+
+        async def go():
+            server = FakeIRCServer()
+            port = await server.start()
+            received = {}
+
+            def observe(client, command, params):
+                if command == "PRIVMSG":
+                    received.setdefault(client.nick, []).append(params[1])
+
+            server.observers.append(observe)
+            main = FakeSender("main")
+            # The first sender's nick is taken, it picks another one
+            taken = server.clients.setdefault("bot1", MagicMock())
+            senders = [
+                SenderConnection(
+                    f"sender{i}", f"bot{i}", "127.0.0.1", port, rate=1000, reconnect_delay=0.05
+                )
+                for i in (1, 2)
+            ]
+            pool = SenderPool(main.outbound, senders)
+            pool.start()
+            try:
+                await wait_until(lambda: len(pool.shards) == 3, 5)
+                self.assertEqual(senders[0].nick, "bot1_")
+                del server.clients["bot1"], taken
+                for nick in NICKS:
+                    pool.send(nick, "hello")
+                await pool.flush()
+                # The main connection is a fake, the server only sees the senders
+                expected = len(NICKS) - len(main.sent)
+                await wait_until(lambda: sum(map(len, received.values())) == expected, 5)
+                self.assertGreater(len(received["bot1_"]), 0)
+                self.assertGreater(len(received["bot2"]), 0)
+                self.assertGreater(len(main.sent), 0)
+
+                server.client("bot2").writer.close()
+                await wait_until(lambda: not senders[1].ready, 5)
+                self.assertEqual(len(pool.shards), 2)
+                await wait_until(lambda: senders[1].ready, 5)
+                self.assertEqual(len(pool.shards), 3)
+                self.assertEqual(senders[1].connects, 2)
+            finally:
+                pool.close()
+                await wait_until(lambda: not server.clients, 5)
+                await server.stop()
+
+        asyncio.run(go())
+
+    def test_reply_to_sender_nick(self):
+        """Test that only PRIVMSGs players send to a sender nick reach the pool's on_message."""
+
+        async def go():
+            server = FakeIRCServer()
+            port = await server.start()
+            sender = SenderConnection("sender1", "bot1", "127.0.0.1", port, rate=1000)
+            pool = SenderPool(FakeSender("main").outbound, [sender])
+            received = []
+
+            def on_message(*message):
+                received.append(message)
+                if message[2] == "boom":
+                    raise ValueError(message[2])
+
+            pool.on_message = on_message
+            pool.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            services, services_writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                services_writer.write(b"NICK NickServ\r\nUSER ns 0 * :Services\r\n")
+                writer.write(b"NICK alice\r\nUSER alice 0 * :Alice\r\n")
+                await wait_until(
+                    lambda: sender.ready and server.client("alice") and server.client("NickServ"),
+                    5,
+                )
+                services_writer.write(b"PRIVMSG bot1 :not registered\r\n")
+                with self.assertLogs("senders", "ERROR"):
+                    writer.write(b"PRIVMSG bot1 :boom\r\nNOTICE bot1 :hello\r\n")
+                    writer.write(b"PRIVMSG bob :no\r\nPRIVMSG bot1 :fire\r\n")
+                    await wait_until(lambda: len(received) == 2, 5)
+                self.assertEqual(
+                    received,
+                    [
+                        ("alice!alice@127.0.0.1", "PRIVMSG", "boom"),
+                        ("alice!alice@127.0.0.1", "PRIVMSG", "fire"),
+                    ],
+                )
+                self.assertEqual(sender.connects, 1)
+            finally:
+                services_writer.close()
+                writer.close()
+                pool.close()
+                await wait_until(lambda: not server.clients, 5)
+                await server.stop()
+
+        asyncio.run(go())
+
+
+if __name__ == "__main__":
+    unittest.main()
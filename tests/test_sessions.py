@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from challenges import current_snapshot
+from sessions import SessionManager
+
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.ended = []
+        self.sessions = SessionManager(idle=300, max_sessions=3, tick=60, clock=self.clock)
+        self.sessions.on_end.append(self.ended.append)
+
+    def clock(self):
+        return self.now
+
+    def test_touch(self):
+        """Test that activity starts a session once and then updates it."""
+        self.sessions.touch("Alice", "alice@example.com")
+        self.now = 10
+        session = self.sessions.touch("alice")
+        self.assertEqual(len(self.sessions), 1)
+        self.assertEqual(session.messages, 2)
+        self.assertEqual(session.seen, 10)
+        self.assertEqual(session.host, "alice@example.com")
+
+    def test_idle_eviction(self):
+        """Test that idle sessions end on the wheel while active ones stay."""
+        self.sessions.touch("alice")
+        self.sessions.touch("bob")
+        for self.now in range(60, 601, 60):
+            self.sessions.touch("bob")
+            if self.now == 240:
+                self.assertIn("alice", self.sessions.sessions)
+        self.assertEqual(list(self.sessions.sessions), ["bob"])
+        self.assertEqual(self.ended, ["alice"])
+        self.now = 1000
+        self.assertEqual(
+            self.sessions.stats(), {"sessions": 0, "ended": {"idle": 2, "cap": 0, "quit": 0}}
+        )
+
+    def test_long_gap(self):
+        """Test that the wheel catches up after more than a lap without events."""
+        self.sessions.touch("alice")
+        self.now = 100000
+        self.sessions.advance()
+        self.assertEqual(len(self.sessions), 0)
+
+    def test_cap(self):
+        """Test that a full manager ends the idlest session for a new nick."""
+        for self.now, nick in ((0, "alice"), (70, "bob"), (130, "carol")):
+            self.sessions.touch(nick)
+        self.now = 140
+        self.sessions.touch("dave")
+        self.assertEqual(sorted(self.sessions.sessions), ["bob", "carol", "dave"])
+        self.assertEqual(self.sessions.ended["cap"], 1)
+
+    def test_nick_and_quit(self):
+        """Test that a session follows a NICK change and ends on QUIT."""
+        self.sessions.touch("alice")
+        self.sessions.rename("alice", "Alice_away")
+        self.assertIsNone(self.sessions.get("alice"))
+        self.assertEqual(self.sessions.get("alice_away").nick, "Alice_away")
+        self.assertIsNone(self.sessions.rename("nobody", "somebody"))
+        self.sessions.remove("alice_away")
+        self.assertEqual(len(self.sessions), 0)
+        self.assertEqual(self.ended, ["alice_away"])
+        self.now = 1000
+        self.sessions.advance()
+        self.assertEqual(self.sessions.ended["idle"], 0)
+
+    def test_estimated_bytes(self):
+        """Test that the estimate grows with the sessions held."""
+        empty = self.sessions.estimated_bytes()
+        self.sessions.touch("alice", "alice@example.com")
+        self.assertGreater(self.sessions.estimated_bytes(), empty + 100)
+
+
+class TestBotSessions(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {"instance_secret": "secret"}
+        self.game = CTFGame(self.mock_bot)
+
+    def mask(self, nick):
+        mask = MagicMock()
+        mask.nick = nick
+        mask.host = f"{nick.lower()}@example.com"
+        return mask
+
+    def test_session_lifecycle(self):
+        """Test that messages, NICK and QUIT drive the sessions."""
+        self.game.on_privmsg(self.mask("Alice"), "PRIVMSG", "#challenge-1-welcome", "hello")
+        self.game.instances.get(current_snapshot(), "#challenge-5-vigenere", "Alice_away")
+        self.game.track_nick(self.mask("Alice"), "Alice_away")
+        self.assertEqual(self.game.sessions.get("alice_away").messages, 1)
+        self.game.track_quit(self.mask("Alice_away"))
+        self.assertEqual(len(self.game.sessions), 0)
+        self.assertEqual(self.game.instances.stats()["size"], 0)
+        self.assertIn('ctf_sessions_ended_total{reason="quit"} 1', self.game.metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
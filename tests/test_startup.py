@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock
+
+from bot import CTFGame
+from startup import StartupTracker, batch_channels, channel_limit, join_target_limit
+
+
+class TestJoinBatching(unittest.TestCase):
+    def test_isupport_limits(self):
+        """Test parsing of TARGMAX and CHANLIMIT."""
+        self.assertEqual(join_target_limit({"TARGMAX": "JOIN:4,PRIVMSG:4"}), 4)
+        self.assertIsNone(join_target_limit({"TARGMAX": "JOIN:,KICK:1"}))
+        self.assertIsNone(join_target_limit({}))
+        self.assertEqual(channel_limit({"CHANLIMIT": "#&:50"}), 50)
+        self.assertIsNone(channel_limit({}))
+
+    def test_batch_by_targets(self):
+        """Test that batches respect the per-JOIN target limit."""
+        channels = [f"#c{i}" for i in range(5)]
+        self.assertEqual(batch_channels(channels, max_targets=2), ["#c0,#c1", "#c2,#c3", "#c4"])
+        self.assertEqual(batch_channels(channels), [",".join(channels)])
+
+    def test_batch_by_bytes(self):
+        """Test that batches fit in one line."""
+        channels = [f"#channel-{i:03d}" for i in range(100)]
+        batches = batch_channels(channels, max_bytes=100)
+        self.assertEqual(",".join(batches).split(","), channels)
+        for batch in batches:
+            self.assertLessEqual(len(batch), 100)
+
+
+class TestStartupTracker(unittest.TestCase):
+    def test_ready_after_all_confirmed(self):
+        """Test deduplicated joins and the ready timestamp."""
+        now = [10.0]
+        tracker = StartupTracker(clock=lambda: now[0])
+        self.assertEqual(tracker.expect(["#a", "#b"]), ["#a", "#b"])
+        self.assertEqual(tracker.expect(["#a", "#b"]), [])
+        self.assertFalse(tracker.confirm("#a"))
+        now[0] = 11.5
+        self.assertTrue(tracker.confirm("#B"))
+        self.assertEqual(tracker.time_to_ready, 1.5)
+        self.assertEqual(tracker.expect(["#a"], retry=True), [])
+
+
+class TestGameStartup(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {"password": "secret", "email": "ctf@example.com"}
+        self.game = CTFGame(self.mock_bot)
+        self.nickserv = MagicMock()
+        self.nickserv.nick = "NickServ"
+
+    def joins(self):
+        lines = [call.args[0] for call in self.mock_bot.send_line.call_args_list]
+        return [line[len("JOIN ") :] for line in lines if line.startswith("JOIN ")]
+
+    def test_single_batched_join(self):
+        """Test that startup joins every channel in one JOIN and tracks readiness."""
+        self.game.server_ready()
+        self.assertEqual(len(self.joins()), 1)
+        targets = self.joins()[0]
+        self.assertTrue(targets.startswith("#CypherCon,#challenge-1"))
+
+        bot_mask = MagicMock()
+        bot_mask.nick = "CTFGameBot"
+        for channel in targets.split(","):
+            self.game.track_join(bot_mask, channel)
+        self.assertIsNotNone(self.game.startup.time_to_ready)
+
+        # Identification does not join confirmed channels again
+        self.game.handle_nickserv(self.nickserv, "NOTICE", "CTFGameBot", "Password accepted")
+        self.assertEqual(len(self.joins()), 1)
+
+    def test_unconfirmed_joins_retried_after_identify(self):
+        """Test that channels still waiting for a JOIN are retried once identified."""
+        self.game.server_ready()
+        self.game.handle_nickserv(self.nickserv, "NOTICE", "CTFGameBot", "Password accepted")
+        self.assertEqual(len(self.joins()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from irc3.utils import IrcString
+
+import challenges
+from benchmarks.suite import build_snapshot, compare, main, make_game, run_suite
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.original = challenges.current_snapshot()
+
+    def tearDown(self):
+        challenges.install_snapshot(self.original)
+
+    def test_recording_bot(self):
+        """Test that the game runs on the recording bot and what it sends is kept."""
+        snapshot = build_snapshot(100)
+        self.assertEqual(len(snapshot.channels), 107)
+        challenges.install_snapshot(snapshot)
+        game = make_game(snapshot)
+        game.handle_challenge_solution(IrcString("alice!a@host"), "fire")
+        self.assertTrue(game.progress.has_solved("alice", "#challenge-1-welcome"))
+        self.assertTrue(any("Congratulations" in line for line in game.bot.sent))
+        # The topic is echoed back, so it is only sent once
+        game.handle_join(IrcString("bob!b@host"), "#challenge-1-welcome")
+        game.handle_join(IrcString("carol!c@host"), "#challenge-1-welcome")
+        self.assertEqual(sum(line.startswith("TOPIC") for line in game.bot.sent), 1)
+        game.verifiers.shutdown()
+
+    def test_run_suite(self):
+        """Test that every path is timed and the installed snapshot is put back."""
+        results = run_suite({"default": 0, "pack100": 100}, scale=0.001)
+        self.assertIn("handle_challenge_solution[pack100]", results)
+        self.assertIn("vigenere_encrypt[default]", results)
+        self.assertNotIn("vigenere_encrypt[pack100]", results)
+        self.assertIs(challenges.current_snapshot(), self.original)
+
+    def test_compare(self):
+        """Test that only results over the threshold count as slower."""
+        rows = compare(
+            {"a": 2.0, "b": 1.2, "c": 0.5, "d": 1.0}, {"a": 1.0, "b": 1.0, "c": 1.0, "e": 1.0}, 1.5
+        )
+        self.assertEqual(
+            [(name, status) for name, *_, status in rows],
+            [("a", "slower"), ("b", "ok"), ("c", "faster"), ("d", "new"), ("e", "missing")],
+        )
+
+    def test_regression_fails(self):
+        """Test that a slowdown over the threshold fails the run."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            baseline = os.path.join(tmpdir, "baseline.json")
+            with open(baseline, "w") as out:
+                json.dump({"results": {"get_challenge[default]": 1e-6}}, out)
+            args = ["--baseline", baseline, "--match", "get_challenge[default]", "--scale", "0.01"]
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main(args), 1)
+                self.assertEqual(main(args + ["--threshold", "1e9"]), 0)
+        self.assertIn("slower", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import challenges
+from bot import CTFGame
+from challenges import ChallengeSnapshot, current_snapshot
+from leaks import LeakDetector
+from packs import PackError, load_packs
+from verifiers import VerifierEngine, make_pbkdf2_solution, player_flag, prepare
+
+PBKDF2 = make_pbkdf2_solution("open sesame", iterations=1000, salt="salt")
+
+
+def snapshot_with(**verifiers):
+    """A snapshot with one challenge per verifier, named #<verifier>."""
+    return ChallengeSnapshot(
+        {
+            f"#{name}": {"challenge": name, "solution": solution, "hint": "", "verifier": name}
+            for name, solution in verifiers.items()
+        }
+    )
+
+
+class TestVerifiers(unittest.TestCase):
+    def setUp(self):
+        self.engine = VerifierEngine()
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_cheap_verifiers(self):
+        """Test the verifiers with right and wrong answers."""
+        sha = "sha256:" + hashlib.sha256(b"hunter2").hexdigest()
+        snapshot = snapshot_with(regex=r"flag\{[0-9]+\}", hash=sha, player_flag="key")
+        check = self.engine.check
+        self.assertTrue(check(snapshot, "#regex", "alice", " FLAG{123} "))
+        self.assertFalse(check(snapshot, "#regex", "alice", "flag{abc}"))
+        self.assertTrue(check(snapshot, "#hash", "alice", "Hunter2"))
+        self.assertFalse(check(snapshot, "#hash", "alice", sha))
+        flag = player_flag(b"key", "#player_flag", "Alice")
+        self.assertTrue(check(snapshot, "#player_flag", "alice", flag))
+        self.assertFalse(check(snapshot, "#player_flag", "bob", flag))
+
+    def test_regex_is_bounded(self):
+        """Test that patterns run in the pool and long answers are not matched at all."""
+        snapshot = snapshot_with(regex="(a+)+b")
+        self.assertTrue(self.engine.is_expensive(snapshot, "#regex"))
+        self.assertFalse(self.engine.check(snapshot, "#regex", "alice", "a" * 201 + "b"))
+        self.engine.timeout = 0.5
+
+        async def run():
+            return await self.engine.check_async(snapshot, "#regex", "alice", "a" * 40 + "c")
+
+        self.assertFalse(asyncio.run(run()))
+        self.assertEqual(self.engine.stats()["timeouts"], {"regex": 1})
+        # The stuck worker was ended, the pool is started again for the next check
+        self.assertIsNone(self.engine.pool)
+        self.assertEqual(self.engine.pending, 0)
+
+    def test_timeout_keeps_other_checks(self):
+        """Test that checks sharing the pool with a runaway one are sent again, not failed."""
+        snapshot = snapshot_with(regex="(a+)+b", pbkdf2=PBKDF2)
+        # One worker, the second check waits behind the runaway one
+        self.engine.workers, self.engine.timeout = 1, 1.0
+
+        async def run():
+            runaway = self.engine.check_async(snapshot, "#regex", "alice", "a" * 40 + "c")
+            right = self.engine.check_async(snapshot, "#pbkdf2", "bob", "open sesame")
+            return await asyncio.gather(runaway, right)
+
+        self.assertEqual(asyncio.run(run()), [False, True])
+        self.assertEqual(self.engine.stats()["timeouts"], {"regex": 1})
+
+    def test_proof_of_work(self):
+        """Test that a proof of work is bound to the player who did it."""
+        snapshot = snapshot_with(pow="8")
+        nonce = next(
+            str(n)
+            for n in itertools.count()
+            if hashlib.sha256(f"#pow:alice:{n}".encode()).digest()[0] == 0
+        )
+        self.assertTrue(self.engine.check(snapshot, "#pow", "Alice", nonce))
+        self.assertFalse(self.engine.check(snapshot, "#pow", "bob", nonce))
+
+    def test_invalid_specs(self):
+        """Test that challenges a verifier cannot check are rejected up front."""
+        for details in (
+            {"solution": "(", "verifier": "regex"},
+            {"solution": "md6:00", "verifier": "hash"},
+            {"solution": "1000$salt", "verifier": "pbkdf2"},
+            {"solution": "300", "verifier": "pow"},
+            {"solution": "x", "verifier": "telepathy"},
+        ):
+            with self.assertRaises(ValueError):
+                prepare("#x", details)
+
+    def test_only_exact_answers_are_indexed(self):
+        """Test that stored patterns and hashes are never accepted or scanned as answers."""
+        snapshot = snapshot_with(regex="fire|water", pbkdf2=PBKDF2)
+        self.assertEqual(dict(snapshot.solution_index), {})
+        self.assertIsNone(snapshot.find_solution_channel(PBKDF2))
+        self.assertFalse(snapshot.matches_solution("#regex", "fire|water"))
+        self.assertEqual(LeakDetector().scan(snapshot, f"it is {PBKDF2}"), [])
+
+    def test_pool(self):
+        """Test expensive checks in the pool, with back-pressure and timeouts."""
+        snapshot = snapshot_with(pbkdf2=PBKDF2)
+
+        async def run():
+            right = await self.engine.check_async(snapshot, "#pbkdf2", "alice", "Open Sesame")
+            wrong = await self.engine.check_async(snapshot, "#pbkdf2", "alice", "open")
+            self.engine.max_pending = 0
+            busy = await self.engine.check_async(snapshot, "#pbkdf2", "alice", "open sesame")
+            self.engine.max_pending, self.engine.timeout = 32, 0
+            late = await self.engine.check_async(snapshot, "#pbkdf2", "alice", "open sesame")
+            return right, wrong, busy, late
+
+        self.assertTrue(self.engine.is_expensive(snapshot, "#pbkdf2"))
+        self.assertEqual(asyncio.run(run()), (True, False, None, False))
+        stats = self.engine.stats()
+        self.assertEqual(stats["rejected"], {"pbkdf2": 1})
+        self.assertEqual(stats["timeouts"], {"pbkdf2": 1})
+
+
+class TestVerifierPacks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original = current_snapshot()
+
+    def tearDown(self):
+        challenges.install_snapshot(self.original)
+        self.tmpdir.cleanup()
+
+    def write(self, entries):
+        with open(os.path.join(self.tmpdir.name, "pack.json"), "w") as pack:
+            json.dump({"challenges": entries}, pack)
+
+    def test_pack_verifier_errors(self):
+        """Test that a pack naming an unknown verifier or a bad pattern is rejected."""
+        for verifier, solution in (("telepathy", "x"), ("regex", "[")):
+            self.write(
+                [{"channel": "#x", "challenge": "1", "solution": solution, "verifier": verifier}]
+            )
+            with self.assertRaises(PackError):
+                load_packs(self.tmpdir.name)
+
+    def test_bot_offloads_expensive_answers(self):
+        """Test that a key-stretched answer is checked in the pool while the loop runs."""
+        self.write(
+            [
+                {
+                    "channel": "#vault",
+                    "challenge": "Open the vault",
+                    "solution": PBKDF2,
+                    "verifier": "pbkdf2",
+                    "requires": [],
+                }
+            ]
+        )
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"packs_dir": self.tmpdir.name}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "Alice"
+        mask.host = "alice@example.com"
+
+        async def run():
+            game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "open sesame")
+            self.assertFalse(game.progress.has_solved("alice", "#vault"))
+            await asyncio.gather(*game.verify_tasks)
+
+        try:
+            asyncio.run(run())
+        finally:
+            game.verifiers.shutdown()
+        self.assertTrue(game.progress.has_solved("alice", "#vault"))
+        self.assertIn('ctf_verifier_seconds_count{verifier="pbkdf2"} 1', game.metrics.render())
+
+    def test_bot_checks_in_place_without_a_loop(self):
+        """Test that expensive answers are still checked when no event loop is running."""
+        self.write(
+            [{"channel": "#vault", "challenge": "1", "solution": PBKDF2, "verifier": "pbkdf2"}]
+        )
+        mock_bot = MagicMock()
+        mock_bot.nick = "CTFGameBot"
+        mock_bot.config = {"packs_dir": self.tmpdir.name}
+        game = CTFGame(mock_bot)
+        mask = MagicMock()
+        mask.nick = "Alice"
+        mask.host = "alice@example.com"
+        game.on_privmsg(mask, "PRIVMSG", "CTFGameBot", "open sesame")
+        self.assertTrue(game.progress.has_solved("alice", "#vault"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from bot import CTFGame
+from challenges import current_snapshot
+from packs import PackError, load_packs
+from windows import TimeWindow, build_window
+
+TIMED = "#challenge-4-timed"
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class TestTimeWindow(unittest.TestCase):
+    def test_open_and_close(self):
+        """Test that a window is open from its cron time for its length."""
+        window = TimeWindow("20 4 * * *", minutes=2, timezone="UTC")
+        self.assertFalse(window.is_open(utc(2024, 1, 1, 4, 19, 59)))
+        self.assertEqual(window.next_change, utc(2024, 1, 1, 4, 20))
+        self.assertTrue(window.is_open(utc(2024, 1, 1, 4, 20)))
+        self.assertEqual(window.opened_at, utc(2024, 1, 1, 4, 20))
+        self.assertTrue(window.is_open(utc(2024, 1, 1, 4, 21, 59)))
+        self.assertFalse(window.is_open(utc(2024, 1, 1, 4, 22)))
+        self.assertEqual(window.next_change, utc(2024, 1, 2, 4, 20))
+
+    def test_reads_between_changes(self):
+        """Test that reads between two changes do not recompute the window."""
+        window = TimeWindow("0 12 * * *", timezone="UTC")
+        window.is_open(utc(2024, 1, 1, 8))
+        with patch.object(TimeWindow, "update") as update:
+            for hour in range(8, 12):
+                self.assertFalse(window.is_open(utc(2024, 1, 1, hour, 30)))
+        update.assert_not_called()
+
+    def test_time_zones(self):
+        """Test that windows follow the local time of their zone across DST."""
+        window = TimeWindow("0 9 * * *", minutes=60, timezone="America/New_York")
+        self.assertTrue(window.is_open(utc(2024, 1, 15, 14, 30)))
+        self.assertTrue(window.is_open(utc(2024, 7, 15, 13, 30)))
+        self.assertFalse(window.is_open(utc(2024, 7, 15, 14, 30)))
+
+    def test_invalid_windows(self):
+        """Test that bad schedules, lengths and zones are rejected."""
+        for args in (("61 * * * *",), ("0 12 * * *", 0), ("0 12 * * *", 1, "Mars/Olympus")):
+            with self.assertRaises(ValueError):
+                TimeWindow(*args)
+
+    def test_build_window(self):
+        """Test the window fields and the legacy time_check flag."""
+        self.assertIsNone(build_window({}))
+        self.assertEqual(build_window({"time_check": True}).spec, "20 4 * * *")
+        window = build_window({"window": "*/5 * * * *", "window_minutes": 2, "timezone": "UTC"})
+        self.assertEqual((window.minutes, window.timezone), (2, "UTC"))
+        self.assertIn(TIMED, current_snapshot().windows)
+
+    def test_pack_windows(self):
+        """Test that packs are checked for valid windows."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            entry = {"channel": "#x", "challenge": "1", "solution": "a", "window": "* * *"}
+            with open(os.path.join(tmpdir, "pack.json"), "w") as pack:
+                json.dump({"challenges": [entry]}, pack)
+            with self.assertRaises(PackError):
+                load_packs(tmpdir)
+
+
+class TestWindowAnnouncements(unittest.TestCase):
+    def setUp(self):
+        self.mock_bot = MagicMock()
+        self.mock_bot.nick = "CTFGameBot"
+        self.mock_bot.config = {"server_config": {"TARGMAX": "PRIVMSG:4"}}
+        self.game = CTFGame(self.mock_bot)
+
+    def test_batched_announcement(self):
+        """Test that online players waiting on a window are told in one batched pass."""
+        snapshot = current_snapshot()
+        chain = list(snapshot.channels)
+        for nick, solved in (("Alice", 3), ("Bob", 1), ("Carol", 4), ("Dave", 3), ("Erin", 3)):
+            self.game.sessions.touch(nick)
+            for channel in chain[:solved]:
+                self.game.progress.record_solve(nick, channel)
+        self.game.progress.record_solve("offline", chain[0])
+        opens = datetime(2024, 1, 1, 16, 20, 30).timestamp()
+
+        self.game.check_windows(datetime(2024, 1, 1, 16, 19).timestamp())
+        self.mock_bot.send_line.assert_not_called()
+        self.game.check_windows(opens)
+        self.game.check_windows(opens + 10)
+        lines = [call.args[0] for call in self.mock_bot.send_line.call_args_list]
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith(f"PRIVMSG {TIMED},Alice,Dave,Erin :⏰"))
+        self.assertIn(
+            f'ctf_window_notified_total{{channel="{TIMED}"}} 3', self.game.metrics.render()
+        )
+
+    def test_solving_inside_the_window(self):
+        """Test that the timed challenge is only accepted while its window is open."""
+        snapshot = current_snapshot()
+        window = snapshot.windows[TIMED]
+        self.addCleanup(setattr, window, "next_change", float("-inf"))
+        window.update(datetime(2024, 1, 1, 12).timestamp())
+        window.next_change = float("inf")
+        self.assertFalse(snapshot.matches_solution(TIMED, "blaze"))
+        window.update(datetime(2024, 1, 1, 4, 20, 30).timestamp())
+        window.next_change = float("inf")
+        self.assertTrue(snapshot.matches_solution(TIMED, "blaze"))
+
+    def test_right_answer_outside_the_window(self):
+        """Test that the right answer outside the window is told so instead of ignored."""
+        snapshot = current_snapshot()
+        window = snapshot.windows[TIMED]
+        self.addCleanup(setattr, window, "next_change", float("-inf"))
+        window.update(datetime(2024, 1, 1, 12).timestamp())
+        window.next_change = float("inf")
+        mask = MagicMock()
+        mask.nick = "Alice"
+        for channel in snapshot.channels[: snapshot.positions[TIMED]]:
+            self.game.progress.record_solve(mask.nick, channel)
+        self.game.handle_challenge_solution(mask, "Blaze")
+        self.assertFalse(self.game.progress.has_solved(mask.nick, TIMED))
+        self.assertIn(
+            f"that is the answer to {TIMED}, but its time window is closed",
+            self.mock_bot.send_line.call_args.args[0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import re
+import time
+
+from challenges import DEFAULT_VERIFIER, normalize_solution, solution_digest, verifier_name
+from progress import player_key
+
+log = logging.getLogger(__name__)
+
+# Longer answers never match a pattern, and they give a backtracking one more to chew on
+MAX_REGEX_ANSWER = 200
+
+
+class Verifier:
+    """How one kind of answer is checked.
+
+    ``prepare(channel, details)`` turns a challenge into a spec once per
+    snapshot and raises ValueError for a bad one, ``check(spec, answer,
+    player)`` must be a module-level function so expensive checks can be
+    sent to another process.
+    """
+
+    __slots__ = ("name", "prepare", "check", "expensive")
+
+    def __init__(self, name, prepare, check, expensive=False):
+        self.name = name
+        self.prepare = prepare
+        self.check = check
+        self.expensive = expensive
+
+
+VERIFIERS = {}
+
+
+def register_verifier(name, prepare, check, expensive=False):
+    """Add a verifier type challenges can name in their "verifier" field."""
+    VERIFIERS[name] = Verifier(name, prepare, check, expensive)
+    return VERIFIERS[name]
+
+
+def prepare_exact(channel, details):
+    return solution_digest(details["solution"])
+
+
+def check_exact(spec, answer, player):
+    return hmac.compare_digest(spec, solution_digest(answer))
+
+
+def prepare_regex(channel, details):
+    try:
+        return re.compile(details["solution"], re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"{channel}: invalid answer pattern: {e}") from e
+
+
+def check_regex(spec, answer, player):
+    answer = normalize_solution(answer)
+    if len(answer) > MAX_REGEX_ANSWER:
+        return False
+    return spec.fullmatch(answer) is not None
+
+
+def prepare_hash(channel, details):
+    """The solution is "<algorithm>:<hex digest>", any algorithm hashlib always has."""
+    algorithm, _, expected = details["solution"].partition(":")
+    if algorithm not in hashlib.algorithms_guaranteed or not expected:
+        raise ValueError(f"{channel}: hash answers look like 'sha256:<hex digest>'")
+    return algorithm, expected.lower()
+
+
+def check_hash(spec, answer, player):
+    algorithm, expected = spec
+    actual = hashlib.new(algorithm, normalize_solution(answer).encode("utf-8")).hexdigest()
+    return hmac.compare_digest(expected, actual)
+
+
+def make_pbkdf2_solution(answer, iterations=200000, salt=None):
+    """The stored form of a key-stretched answer, "pbkdf2_sha256$<iterations>$<salt>$<hex>"."""
+    salt = salt or os.urandom(8).hex()
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", normalize_solution(answer).encode("utf-8"), salt.encode("utf-8"), iterations
+    )
+    return f"pbkdf2_sha256${iterations}${salt}${digest.hex()}"
+
+
+def prepare_pbkdf2(channel, details):
+    parts = details["solution"].split("$")
+    if len(parts) != 4 or parts[0] != "pbkdf2_sha256" or not parts[1].isdigit():
+        raise ValueError(f"{channel}: pbkdf2 answers look like 'pbkdf2_sha256$<n>$<salt>$<hex>'")
+    return int(parts[1]), parts[2].encode("utf-8"), bytes.fromhex(parts[3])
+
+
+def check_pbkdf2(spec, answer, player):
+    iterations, salt, expected = spec
+    actual = hashlib.pbkdf2_hmac(
+        "sha256", normalize_solution(answer).encode("utf-8"), salt, iterations
+    )
+    return hmac.compare_digest(expected, actual)
+
+
+def prepare_pow(channel, details):
+    """The solution is the number of leading zero bits the player's hash needs."""
+    bits = details["solution"].strip()
+    if not bits.isdigit() or not 0 < int(bits) <= 64:
+        raise ValueError(f"{channel}: proof-of-work answers need a difficulty of 1 to 64 bits")
+    return channel, int(bits)
+
+
+def check_pow(spec, answer, player):
+    """sha256("<channel>:<player>:<answer>") must start with the required zero bits."""
+    channel, bits = spec
+    nonce = answer.strip()
+    digest = hashlib.sha256(f"{channel}:{player}:{nonce}".encode("utf-8")).digest()
+    return int.from_bytes(digest, "big") >> (256 - bits) == 0
+
+
+def player_flag(key, channel, player):
+    """The flag a player gets from a service sharing the challenge's flag key."""
+    message = f"{channel}\n{player_key(player)}".encode("utf-8")
+    return "flag{" + hmac.new(key, message, hashlib.sha256).hexdigest()[:32] + "}"
+
+
+def prepare_player_flag(channel, details):
+    return details["solution"].encode("utf-8"), channel
+
+
+def check_player_flag(spec, answer, player):
+    key, channel = spec
+    return hmac.compare_digest(player_flag(key, channel, player), normalize_solution(answer))
+
+
+register_verifier(DEFAULT_VERIFIER, prepare_exact, check_exact)
+# Pack patterns may backtrack for a long time, the pool's timeout bounds them
+register_verifier("regex", prepare_regex, check_regex, expensive=True)
+register_verifier("hash", prepare_hash, check_hash)
+register_verifier("pbkdf2", prepare_pbkdf2, check_pbkdf2, expensive=True)
+register_verifier("pow", prepare_pow, check_pow)
+register_verifier("player_flag", prepare_player_flag, check_player_flag)
+
+
+def prepare(channel, details, registry=None):
+    """(Verifier, spec) for a challenge, ValueError when it cannot be checked."""
+    registry = VERIFIERS if registry is None else registry
+    name = verifier_name(details)
+    verifier = registry.get(name)
+    if verifier is None:
+        raise ValueError(f"{channel}: unknown verifier {name}")
+    return verifier, verifier.prepare(channel, details)
+
+
+class _Job:
+    """An expensive check in the pool, sent again to a new pool when its own is ended."""
+
+    __slots__ = ("check", "args", "future", "pool")
+
+    def __init__(self, check, args, future):
+        self.check = check
+        self.args = args
+        self.future = future
+        self.pool = None
+
+
+def _post(loop, callback, *args):
+    """Hand a pool result to the event loop, dropped when the loop is already closed."""
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        pass
+
+
+class VerifierEngine:
+    """Checks answers with each challenge's verifier.
+
+    Cheap verifiers run inline. Expensive ones go to a bounded process pool
+    so they never block the event loop: at most ``max_pending`` checks wait
+    for a worker, more are turned away, and a check that takes longer than
+    ``timeout`` counts as a wrong answer and ends the pool, so a runaway
+    pattern does not hold a worker. The other checks that were in the pool
+    are sent again to a new one.
+    """
+
+    def __init__(self, workers=2, max_pending=32, timeout=5.0, histogram=None, registry=None):
+        self.registry = VERIFIERS if registry is None else registry
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.histogram = histogram  # observe(seconds, verifier name)
+        self.pool = None
+        self.version = None
+        self.specs = {}  # channel -> (Verifier, spec)
+        self.running = set()  # _Job
+        self.timeouts = {}
+        self.rejected = {}
+        self.errors = {}
+
+    @property
+    def pending(self):
+        return len(self.running)
+
+    def get(self, snapshot, channel):
+        """(Verifier, spec) for a channel of ``snapshot``, prepared once per version."""
+        if self.version != snapshot.version:
+            self.specs = {}
+            self.version = snapshot.version
+        entry = self.specs.get(channel)
+        if entry is None:
+            entry = self.specs[channel] = prepare(
+                channel, snapshot.challenges[channel], self.registry
+            )
+        return entry
+
+    def is_expensive(self, snapshot, channel):
+        return self.get(snapshot, channel)[0].expensive
+
+    def _observe(self, name, started):
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - started, name)
+
+    def _failed(self, verifier, channel):
+        self.errors[verifier.name] = self.errors.get(verifier.name, 0) + 1
+        log.exception("Verifier %s failed for %s", verifier.name, channel)
+        return False
+
+    def check(self, snapshot, channel, player, answer):
+        """Check an answer in place, also used for expensive verifiers outside the event loop."""
+        if channel not in snapshot or not snapshot.is_time_open(channel):
+            return False
+        verifier, spec = self.get(snapshot, channel)
+        started = time.perf_counter()
+        try:
+            return bool(verifier.check(spec, answer, player_key(player)))
+        except Exception:
+            return self._failed(verifier, channel)
+        finally:
+            self._observe(verifier.name, started)
+
+    async def check_async(self, snapshot, channel, player, answer):
+        """Check an answer in the pool, None when too many checks are already waiting."""
+        if channel not in snapshot or not snapshot.is_time_open(channel):
+            return False
+        verifier, spec = self.get(snapshot, channel)
+        if self.pending >= self.max_pending:
+            self.rejected[verifier.name] = self.rejected.get(verifier.name, 0) + 1
+            return None
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        job = _Job(verifier.check, (spec, answer, player_key(player)), loop.create_future())
+        # A check keeps its slot until it really finishes, even when its player stopped waiting
+        self.running.add(job)
+        self._submit(job)
+        try:
+            return bool(await self._wait(job))
+        except asyncio.TimeoutError:
+            self.timeouts[verifier.name] = self.timeouts.get(verifier.name, 0) + 1
+            log.warning("Verifier %s timed out for %s", verifier.name, channel)
+            self._restart(job)
+            return False
+        except Exception:
+            return self._failed(verifier, channel)
+        finally:
+            self._observe(verifier.name, started)
+
+    def _submit(self, job):
+        if self.pool is None:
+            # Spawned workers do not inherit the bot's threads or sockets
+            self.pool = multiprocessing.get_context("spawn").Pool(self.workers)
+        loop = job.future.get_loop()
+        pool = job.pool = self.pool
+        pool.apply_async(
+            job.check,
+            job.args,
+            callback=lambda value: _post(loop, self._finished, job, pool, value, None),
+            error_callback=lambda error: _post(loop, self._finished, job, pool, None, error),
+        )
+
+    async def _wait(self, job):
+        """The result of ``job``, its time starts again when another check restarted the pool."""
+        while True:
+            pool = job.pool
+            try:
+                return await asyncio.wait_for(asyncio.shield(job.future), self.timeout)
+            except asyncio.TimeoutError:
+                if job.pool is pool:
+                    raise
+
+    def _finished(self, job, pool, value, error):
+        # Results from an ended pool are stale, the job was sent again or given up
+        if job.pool is not pool or job not in self.running:
+            return
+        self.running.discard(job)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(value)
+
+    def _restart(self, stuck):
+        """End the pool, one worker may be stuck on ``stuck`` for good, and resend the others."""
+        self.running.discard(stuck)
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            # A running call cannot be cancelled, only its process can be ended
+            pool.terminate()
+        for job in list(self.running):
+            self._submit(job)
+
+    def shutdown(self, wait=True):
+        pool, self.pool = self.pool, None
+        self.running.clear()
+        if pool is None:
+            return
+        if wait:
+            pool.close()
+            pool.join()
+        else:
+            pool.terminate()
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "timeouts": dict(self.timeouts),
+            "rejected": dict(self.rejected),
+            "errors": dict(self.errors),
+        }
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta
+
+from croniter import croniter
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python 3.8
+    ZoneInfo = None
+
+# Challenges that only set "time_check" open at 4:20 for a minute, server time
+LEGACY_WINDOW = "20 4 * * *"
+
+
+class TimeWindow:
+    """When a timed challenge can be solved: it opens on a cron schedule for ``minutes``.
+
+    The next opening or closing time is worked out once, when the previous
+    one passes, so ``is_open`` is a comparison and a flag read.
+    """
+
+    __slots__ = ("spec", "minutes", "timezone", "tz", "open", "opened_at", "next_change")
+
+    def __init__(self, spec, minutes=1, timezone=None):
+        if not isinstance(spec, str) or not croniter.is_valid(spec):
+            raise ValueError(f"invalid window schedule {spec!r}")
+        if isinstance(minutes, bool) or not isinstance(minutes, int) or minutes < 1:
+            raise ValueError("window_minutes must be a whole number of minutes")
+        self.spec = spec
+        self.minutes = minutes
+        self.timezone = timezone
+        # Without a time zone the schedule follows the server's local time
+        self.tz = None
+        if timezone:
+            if ZoneInfo is None:
+                raise ValueError("time zones need Python 3.9 or later")
+            try:
+                self.tz = ZoneInfo(timezone)
+            except (ZoneInfoNotFoundError, ValueError) as e:
+                raise ValueError(f"unknown time zone {timezone!r}") from e
+        self.open = False
+        self.opened_at = None  # timestamp the current window opened at
+        self.next_change = float("-inf")
+
+    def update(self, now=None):
+        """Work out whether the window is open at ``now`` and when that changes next."""
+        now = time.time() if now is None else now
+        moment = datetime.fromtimestamp(int(now), self.tz)
+        # get_prev() skips a start time that is itself a match, so start just after now
+        after = moment + timedelta(seconds=1)
+        opened = croniter(self.spec, after).get_prev(datetime).timestamp()
+        closes = opened + self.minutes * 60
+        if now < closes:
+            self.open, self.opened_at, self.next_change = True, opened, closes
+        else:
+            following = croniter(self.spec, moment).get_next(datetime).timestamp()
+            self.open, self.opened_at, self.next_change = False, None, following
+
+    def is_open(self, now=None):
+        now = time.time() if now is None else now
+        if now >= self.next_change:
+            self.update(now)
+        return self.open
+
+
+def build_window(details):
+    """The time window a challenge declares, None when it can always be solved."""
+    if "window" in details:
+        return TimeWindow(
+            details["window"], details.get("window_minutes", 1), details.get("timezone")
+        )
+    if details.get("time_check", False):
+        return TimeWindow(LEGACY_WINDOW)
+    return None